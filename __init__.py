@@ -19,48 +19,39 @@ md2img - Markdown 转图片 Skill
     )
 """
 
+from importlib import import_module
 from pathlib import Path
 
 # 引用本地的 md2img 模块
 SKILL_DIR = Path(__file__).parent
 MD2IMG_DIR = SKILL_DIR / "md2img"
 
-# 从本地 md2img 导入所有公开 API
-try:
-    import sys
-    if str(MD2IMG_DIR) not in sys.path:
-        sys.path.insert(0, str(MD2IMG_DIR))
-    
-    from md2img import (
-        md_to_images,
-        convert,
-        convert_file,
-        md2img,
-        XIAOHONGSHU_1_1,
-        XIAOHONGSHU_2_3,
-        XIAOHONGSHU_3_4,
-        XIAOHONGSHU_4_3,
-    )
-    
-    __all__ = [
-        "md_to_images",
-        "convert",
-        "convert_file",
-        "md2img",
-        "XIAOHONGSHU_1_1",
-        "XIAOHONGSHU_2_3",
-        "XIAOHONGSHU_3_4",
-        "XIAOHONGSHU_4_3",
-    ]
-    
-except ImportError as e:
-    import warnings
-    warnings.warn(f"md2img 依赖未安装: {e}. 请运行: pip install weasyprint PyMuPDF markdown Pillow")
-    
-    # 提供占位符函数
-    def md_to_images(*args, **kwargs):
-        raise ImportError("md2img 依赖未安装。请运行: pip install weasyprint PyMuPDF markdown Pillow")
-    
-    __all__ = ["md_to_images"]
+__all__ = [
+    "md_to_images",
+    "convert",
+    "convert_file",
+    "convert_many",
+    "md2img",
+    "XIAOHONGSHU_1_1",
+    "XIAOHONGSHU_2_3",
+    "XIAOHONGSHU_3_4",
+    "XIAOHONGSHU_4_3",
+]
 
 __version__ = "1.0.1"
+
+
+def __getattr__(name):
+    # 公开 API 首次访问时才从本地 md2img 子包导入，导入本 Skill 只为列出预设时不加载任何依赖
+    if name not in __all__:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    try:
+        value = getattr(import_module(".md2img", __name__), name)
+    except ImportError as e:
+        raise ImportError(f"md2img 依赖未安装: {e}. 请运行: pip install weasyprint PyMuPDF markdown Pillow") from e
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
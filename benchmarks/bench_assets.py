@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+图片资源缓存基准：同一组图片（logo / 头像 / 贴纸 + 一张大照片）在连续多次渲染中的耗时。
+
+    fresh      每次渲染新建 AssetFetcher（相当于不缓存：每次重新读文件）
+    shared     多次渲染共用一个 AssetFetcher（进程内 LRU 缓存）
+    downscale  共用 + downscale=True（大图缩到页宽后缓存）
+
+每个模式在独立子进程中先渲染一次（不计时，导入依赖、预热字体），再渲染 -n 次，
+报告墙钟 / layout / raster 耗时的中位数、资源命中率与未命中时的读取 + 解码耗时合计。
+
+用法:
+    python benchmarks/bench_assets.py -n 5
+    python benchmarks/bench_assets.py --photo 6000x4000 --size 1_1
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+SKILL_ROOT = Path(__file__).resolve().parent.parent
+if str(SKILL_ROOT) not in sys.path:
+    sys.path.insert(0, str(SKILL_ROOT))
+
+import corpus  # noqa: E402
+
+MODES = ("fresh", "shared", "downscale")
+SIZES = {"3_4": (1242, 1656), "1_1": (1080, 1080), "2_3": (1080, 1620), "4_3": (1440, 1080)}
+
+
+def make_assets(directory: Path, photo: str) -> str:
+    """在 directory 下生成图片，返回引用它们的 Markdown。"""
+    from PIL import Image, ImageDraw
+
+    w, h = map(int, photo.lower().split("x"))
+    img = Image.new("RGB", (w, h), (230, 236, 242))
+    draw = ImageDraw.Draw(img)
+    for i in range(0, w, 40):
+        draw.line([(i, 0), (w - i, h)], fill=(40 + i % 200, 90, 160), width=3)
+    img.save(directory / "photo.jpg", quality=90)
+    for name, size in (("logo.png", 320), ("avatar.png", 160), ("sticker.png", 240)):
+        Image.new("RGBA", (size, size), (255, 120, 80, 200)).save(directory / name)
+    images = "\n\n".join(f"![{n}]({n})" for n in ("logo.png", "avatar.png", "photo.jpg", "sticker.png", "logo.png"))
+    return f"{images}\n\n{corpus.build('card')}"
+
+
+def child(mode: str, directory: str, size: str, n: int) -> dict:
+    from md2img import AssetFetcher, RenderStats, convert
+
+    md = (Path(directory) / "post.md").read_text(encoding="utf-8")
+    shared = AssetFetcher(directory, downscale=mode == "downscale")
+    out = Path(directory) / mode / "post.png"
+    walls, layouts, rasters, hits, misses, load = [], [], [], 0, 0, 0.0
+    for i in range(n + 1):
+        stats = RenderStats()
+        assets = AssetFetcher(directory) if mode == "fresh" else shared
+        convert(md, out, page_size=SIZES[size], assets=assets, stats=stats)
+        if i == 0:
+            continue
+        walls.append(stats.wall * 1000)
+        layouts.append(stats.stages.get("layout", {}).get("wall", 0.0) * 1000)
+        rasters.append(stats.stages.get("raster", {}).get("wall", 0.0) * 1000)
+        for entry in stats.assets.values():
+            hits += entry["hits"]
+            misses += entry["misses"]
+            load += entry["fetch"] + entry["decode"]
+    return {
+        "wall_ms": statistics.median(walls),
+        "layout_ms": statistics.median(layouts),
+        "raster_ms": statistics.median(rasters),
+        "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+        "load_ms": load * 1000 / n,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="图片资源缓存：连续渲染耗时与命中率")
+    parser.add_argument("-n", type=int, default=5, help="计时的渲染次数 (默认: 5)")
+    parser.add_argument("--photo", default="4000x3000", help="大照片尺寸 (默认: 4000x3000)")
+    parser.add_argument("--size", choices=list(SIZES), default="3_4")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "DIR"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(child(*args.child, args.size, args.n)))
+        return
+
+    print(f"{'mode':<10} {'wall':>9} {'layout':>9} {'raster':>9} {'hit rate':>9} {'load/render':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        (Path(tmp) / "post.md").write_text(make_assets(Path(tmp), args.photo), encoding="utf-8")
+        for mode in args.modes:
+            stdout = subprocess.run(
+                [sys.executable, __file__, "--child", mode, tmp, "-n", str(args.n), "--size", args.size],
+                capture_output=True, text=True, check=True,
+            ).stdout
+            row = json.loads(stdout.strip().splitlines()[-1])
+            print(
+                f"{mode:<10} {row['wall_ms']:>7.0f}ms {row['layout_ms']:>7.0f}ms {row['raster_ms']:>7.0f}ms "
+                f"{row['hit_rate']:>8.0%} {row['load_ms']:>10.1f}ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+超长文档分块排版基准：单次排版 vs chunked（串行 / 并行）。
+
+    single    整篇一次排版（默认流程）
+    chunked   chunked=LEVEL，各块依次排版
+    parallel  chunked=LEVEL + raster_workers=-w，各块在进程池中并行排版
+
+每个模式在独立子进程中把语料逐页渲染为 PNG（只编码不写盘），重复 -n 次，
+报告墙钟与 CPU 时间（中位数）、各阶段耗时、输出张数及子进程峰值 RSS（不含进程池 worker）。
+分块在切块处强制分页，张数可能比单次排版略多；像素不逐页比对。
+
+语料 article_* 的章节为二级标题，默认 --level 2。
+
+用法:
+    python benchmarks/bench_chunked.py -n 3
+    python benchmarks/bench_chunked.py --doc article_50k --level 2 -w 4 --style muyao
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+SKILL_ROOT = Path(__file__).resolve().parent.parent
+if str(SKILL_ROOT) not in sys.path:
+    sys.path.insert(0, str(SKILL_ROOT))
+
+import corpus  # noqa: E402
+
+MODES = ("single", "chunked", "parallel")
+
+
+def child(mode: str, doc: str, style: str, level: int, workers: int, n: int) -> dict:
+    from md2img import XIAOHONGSHU_3_4, iter_pages, preload_fonts
+    from md2img.stats import RenderStats, peak_rss
+
+    preload_fonts([style])
+    md = corpus.build(doc)
+    kwargs = {}
+    if mode != "single":
+        kwargs["chunked"] = level
+    if mode == "parallel":
+        kwargs["raster_workers"] = workers
+
+    walls, cpus, stages, pages = [], [], {}, 0
+    for _ in range(n):
+        stats = RenderStats()
+        pages = sum(1 for _ in iter_pages(md, page_size=XIAOHONGSHU_3_4, style=style, stats=stats, **kwargs))
+        walls.append(stats.wall * 1000)
+        cpus.append(stats.cpu * 1000)
+        for name, entry in stats.stages.items():
+            stages.setdefault(name, []).append(entry["wall"] * 1000)
+    return {
+        "wall_ms": statistics.median(walls),
+        "cpu_ms": statistics.median(cpus),
+        "stages_ms": {name: statistics.median(v) for name, v in stages.items()},
+        "pages": pages,
+        "peak_mib": peak_rss() / 2**20,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="超长文档：单次排版 vs 分块排版的耗时与峰值内存")
+    parser.add_argument("-n", type=int, default=1, help="每个模式重复次数 (默认: 1)")
+    parser.add_argument("--doc", choices=list(corpus.CORPUS), default="article_500k", help="语料 (默认: article_500k)")
+    parser.add_argument("--style", default="default", help="样式 (默认: default)")
+    parser.add_argument("--level", type=int, default=2, help="chunked 的标题级别 (默认: 2)")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1, help="parallel 模式的进程数 (默认: CPU 核数)")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--child", metavar="MODE", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(child(args.child, args.doc, args.style, args.level, args.workers, args.n)))
+        return
+
+    print(f"{args.doc}，{len(corpus.build(args.doc))} 字符，style={args.style}，level={args.level}，workers={args.workers}")
+    print(f"{'mode':<9} {'wall':>9} {'cpu':>9} {'layout':>9} {'pdf':>9} {'raster':>9} {'pages':>6} {'peak rss':>9}")
+    for mode in args.modes:
+        stdout = subprocess.run(
+            [sys.executable, __file__, "--child", mode, "--doc", args.doc, "--style", args.style,
+             "--level", str(args.level), "-w", str(args.workers), "-n", str(args.n)],
+            capture_output=True, text=True, check=True,
+        ).stdout
+        row = json.loads(stdout.strip().splitlines()[-1])
+        stages = row["stages_ms"]
+        print(
+            f"{mode:<9} {row['wall_ms']:>7.0f}ms {row['cpu_ms']:>7.0f}ms "
+            + " ".join(f"{stages.get(s, 0.0):>7.0f}ms" for s in ("layout", "pdf", "raster"))
+            + f" {row['pages']:>6} {row['peak_mib']:>6.0f}MiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
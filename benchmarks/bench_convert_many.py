@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+convert_many 吞吐量：不同 worker 数下的 jobs/s，对比逐个调用 convert。
+
+用法:
+    python benchmarks/bench_convert_many.py -n 64 --workers 1 2 4 8
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SKILL_ROOT = Path(__file__).resolve().parent.parent
+if str(SKILL_ROOT) not in sys.path:
+    sys.path.insert(0, str(SKILL_ROOT))
+
+from md2img import XIAOHONGSHU_3_4, convert, convert_many, shutdown_pool  # noqa: E402
+
+CARD_MD = """# 小红书笔记 {i}
+
+今天分享一个小技巧 ✨
+
+- 第一步：准备材料
+- 第二步：动手实践
+- 第三步：总结复盘
+
+> 坚持就是胜利
+"""
+
+
+def make_jobs(n: int, out_dir: Path) -> list:
+    return [
+        {"md_content": CARD_MD.format(i=i), "output_path": out_dir / f"card_{i}.png", "page_size": XIAOHONGSHU_3_4}
+        for i in range(n)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="convert_many 吞吐量基准")
+    parser.add_argument("-n", type=int, default=64, help="任务数 (默认: 64)")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        out_dir = Path(tmp)
+        jobs = make_jobs(args.n, out_dir)
+
+        t0 = time.perf_counter()
+        for job in jobs:
+            convert(job["md_content"], job["output_path"], page_size=job["page_size"])
+        serial = args.n / (time.perf_counter() - t0)
+        print(f"serial convert : {serial:6.2f} jobs/s")
+
+        for workers in sorted(set(args.workers)):
+            # 预热：池创建与 worker 初始化不计入吞吐
+            list(convert_many(make_jobs(workers, out_dir), workers=workers))
+            t0 = time.perf_counter()
+            failed = sum(not r.ok for r in convert_many(jobs, workers=workers))
+            rate = args.n / (time.perf_counter() - t0)
+            print(f"workers={workers:<3}    : {rate:6.2f} jobs/s  (x{rate / serial:.2f} vs serial, {failed} failed)")
+            shutdown_pool()
+
+
+if __name__ == "__main__":
+    main()
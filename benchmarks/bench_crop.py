@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+长图裁白边：旧流程（编码写盘 → 重新解码 → 裁剪 → 再编码）vs 新流程（pixmap 上求包围盒 → 一次编码）。
+
+用 PyMuPDF 直接生成不同高度的单页 PDF（不依赖 WeasyPrint），每种方法在独立子进程中运行，
+报告耗时与峰值 RSS（ru_maxrss）。
+
+用法:
+    python benchmarks/bench_crop.py --heights 5000 20000 60000 --ext .png .jpg
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SKILL_ROOT = Path(__file__).resolve().parent.parent
+if str(SKILL_ROOT) not in sys.path:
+    sys.path.insert(0, str(SKILL_ROOT))
+
+DPI = 150
+
+
+def make_pdf(height_px: int) -> bytes:
+    """宽 800px、高 height_px（96 DPI 下）的单页 PDF，上下左右留白，中间是文字与色块。"""
+    import fitz
+
+    pt = 72 / 96
+    doc = fitz.open()
+    page = doc.new_page(width=800 * pt, height=height_px * pt)
+    y = 40
+    while y < height_px * 0.8:
+        page.insert_text((40 * pt, y * pt), f"第 {y} 行 — lorem ipsum dolor sit amet", fontsize=20 * pt)
+        if y % 1000 < 40:
+            page.draw_rect(fitz.Rect(60 * pt, y * pt, 700 * pt, (y + 300) * pt), color=(0.2, 0.3, 0.8), fill=(0.9, 0.95, 1))
+        y += 40
+    return doc.tobytes()
+
+
+def run_one(method: str, height: int, ext: str, out_dir: Path) -> dict:
+    import fitz
+
+    from md2img.converter import _crop_image_to_content, _save_pixmap
+    from md2img.stats import peak_rss
+
+    pdf = make_pdf(height)
+    out = out_dir / f"{method}_{height}{ext}"
+    base_rss = peak_rss()
+    t0 = time.perf_counter()
+    with fitz.open(stream=pdf, filetype="pdf") as doc:
+        pix = doc[0].get_pixmap(dpi=DPI, alpha=False)
+        if method == "old":
+            if ext == ".jpg":
+                pix.save(str(out), output="jpeg", jpg_quality=95)
+            else:
+                pix.save(str(out))
+            del pix
+            _crop_image_to_content(out)
+        else:
+            _save_pixmap(pix, out, trim=True)
+    elapsed = time.perf_counter() - t0
+    peak = peak_rss()
+    return {"ms": elapsed * 1000, "peak_mib": peak / 2**20, "delta_mib": (peak - base_rss) / 2**20}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="裁白边流程基准")
+    parser.add_argument("--heights", type=int, nargs="+", default=[5000, 20000, 60000], help="页高 (px @96DPI)")
+    parser.add_argument("--ext", nargs="+", default=[".png", ".jpg"])
+    parser.add_argument("--child", nargs=3, metavar=("METHOD", "HEIGHT", "EXT"), help=argparse.SUPPRESS)
+    parser.add_argument("--out-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        method, height, ext = args.child
+        print(json.dumps(run_one(method, int(height), ext, Path(args.out_dir))))
+        return
+
+    print(f"{'height':>7} {'ext':>5} {'old ms':>9} {'new ms':>9} {'old ΔRSS':>10} {'new ΔRSS':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for height in args.heights:
+            for ext in args.ext:
+                row = {}
+                for method in ("old", "new"):
+                    out = subprocess.run(
+                        [sys.executable, __file__, "--child", method, str(height), ext, "--out-dir", tmp],
+                        capture_output=True, text=True, check=True,
+                    ).stdout
+                    row[method] = json.loads(out.strip().splitlines()[-1])
+                print(
+                    f"{height:>7} {ext:>5} {row['old']['ms']:>7.0f}ms {row['new']['ms']:>7.0f}ms "
+                    f"{row['old']['delta_mib']:>8.0f}Mi {row['new']['delta_mib']:>8.0f}Mi"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+输出格式与编码参数：同一批页面像素用各种格式编码，报告每页编码耗时与字节数（中位数）。
+
+    png          PyMuPDF 默认 PNG（旧流程）
+    png-l1/l9    Pillow PNG，zlib 级别 1 / 9
+    png-p64/p256 64 / 256 色调色板 PNG
+    jpeg95       JPEG quality 95（旧流程）
+    webp         无损 WebP（method 4）
+    webp-p64     64 色调色板 + 无损 WebP
+    webp-q80     有损 WebP quality 80
+    ...
+
+像素先用 iter_pages(format="pil") 渲染好，只对编码计时。
+
+用法:
+    python benchmarks/bench_encode.py -n 3 --docs card article_5k table_heavy
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+SKILL_ROOT = Path(__file__).resolve().parent.parent
+if str(SKILL_ROOT) not in sys.path:
+    sys.path.insert(0, str(SKILL_ROOT))
+
+import corpus  # noqa: E402
+from md2img import XIAOHONGSHU_3_4, iter_pages  # noqa: E402
+from md2img.converter import _encode_options, _encode_pixmap  # noqa: E402
+
+# 名称 → (格式, 编码参数)
+PROFILES = {
+    "png": ("png", None),
+    "png-l1": ("png", {"effort": 1}),
+    "png-l9": ("png", {"effort": 9}),
+    "png-p64": ("png", {"colors": 64}),
+    "png-p256": ("png", {"colors": 256}),
+    "jpeg95": ("jpeg", None),
+    "jpeg80": ("jpeg", {"quality": 80}),
+    "webp": ("webp", None),
+    "webp-e0": ("webp", {"effort": 0}),
+    "webp-p64": ("webp", {"colors": 64}),
+    "webp-q80": ("webp", {"quality": 80}),
+}
+
+
+def to_pixmap(img):
+    import fitz  # PyMuPDF
+
+    return fitz.Pixmap(fitz.csRGB, img.width, img.height, img.tobytes(), 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="输出格式 / 编码参数基准")
+    parser.add_argument("-n", type=int, default=3, help="每页每种格式重复次数 (默认: 3)")
+    parser.add_argument("--docs", nargs="+", choices=list(corpus.CORPUS), default=["card", "article_5k", "code_heavy", "table_heavy"])
+    parser.add_argument("--pages", type=int, default=4, help="每篇最多取前几页 (默认: 4)")
+    parser.add_argument("--profiles", nargs="+", choices=list(PROFILES), default=list(PROFILES))
+    args = parser.parse_args()
+
+    print(f"{'doc':<12} {'profile':<10} {'encode/page':>12} {'bytes/page':>11} {'vs png':>7}")
+    for name in args.docs:
+        pixmaps = []
+        for page in iter_pages(corpus.build(name), page_size=XIAOHONGSHU_3_4, format="pil"):
+            pixmaps.append(to_pixmap(page.data))
+            if len(pixmaps) >= args.pages:
+                break
+        baseline = None
+        for profile in args.profiles:
+            fmt, encode = PROFILES[profile]
+            options = _encode_options(encode, fmt)
+            times, sizes = [], []
+            for pix in pixmaps:
+                for _ in range(args.n):
+                    t0 = time.perf_counter()
+                    data = _encode_pixmap(pix, fmt, options=options)
+                    times.append(time.perf_counter() - t0)
+                sizes.append(len(data))
+            size = statistics.median(sizes)
+            if profile == "png":
+                baseline = size
+            ratio = f"{size / baseline:>6.2f}x" if baseline else ""
+            print(f"{name:<12} {profile:<10} {statistics.median(times) * 1000:>10.1f}ms {size:>11,.0f} {ratio:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+一份 Markdown 渲染成多种页尺寸：
+    sequential   对每个尺寸各调一次 convert（旧流程，Markdown → HTML 重复做，尺寸间串行）
+    fanout       convert_sizes：HTML 只生成一次，各尺寸在常驻进程池中并行排版 + 栅格化
+报告墙钟中位数与总页数；fanout 的首次调用（进程池启动 + 预热）单独列出，不计入中位数。
+
+并行收益取决于 CPU 核数：单核机器上 fanout 只省掉重复的 Markdown 转换。
+
+用法:
+    python benchmarks/bench_fanout.py -n 3 --docs article_5k article_50k --workers 3
+"""
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SKILL_ROOT = Path(__file__).resolve().parent.parent
+if str(SKILL_ROOT) not in sys.path:
+    sys.path.insert(0, str(SKILL_ROOT))
+
+import corpus  # noqa: E402
+from md2img import XIAOHONGSHU_1_1, XIAOHONGSHU_3_4, XIAOHONGSHU_4_3, convert, convert_sizes, shutdown_pool  # noqa: E402
+from md2img.converter import _convert_block  # noqa: E402
+
+SIZES = [XIAOHONGSHU_3_4, XIAOHONGSHU_1_1, XIAOHONGSHU_4_3]
+
+
+def sequential(md: str, out: Path, workers: int) -> int:
+    pages = 0
+    for w, h in SIZES:
+        result = convert(md, out / f"seq_{w}x{h}.png", page_size=(w, h))
+        pages += len(result) if isinstance(result, list) else 1
+    return pages
+
+
+def fanout(md: str, out: Path, workers: int) -> int:
+    return sum(len(paths) for paths in convert_sizes(md, out / "fan.png", SIZES, workers=workers).values())
+
+
+def timed(fn, md: str, out: Path, workers: int, n: int) -> tuple:
+    times, pages = [], 0
+    for _ in range(n):
+        _convert_block.cache_clear()  # 每轮都从 Markdown 转换开始，与冷调用一致
+        t0 = time.perf_counter()
+        pages = fn(md, out, workers)
+        times.append(time.perf_counter() - t0)
+    return statistics.median(times), pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="多尺寸扇出渲染基准")
+    parser.add_argument("-n", type=int, default=3, help="每项重复次数 (默认: 3)")
+    parser.add_argument("--docs", nargs="+", choices=list(corpus.CORPUS), default=["card", "article_5k", "article_50k"])
+    parser.add_argument("--workers", type=int, default=len(SIZES), help=f"fanout 的进程数 (默认: {len(SIZES)})")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        out = Path(tmp)
+        t0 = time.perf_counter()
+        fanout(corpus.build("card"), out, args.workers)
+        print(f"进程池启动 + 首次 fanout: {(time.perf_counter() - t0) * 1000:.0f}ms\n")
+
+        print(f"{'doc':<14} {'pages':>5} {'sequential':>11} {'fanout':>9} {'speedup':>8}")
+        for name in args.docs:
+            md = corpus.build(name)
+            seq, pages = timed(sequential, md, out, args.workers, args.n)
+            fan, _ = timed(fanout, md, out, args.workers, args.n)
+            print(f"{name:<14} {pages:>5} {seq * 1000:>9.0f}ms {fan * 1000:>7.0f}ms {seq / fan:>7.2f}x")
+    shutdown_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+首页时延（time-to-first-page）：iter_pages 产出第 1 页的耗时 vs convert 全部写完的耗时。
+
+用法:
+    python benchmarks/bench_first_page.py -n 5 --sections 10 40
+"""
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SKILL_ROOT = Path(__file__).resolve().parent.parent
+if str(SKILL_ROOT) not in sys.path:
+    sys.path.insert(0, str(SKILL_ROOT))
+
+from md2img import XIAOHONGSHU_3_4, convert, iter_pages  # noqa: E402
+
+SECTION_MD = """## 第 {i} 节
+
+正文段落，**加粗**与`代码`。生活不止眼前的苟且，还有诗和远方；代码不止眼前的 bug，还有重构和测试。
+
+- 要点一
+- 要点二
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="首页时延基准")
+    parser.add_argument("-n", type=int, default=5, help="重复次数 (默认: 5)")
+    parser.add_argument("--sections", type=int, nargs="+", default=[10, 40], help="文章节数")
+    args = parser.parse_args()
+
+    print(f"{'sections':>8} {'pages':>6} {'first page':>11} {'all pages':>10} {'convert':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for sections in args.sections:
+            md = "# 首页时延\n\n" + "\n".join(SECTION_MD.format(i=i) for i in range(sections))
+            list(iter_pages(md, page_size=XIAOHONGSHU_3_4))  # 预热
+            first, total, full, pages = [], [], [], 0
+            for _ in range(args.n):
+                t0 = time.perf_counter()
+                for page in iter_pages(md, page_size=XIAOHONGSHU_3_4):
+                    if page.index == 0:
+                        first.append(time.perf_counter() - t0)
+                    pages = page.info["page_count"]
+                total.append(time.perf_counter() - t0)
+
+                t0 = time.perf_counter()
+                convert(md, Path(tmp) / "post.png", page_size=XIAOHONGSHU_3_4)
+                full.append(time.perf_counter() - t0)
+            med = lambda xs: statistics.median(xs) * 1000  # noqa: E731
+            print(f"{sections:>8} {pages:>6} {med(first):>9.0f}ms {med(total):>8.0f}ms {med(full):>7.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
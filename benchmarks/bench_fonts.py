@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+字体配置基准：每个主题的首次渲染与稳态渲染耗时。
+
+    per-call   每次渲染新建 FontConfiguration（旧流程：fontconfig 配置与 Pango 字体映射每次重建）
+    shared     线程内共享的字体配置（当前流程）
+    preload    先 preload_fonts([主题])（耗时另列），再渲染
+
+每个 (主题, 模式) 在独立子进程中运行：先导入依赖（不计时），再渲染一次记为 first，
+之后重复 -n 次取中位数记为 steady。--font-dir 指定随附字体目录（同 MD2IMG_FONT_DIR）。
+
+用法:
+    python benchmarks/bench_fonts.py -n 5 --styles muyao virgil excali handwriting
+    python benchmarks/bench_fonts.py --font-dir assets/fonts --doc cjk
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SKILL_ROOT = Path(__file__).resolve().parent.parent
+if str(SKILL_ROOT) not in sys.path:
+    sys.path.insert(0, str(SKILL_ROOT))
+
+import corpus  # noqa: E402
+
+MODES = ("per-call", "shared", "preload")
+
+
+def child(style: str, mode: str, doc: str, n: int) -> dict:
+    import fitz  # noqa: F401
+    import weasyprint  # noqa: F401
+
+    from md2img import XIAOHONGSHU_3_4, convert, converter, preload_fonts
+
+    if mode == "per-call":
+        try:
+            from weasyprint.text.fonts import FontConfiguration
+        except ImportError:  # WeasyPrint < 53
+            from weasyprint.fonts import FontConfiguration
+        converter._font_config = FontConfiguration
+
+    md = corpus.build(doc)
+    converter.get_stylesheets(style, XIAOHONGSHU_3_4)
+    result = {"preload_ms": None}
+    if mode == "preload":
+        t0 = time.perf_counter()
+        preload_fonts([style])
+        result["preload_ms"] = (time.perf_counter() - t0) * 1000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        out = Path(tmp) / "page.png"
+        times = []
+        for _ in range(n + 1):
+            t0 = time.perf_counter()
+            convert(md, out, page_size=XIAOHONGSHU_3_4, style=style)
+            times.append((time.perf_counter() - t0) * 1000)
+    result["first_ms"] = times[0]
+    result["steady_ms"] = statistics.median(times[1:])
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="字体配置：首次 / 稳态渲染基准")
+    parser.add_argument("-n", type=int, default=5, help="稳态渲染重复次数 (默认: 5)")
+    parser.add_argument("--styles", nargs="+", default=["default", "handwriting", "muyao", "virgil", "excali"])
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--doc", choices=list(corpus.CORPUS), default="card", help="渲染的语料 (默认: card)")
+    parser.add_argument("--font-dir", metavar="DIR", help="随附字体目录（写入子进程的 MD2IMG_FONT_DIR）")
+    parser.add_argument("--child", nargs=2, metavar=("STYLE", "MODE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(child(*args.child, args.doc, args.n)))
+        return
+
+    env = dict(os.environ)
+    if args.font_dir:
+        env["MD2IMG_FONT_DIR"] = str(Path(args.font_dir).resolve())
+    print(f"{'style':<12} {'mode':<9} {'preload':>9} {'first':>9} {'steady':>9}")
+    for style in args.styles:
+        for mode in args.modes:
+            out = subprocess.run(
+                [sys.executable, __file__, "--child", style, mode, "--doc", args.doc, "-n", str(args.n)],
+                capture_output=True, text=True, check=True, env=env,
+            ).stdout
+            row = json.loads(out.strip().splitlines()[-1])
+            preload = f"{row['preload_ms']:>7.0f}ms" if row["preload_ms"] is not None else f"{'-':>9}"
+            print(f"{style:<12} {mode:<9} {preload} {row['first_ms']:>7.0f}ms {row['steady_ms']:>7.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
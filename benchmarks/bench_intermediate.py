@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+中间 PDF 存放方式对比：intermediate="memory" vs "tempfile"
+
+每种模式各渲染 N 次同一篇 Markdown，统计单次耗时与进程的读写字节数
+（Linux 下取 /proc/self/io 的 rchar/wchar，其它平台只报告耗时）。
+
+用法:
+    python benchmarks/bench_intermediate.py -n 20 --size 3:4
+"""
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SKILL_ROOT = Path(__file__).resolve().parent.parent
+if str(SKILL_ROOT) not in sys.path:
+    sys.path.insert(0, str(SKILL_ROOT))
+
+from md2img import XIAOHONGSHU_1_1, XIAOHONGSHU_3_4, convert  # noqa: E402
+
+SAMPLE_MD = """# 今日份美好
+
+今天发现了一家超棒的咖啡店！
+
+## 环境
+- 装修风格：日式原木风
+- 座位舒适度：⭐⭐⭐⭐⭐
+- 音乐氛围：轻爵士
+
+## 推荐
+1. 手冲埃塞俄比亚
+2. 抹茶巴斯克蛋糕
+
+> 生活不止眼前的苟且，还有咖啡和远方 ☕
+
+""" * 4
+
+
+def _proc_io() -> dict:
+    """读取当前进程累计 I/O（字节），不支持时返回空字典。"""
+    try:
+        text = Path("/proc/self/io").read_text()
+    except OSError:
+        return {}
+    return {k: int(v) for k, v in (line.split(": ") for line in text.splitlines())}
+
+
+def run(mode: str, n: int, page_size, out_dir: Path) -> dict:
+    # 预热一次，排除首轮 import / 字体加载
+    convert(SAMPLE_MD, out_dir / f"warm_{mode}.png", page_size=page_size, intermediate=mode)
+
+    times = []
+    io_before = _proc_io()
+    for i in range(n):
+        t0 = time.perf_counter()
+        convert(SAMPLE_MD, out_dir / f"{mode}_{i}.png", page_size=page_size, intermediate=mode)
+        times.append(time.perf_counter() - t0)
+    io_after = _proc_io()
+
+    result = {
+        "mode": mode,
+        "runs": n,
+        "mean_ms": statistics.mean(times) * 1000,
+        "median_ms": statistics.median(times) * 1000,
+    }
+    for key in ("rchar", "wchar"):
+        if key in io_before:
+            result[f"{key}_per_run"] = (io_after[key] - io_before[key]) / n
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="对比中间 PDF 内存/临时文件两种模式")
+    parser.add_argument("-n", type=int, default=20, help="每种模式的渲染次数 (默认: 20)")
+    parser.add_argument("--size", choices=["3:4", "1:1", "long"], default="3:4", help="页尺寸 (默认: 3:4)")
+    args = parser.parse_args()
+
+    page_size = {"3:4": XIAOHONGSHU_3_4, "1:1": XIAOHONGSHU_1_1, "long": None}[args.size]
+    with tempfile.TemporaryDirectory() as tmp:
+        results = [run(mode, args.n, page_size, Path(tmp)) for mode in ("tempfile", "memory")]
+
+    for r in results:
+        line = f"{r['mode']:>8}: mean {r['mean_ms']:.1f} ms, median {r['median_ms']:.1f} ms"
+        if "wchar_per_run" in r:
+            line += f", 写 {r['wchar_per_run'] / 1024:.1f} KiB/次, 读 {r['rchar_per_run'] / 1024:.1f} KiB/次"
+        print(line)
+
+    base, mem = results
+    if "wchar_per_run" in base:
+        saved_w = base["wchar_per_run"] - mem["wchar_per_run"]
+        saved_r = base["rchar_per_run"] - mem["rchar_per_run"]
+        print(f"memory 模式每次请求少写 {saved_w / 1024:.1f} KiB、少读 {saved_r / 1024:.1f} KiB")
+    print(f"耗时变化: {mem['mean_ms'] - base['mean_ms']:+.1f} ms/次")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Markdown → HTML：每次 markdown.markdown()（旧流程）vs 复用 Markdown 实例 + 按块缓存。
+
+对每篇语料报告:
+    old        markdown.markdown(...)，每次重建实例并加载扩展
+    cold       _render_markdown，块缓存清空（只省掉实例构造）
+    unchanged  同一篇再次渲染（全部块命中缓存）
+    edited     改动其中一个块后重新渲染（只有改动的块重新转换）
+并逐篇校验输出与旧流程完全一致。
+
+用法:
+    python benchmarks/bench_markdown.py -n 5 --docs article_50k code_heavy
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+SKILL_ROOT = Path(__file__).resolve().parent.parent
+if str(SKILL_ROOT) not in sys.path:
+    sys.path.insert(0, str(SKILL_ROOT))
+
+import corpus  # noqa: E402
+from md2img.converter import DEFAULT_MD_EXTENSIONS, _convert_block, _render_markdown, _split_blocks  # noqa: E402
+
+
+def edit_one_block(md: str) -> str:
+    """在中间那个块末尾追加一句话，模拟一次小改动。"""
+    blocks = _split_blocks(md)
+    if not blocks or len(blocks) < 2:
+        return md + "\n\n改动后的结尾。\n"
+    mid = len(blocks) // 2
+    blocks[mid] = blocks[mid].rstrip("\n") + " 改动。\n\n"
+    return "".join(blocks)
+
+
+def timed(fn, n: int) -> float:
+    times = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return statistics.median(times) * 1000
+
+
+def main():
+    import markdown
+
+    parser = argparse.ArgumentParser(description="Markdown 引擎复用 + 块缓存基准")
+    parser.add_argument("-n", type=int, default=5, help="每项重复次数 (默认: 5)")
+    parser.add_argument("--docs", nargs="+", choices=list(corpus.CORPUS), default=["article_5k", "article_50k", "code_heavy", "table_heavy", "cjk"])
+    args = parser.parse_args()
+
+    exts = list(DEFAULT_MD_EXTENSIONS)
+    print(f"{'doc':<14} {'blocks':>6} {'old':>9} {'cold':>9} {'unchanged':>10} {'edited':>9}  identical")
+    for name in args.docs:
+        md = corpus.build(name)
+        edited = edit_one_block(md)
+        blocks = _split_blocks(md)
+
+        old = timed(lambda: markdown.markdown(md, extensions=exts), args.n)
+
+        def cold():
+            _convert_block.cache_clear()
+            _render_markdown(md, DEFAULT_MD_EXTENSIONS)
+
+        cold_ms = timed(cold, args.n)
+        _render_markdown(md, DEFAULT_MD_EXTENSIONS)
+        unchanged = timed(lambda: _render_markdown(md, DEFAULT_MD_EXTENSIONS), args.n)
+
+        def rerender_edited():
+            _convert_block.cache_clear()
+            _render_markdown(md, DEFAULT_MD_EXTENSIONS)
+            t0 = time.perf_counter()
+            _render_markdown(edited, DEFAULT_MD_EXTENSIONS)
+            return time.perf_counter() - t0
+
+        edited_ms = statistics.median(rerender_edited() for _ in range(args.n)) * 1000
+
+        identical = all(
+            markdown.markdown(text, extensions=exts) == _render_markdown(text, DEFAULT_MD_EXTENSIONS)
+            for text in (md, edited)
+        )
+        print(
+            f"{name:<14} {len(blocks or []):>6} {old:>7.1f}ms {cold_ms:>7.1f}ms {unchanged:>8.1f}ms {edited_ms:>7.1f}ms  {identical}"
+        )
+
+
+if __name__ == "__main__":
+    main()
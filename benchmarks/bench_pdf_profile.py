@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+中间 PDF 选项对比：INTERMEDIATE_PDF_OPTIONS（当前流程）vs WeasyPrint 默认的完整 PDF（压缩、对象流）。
+
+    full          converter.INTERMEDIATE_PDF_OPTIONS = {}，即旧流程的 document.write_pdf()
+    intermediate  当前流程
+
+每个 (主题, 选项) 在独立子进程中把语料逐页渲染成像素（iter_pages(format="pil")），重复 -n 次，
+报告 PDF 序列化阶段与整次渲染的 CPU 时间（中位数）及子进程峰值 RSS。
+两种选项的像素一致性由 tests/test_pdf_profile.py 检查。
+
+用法:
+    python benchmarks/bench_pdf_profile.py -n 3
+    python benchmarks/bench_pdf_profile.py --styles default muyao --docs card cjk code_heavy --size 1_1
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+SKILL_ROOT = Path(__file__).resolve().parent.parent
+if str(SKILL_ROOT) not in sys.path:
+    sys.path.insert(0, str(SKILL_ROOT))
+
+import corpus  # noqa: E402
+
+PROFILES = ("full", "intermediate")
+SIZES = {"3_4": (1242, 1656), "1_1": (1080, 1080), "2_3": (1080, 1620), "4_3": (1440, 1080)}
+
+
+def child(style: str, profile: str, docs: list, size: str, n: int) -> dict:
+    from md2img import converter, iter_pages
+    from md2img.stats import RenderStats, peak_rss
+
+    if profile == "full":
+        converter.INTERMEDIATE_PDF_OPTIONS = {}
+    converter.preload_fonts([style])
+
+    pdf_cpu, total_cpu = [], []
+    for _ in range(n):
+        pdf = total = 0.0
+        for doc in docs:
+            stats = RenderStats()
+            for _ in iter_pages(corpus.build(doc), page_size=SIZES[size], style=style, format="pil", stats=stats):
+                pass
+            pdf += stats.stages.get("pdf", {}).get("cpu", 0.0)
+            total += stats.cpu
+        pdf_cpu.append(pdf * 1000)
+        total_cpu.append(total * 1000)
+    return {"pdf_cpu_ms": statistics.median(pdf_cpu), "cpu_ms": statistics.median(total_cpu), "peak_mib": peak_rss() / 2**20}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="中间 PDF 选项：CPU / 内存对比")
+    parser.add_argument("-n", type=int, default=3, help="每组重复次数 (默认: 3)")
+    parser.add_argument("--styles", nargs="+", default=["default", "handwriting", "muyao", "virgil", "obsidian", "parchment", "excali"])
+    parser.add_argument("--docs", nargs="+", choices=list(corpus.CORPUS), default=["card", "article_5k", "code_heavy", "table_heavy", "cjk"])
+    parser.add_argument("--size", choices=list(SIZES), default="3_4")
+    parser.add_argument("--child", nargs=2, metavar=("STYLE", "PROFILE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(child(*args.child, args.docs, args.size, args.n)))
+        return
+
+    print(f"{'style':<11} {'pdf cpu':>17} {'total cpu':>19} {'peak rss':>17}")
+    print(f"{'':<11} {'full → inter':>17} {'full → inter':>19} {'full → inter':>17}")
+    for style in args.styles:
+        rows = {}
+        for profile in PROFILES:
+            stdout = subprocess.run(
+                [sys.executable, __file__, "--child", style, profile,
+                 "-n", str(args.n), "--size", args.size, "--docs", *args.docs],
+                capture_output=True, text=True, check=True,
+            ).stdout
+            rows[profile] = json.loads(stdout.strip().splitlines()[-1])
+        full, inter = rows["full"], rows["intermediate"]
+        print(
+            f"{style:<11} {full['pdf_cpu_ms']:>7.0f} → {inter['pdf_cpu_ms']:>5.0f}ms "
+            f"{full['cpu_ms']:>8.0f} → {inter['cpu_ms']:>6.0f}ms "
+            f"{full['peak_mib']:>6.0f} → {inter['peak_mib']:>5.0f}MiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+分页栅格化并行度：一篇 8~15 页的长文在不同 raster_workers 下的端到端耗时。
+
+用法:
+    python benchmarks/bench_raster.py -n 5 --workers 1 2 4
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SKILL_ROOT = Path(__file__).resolve().parent.parent
+if str(SKILL_ROOT) not in sys.path:
+    sys.path.insert(0, str(SKILL_ROOT))
+
+from md2img import XIAOHONGSHU_3_4, convert  # noqa: E402
+
+SECTION_MD = """## 第 {i} 节
+
+这是一段用来撑页数的正文，包含**加粗**、`行内代码`和足够长的中文句子，让每一节大约占半页。
+生活不止眼前的苟且，还有诗和远方；代码不止眼前的 bug，还有重构和测试。
+
+- 要点一：保持简单
+- 要点二：先测量再优化
+- 要点三：别忘了写文档
+
+```python
+def section_{i}():
+    return {i} * 2
+```
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="并行栅格化基准")
+    parser.add_argument("-n", type=int, default=5, help="每档重复次数 (默认: 5)")
+    parser.add_argument("--sections", type=int, default=20, help="文章节数 (默认: 20)")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument("--ext", default=".png", choices=[".png", ".jpg"])
+    args = parser.parse_args()
+
+    md = "# 长文基准\n\n" + "\n".join(SECTION_MD.format(i=i) for i in range(args.sections))
+    with tempfile.TemporaryDirectory() as tmp:
+        out = Path(tmp) / f"article{args.ext}"
+        pages = len(convert(md, out, page_size=XIAOHONGSHU_3_4))
+        print(f"{pages} 页, {XIAOHONGSHU_3_4[0]}x{XIAOHONGSHU_3_4[1]}")
+        for workers in sorted(set(args.workers)):
+            convert(md, out, page_size=XIAOHONGSHU_3_4, raster_workers=workers)  # 预热进程池
+            samples = []
+            for _ in range(args.n):
+                t0 = time.perf_counter()
+                convert(md, out, page_size=XIAOHONGSHU_3_4, raster_workers=workers)
+                samples.append(time.perf_counter() - t0)
+            print(f"raster_workers={workers:<3}: median {statistics.median(samples) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
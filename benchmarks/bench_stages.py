@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+分阶段基准：语料 × 主题 × 页尺寸，逐阶段计时并记录峰值 RSS，结果写成 JSON 便于前后对比。
+
+阶段（分页模式）:
+    md_to_html   Markdown → HTML（markdown + codehilite + toc）
+    css          取预解析样式表（get_stylesheets，首轮之后命中进程内缓存）
+    layout       WeasyPrint 排版（HTML.render）
+    pdf          PDF 序列化（Document.write_pdf，中间 PDF 选项）
+    open         PyMuPDF 打开 PDF 字节
+    raster       逐页 get_pixmap
+    encode       逐页 PNG 编码
+    trim         逐页求内容包围盒（trim=True / 旧版 _crop_image_to_content 的工作量）
+长图模式（size=long）的 raster 与 encode 交错进行，合并为 bbox（矢量包围盒）+ raster_encode 两个阶段。
+
+每个 (语料, 主题, 尺寸) 组合在独立子进程中运行：先用卡片预热一次（字体加载等冷启动另计为 warmup_ms），
+再重复 -n 次取各阶段的最小值与中位数；峰值 RSS 取子进程的 ru_maxrss。
+
+用法:
+    python benchmarks/bench_stages.py -o stages.json                    # 全量矩阵（article_500k 较慢）
+    python benchmarks/bench_stages.py --docs card cjk --styles default --sizes 3_4 long -n 3
+    python benchmarks/bench_stages.py --docs card -o new.json --compare stages.json   # 与上次结果对比
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+SKILL_ROOT = Path(__file__).resolve().parent.parent
+if str(SKILL_ROOT) not in sys.path:
+    sys.path.insert(0, str(SKILL_ROOT))
+
+import corpus  # noqa: E402
+
+PAGED_STAGES = ("md_to_html", "css", "layout", "pdf", "open", "raster", "encode", "trim")
+LONG_STAGES = ("md_to_html", "css", "layout", "pdf", "open", "bbox", "raster_encode")
+
+
+def preset_sizes() -> dict:
+    """converter 里全部 XIAOHONGSHU_* 预设，外加长图 "long"。"""
+    from md2img import converter
+
+    sizes = {name[len("XIAOHONGSHU_"):]: getattr(converter, name) for name in dir(converter) if name.startswith("XIAOHONGSHU_")}
+    sizes["long"] = None
+    return sizes
+
+
+def render_once(md: str, style: str, page_size) -> dict:
+    """完整走一遍渲染流程，返回 {阶段: 秒} 以及页数、像素数、输出字节数。"""
+    import io
+
+    import fitz  # PyMuPDF
+    import weasyprint
+
+    from md2img import converter
+
+    t = {}
+
+    def lap(stage, t0):
+        t[stage] = time.perf_counter() - t0
+        return time.perf_counter()
+
+    t0 = time.perf_counter()
+    html = converter._md_to_html(md, inline_css=False)
+    t0 = lap("md_to_html", t0)
+    sheets = converter.get_stylesheets(style, page_size)
+    if page_size is None:
+        sheets = [*sheets, converter._long_page_stylesheet()]
+    t0 = lap("css", t0)
+    document = weasyprint.HTML(string=html).render(stylesheets=sheets, font_config=converter._font_config())
+    t0 = lap("layout", t0)
+    pdf = converter._write_intermediate_pdf(document)
+    t0 = lap("pdf", t0)
+    pdf_doc = fitz.open(stream=pdf, filetype="pdf")
+    t0 = lap("open", t0)
+
+    pixels = out_bytes = 0
+    if page_size is None:
+        layout = converter._long_layout(pdf_doc, converter.LONG_IMAGE_DPI)
+        t0 = lap("bbox", t0)
+        if layout is not None:
+            buf = io.BytesIO()
+            writer = converter._PngRowWriter(buf, layout.width, layout.height)
+            converter._render_rows(pdf_doc, layout, 0, layout.height, converter.LONG_IMAGE_DPI, writer)
+            writer.close()
+            pixels, out_bytes = layout.width * layout.height, buf.tell()
+        lap("raster_encode", t0)
+        pages = 1
+    else:
+        t.update(raster=0.0, encode=0.0, trim=0.0)
+        pages = len(pdf_doc)
+        for page in pdf_doc:
+            t0 = time.perf_counter()
+            pix = page.get_pixmap(dpi=converter.PAGED_DPI, alpha=False)
+            t1 = time.perf_counter()
+            out_bytes += len(pix.tobytes("png"))
+            t2 = time.perf_counter()
+            converter._content_bbox(pix)
+            t3 = time.perf_counter()
+            t["raster"] += t1 - t0
+            t["encode"] += t2 - t1
+            t["trim"] += t3 - t2
+            pixels += pix.width * pix.height
+            del pix
+    pdf_doc.close()
+    return {"stages": t, "pages": pages, "pixels": pixels, "bytes": out_bytes, "pdf_bytes": len(pdf)}
+
+
+def run_case(doc: str, style: str, size: str, repeat: int) -> dict:
+    """子进程：预热后重复 repeat 次，汇总各阶段耗时。"""
+    from md2img.stats import peak_rss
+
+    page_size = preset_sizes()[size]
+    md = corpus.build(doc)
+
+    t0 = time.perf_counter()
+    render_once(corpus.CARD, style, page_size)
+    warmup = time.perf_counter() - t0
+    base_rss = peak_rss() / 2**20
+
+    runs = [render_once(md, style, page_size) for _ in range(repeat)]
+    stages = {}
+    for stage in runs[0]["stages"]:
+        xs = [r["stages"][stage] * 1000 for r in runs]
+        stages[stage] = {"min_ms": min(xs), "median_ms": statistics.median(xs)}
+    totals = [sum(r["stages"].values()) * 1000 for r in runs]
+    peak = peak_rss() / 2**20
+    return {
+        "doc": doc,
+        "chars": len(md),
+        "style": style,
+        "size": size,
+        "page_size": list(page_size) if page_size else None,
+        "pages": runs[0]["pages"],
+        "pixels": runs[0]["pixels"],
+        "bytes": runs[0]["bytes"],
+        "pdf_bytes": runs[0]["pdf_bytes"],
+        "warmup_ms": warmup * 1000,
+        "total_ms": {"min": min(totals), "median": statistics.median(totals)},
+        "stages": stages,
+        "peak_rss_mib": peak,
+        "delta_rss_mib": peak - base_rss,
+    }
+
+
+def environment() -> dict:
+    import md2img
+
+    versions = {"md2img": md2img.__version__}
+    for name in ("weasyprint", "fitz", "markdown", "PIL"):
+        try:
+            module = __import__(name)
+            versions[name] = getattr(module, "__version__", None)
+        except ImportError:
+            versions[name] = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "versions": versions,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def compare(results: list, baseline_path: Path, threshold: float) -> int:
+    """与之前的 JSON 结果逐组合对比 total_ms 中位数，返回变慢超过 threshold 的组合数。"""
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    old = {(r["doc"], r["style"], r["size"]): r for r in baseline["results"]}
+    regressions = 0
+    print(f"\n对比 {baseline_path}（阈值 {threshold:+.0%}）")
+    print(f"{'doc':<14} {'style':<12} {'size':<5} {'old ms':>9} {'new ms':>9} {'change':>8}  增幅最大的阶段")
+    for r in results:
+        prev = old.get((r["doc"], r["style"], r["size"]))
+        if prev is None:
+            continue
+        before, after = prev["total_ms"]["median"], r["total_ms"]["median"]
+        change = after / before - 1 if before else 0.0
+        worst = max(
+            (s for s in r["stages"] if s in prev["stages"]),
+            key=lambda s: r["stages"][s]["median_ms"] - prev["stages"][s]["median_ms"],
+            default="",
+        )
+        flag = "  ← 变慢" if change > threshold else ""
+        regressions += change > threshold
+        print(f"{r['doc']:<14} {r['style']:<12} {r['size']:<5} {before:>7.0f}ms {after:>7.0f}ms {change:>+7.1%}  {worst}{flag}")
+    return regressions
+
+
+def main():
+    from md2img import THEMES
+
+    sizes = preset_sizes()
+    parser = argparse.ArgumentParser(description="分阶段渲染基准（语料 × 主题 × 页尺寸）")
+    parser.add_argument("--docs", nargs="+", choices=list(corpus.CORPUS), default=list(corpus.CORPUS), help="语料 (默认: 全部)")
+    parser.add_argument("--styles", nargs="+", default=list(THEMES), help="主题 (默认: 全部已注册主题)")
+    parser.add_argument("--sizes", nargs="+", choices=list(sizes), default=list(sizes), help="页尺寸 (默认: 全部预设 + long)")
+    parser.add_argument("-n", type=int, default=3, help="每个组合的重复次数 (默认: 3)")
+    parser.add_argument("-o", "--output", default="bench_stages.json", help="结果 JSON 路径 (默认: bench_stages.json)")
+    parser.add_argument("--compare", metavar="JSON", help="与之前的结果对比，有变慢的组合时退出码为 1")
+    parser.add_argument("--threshold", type=float, default=0.10, help="--compare 判定变慢的相对阈值 (默认: 0.10)")
+    parser.add_argument("--child", nargs=3, metavar=("DOC", "STYLE", "SIZE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_case(*args.child, repeat=args.n)))
+        return
+
+    results = []
+    stage_names = sorted(set(PAGED_STAGES) | set(LONG_STAGES), key=lambda s: (PAGED_STAGES + LONG_STAGES).index(s))
+    print(f"{'doc':<14} {'style':<12} {'size':<5} {'pages':>5} {'total':>8} {'RSS':>7}  " + " ".join(f"{s:>8}" for s in stage_names))
+    for doc in args.docs:
+        for style in args.styles:
+            for size in args.sizes:
+                proc = subprocess.run(
+                    [sys.executable, __file__, "--child", doc, style, size, "-n", str(args.n)],
+                    capture_output=True, text=True,
+                )
+                if proc.returncode != 0:
+                    print(f"{doc:<14} {style:<12} {size:<5} 失败: {proc.stderr.strip().splitlines()[-1:]}")
+                    continue
+                r = json.loads(proc.stdout.strip().splitlines()[-1])
+                results.append(r)
+                cells = " ".join(
+                    f"{r['stages'][s]['median_ms']:>6.0f}ms" if s in r["stages"] else f"{'-':>8}" for s in stage_names
+                )
+                print(
+                    f"{doc:<14} {style:<12} {size:<5} {r['pages']:>5} {r['total_ms']['median']:>6.0f}ms "
+                    f"{r['peak_rss_mib']:>5.0f}Mi  {cells}"
+                )
+
+    out = Path(args.output)
+    out.write_text(
+        json.dumps({"environment": environment(), "repeat": args.n, "results": results}, ensure_ascii=False, indent=2),
+        encoding="utf-8",
+    )
+    print(f"\n结果已写入 {out}")
+
+    if args.compare:
+        sys.exit(1 if compare(results, Path(args.compare), args.threshold) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+主题样式表开销：内联 <style>（每次重新解析）vs 预解析样式表（进程内缓存）。
+
+对每个主题分别测:
+  - css:    获取样式表的耗时（内联模式为 CSS(string=...) 解析，预解析模式为缓存查找）
+  - layout: 排版一篇短文的总耗时 HTML(...).render()
+
+用法:
+    python benchmarks/bench_themes.py -n 20
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+SKILL_ROOT = Path(__file__).resolve().parent.parent
+if str(SKILL_ROOT) not in sys.path:
+    sys.path.insert(0, str(SKILL_ROOT))
+
+import weasyprint  # noqa: E402
+
+from md2img import THEMES, XIAOHONGSHU_3_4  # noqa: E402
+from md2img.converter import _md_to_html, get_stylesheets  # noqa: E402
+
+SAMPLE_MD = """# 主题基准
+
+一段正文，**加粗**、`代码` 与 [链接](https://example.com)。
+
+- 列表一
+- 列表二
+
+> 引用
+"""
+
+
+def timed(fn, n: int) -> float:
+    """n 次调用的中位耗时（毫秒）。"""
+    samples = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="主题样式表解析开销基准")
+    parser.add_argument("-n", type=int, default=20, help="每项重复次数 (默认: 20)")
+    args = parser.parse_args()
+
+    page_rule = "@page {{ size: {}px {}px; margin: 28px; }}".format(*XIAOHONGSHU_3_4)
+    bare_html = _md_to_html(SAMPLE_MD, inline_css=False)
+
+    print(f"{'theme':<12} {'css inline':>11} {'css cached':>11} {'layout inline':>14} {'layout cached':>14}")
+    for style, css in THEMES.items():
+        inline_html = _md_to_html(SAMPLE_MD, base_css=css + "\n" + page_rule)
+        get_stylesheets(style, XIAOHONGSHU_3_4)  # 首次解析不计入
+
+        css_inline = timed(lambda: weasyprint.CSS(string=css + "\n" + page_rule), args.n)
+        css_cached = timed(lambda: get_stylesheets(style, XIAOHONGSHU_3_4), args.n)
+        layout_inline = timed(lambda: weasyprint.HTML(string=inline_html).render(), args.n)
+        layout_cached = timed(
+            lambda: weasyprint.HTML(string=bare_html).render(stylesheets=get_stylesheets(style, XIAOHONGSHU_3_4)),
+            args.n,
+        )
+        print(
+            f"{style:<12} {css_inline:>9.2f}ms {css_cached * 1000:>9.1f}µs "
+            f"{layout_inline:>12.1f}ms {layout_cached:>12.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+监视模式的小改动重渲染：每次改一个词后
+    rerun        重新运行 bin/md2img --no-daemon（冷启动 + 全量重写，旧流程）
+    watch        常驻进程内 IncrementalRenderer.render（只重写有变化的页）
+报告时延中位数、每次重写的页数与写盘字节数。
+
+用法:
+    python benchmarks/bench_watch.py -n 5 --docs article_5k article_50k
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SKILL_ROOT = Path(__file__).resolve().parent.parent
+if str(SKILL_ROOT) not in sys.path:
+    sys.path.insert(0, str(SKILL_ROOT))
+
+import corpus  # noqa: E402
+from md2img import XIAOHONGSHU_3_4  # noqa: E402
+from md2img.watch import IncrementalRenderer  # noqa: E402
+
+CLI = SKILL_ROOT / "bin" / "md2img"
+
+
+def edit(md: str, n: int) -> str:
+    """在文章中间那一节的标题后加一个词，n 不同则内容不同。"""
+    lines = md.splitlines(keepends=True)
+    headings = [i for i, line in enumerate(lines) if line.startswith("## ")]
+    i = headings[len(headings) // 2] if headings else 0
+    lines[i] = lines[i].rstrip("\n") + f" 修订{n}\n"
+    return "".join(lines)
+
+
+def snapshot(out_dir: Path) -> dict:
+    return {p.name: p.stat().st_mtime_ns for p in out_dir.iterdir()}
+
+
+def churn(before: dict, out_dir: Path) -> tuple:
+    """与 before 相比被重写（mtime 变化或新出现）的文件数与字节数。"""
+    files = nbytes = 0
+    for p in out_dir.iterdir():
+        if before.get(p.name) != p.stat().st_mtime_ns:
+            files += 1
+            nbytes += p.stat().st_size
+    return files, nbytes
+
+
+def bench_rerun(md: str, work: Path, n: int) -> tuple:
+    src, out_dir = work / "rerun.md", work / "rerun"
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [str(SKILL_ROOT), os.environ.get("PYTHONPATH")]))}
+    cmd = [sys.executable, str(CLI), "--no-daemon", str(src), "-o", str(out_dir)]
+    src.write_text(md, encoding="utf-8")
+    subprocess.run(cmd, check=True, capture_output=True, env=env)
+    times, files, nbytes = [], [], []
+    for i in range(n):
+        src.write_text(edit(md, i), encoding="utf-8")
+        before = snapshot(out_dir)
+        t0 = time.perf_counter()
+        subprocess.run(cmd, check=True, capture_output=True, env=env)
+        times.append(time.perf_counter() - t0)
+        f, b = churn(before, out_dir)
+        files.append(f)
+        nbytes.append(b)
+    return statistics.median(times), statistics.median(files), statistics.median(nbytes)
+
+
+def bench_watch(md: str, work: Path, n: int) -> tuple:
+    out_dir = work / "watch"
+    renderer = IncrementalRenderer(out_dir / "md2img_out.png", page_size=XIAOHONGSHU_3_4)
+    renderer.render(md)
+    times, files, nbytes = [], [], []
+    for i in range(n):
+        t0 = time.perf_counter()
+        result = renderer.render(edit(md, i))
+        times.append(time.perf_counter() - t0)
+        files.append(len(result.written))
+        nbytes.append(sum(p.stat().st_size for p in result.written))
+    return statistics.median(times), statistics.median(files), statistics.median(nbytes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="监视模式增量重渲染基准")
+    parser.add_argument("-n", type=int, default=5, help="每项重复次数 (默认: 5)")
+    parser.add_argument("--docs", nargs="+", choices=list(corpus.CORPUS), default=["article_5k", "article_50k"])
+    args = parser.parse_args()
+
+    print(f"{'doc':<14} {'mode':<6} {'latency':>9} {'files':>6} {'bytes':>10}")
+    for name in args.docs:
+        md = corpus.build(name)
+        with tempfile.TemporaryDirectory() as tmp:
+            for mode, fn in (("rerun", bench_rerun), ("watch", bench_watch)):
+                latency, files, nbytes = fn(md, Path(tmp), args.n)
+                print(f"{name:<14} {mode:<6} {latency * 1000:>7.0f}ms {files:>6.0f} {nbytes:>10,.0f}")
+
+
+if __name__ == "__main__":
+    main()
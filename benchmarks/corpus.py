@@ -0,0 +1,117 @@
+"""
+基准测试用的合成 Markdown 语料（固定随机种子，每次生成的内容完全一致）。
+
+    from corpus import CORPUS, build
+    md = build("article_50k")
+
+- card: 小红书卡片式短文（几百字）
+- article_5k / article_50k / article_500k: 约 5k / 50k / 500k 字符的图文长文（标题、段落、列表、引用）
+- code_heavy: 以 Python 代码块为主（codehilite 高亮）
+- table_heavy: 以表格为主
+- cjk: 纯中文长文（约 20k 字符）
+"""
+
+import random
+from typing import Callable, Dict, List
+
+SEED = 20240501
+
+_WORDS = (
+    "render layout font glyph page image pixel cache queue worker latency throughput "
+    "markdown theme style encode buffer stream memory profile benchmark tile width height"
+).split()
+
+_CJK = (
+    "今天发现了一家超棒的咖啡店装修风格是日式原木风座位舒适音乐是轻爵士推荐手冲埃塞俄比亚"
+    "和抹茶巴斯克蛋糕生活不止眼前的苟且还有诗和远方代码不止眼前的缺陷还有重构和测试"
+    "春眠不觉晓处处闻啼鸟夜来风雨声花落知多少床前明月光疑是地上霜举头望明月低头思故乡"
+)
+
+_CODE = '''```python
+def render_{i}(doc, size=(1242, 1656)):
+    """第 {i} 个示例：把文档渲染成图片。"""
+    pages = []
+    for n, page in enumerate(doc.pages):
+        pix = page.get_pixmap(dpi=96, alpha=False)
+        if pix.width > size[0]:
+            raise ValueError(f"page {{n}} too wide: {{pix.width}}")
+        pages.append(pix.tobytes("png"))
+    return pages
+```
+'''
+
+
+def _sentence(rng: random.Random, lo: int = 8, hi: int = 20) -> str:
+    words = [rng.choice(_WORDS) for _ in range(rng.randint(lo, hi))]
+    return " ".join(words).capitalize() + "."
+
+
+def _cjk_sentence(rng: random.Random, lo: int = 12, hi: int = 40) -> str:
+    n = rng.randint(lo, hi)
+    start = rng.randrange(len(_CJK) - n)
+    return _CJK[start : start + n] + rng.choice("，。！；") + _CJK[start : start + n // 2] + "。"
+
+
+def _fill(target: int, sections: Callable[[random.Random, int], str]) -> str:
+    """反复追加章节直到达到 target 个字符。"""
+    rng = random.Random(SEED + target)
+    parts: List[str] = ["# 基准测试文档\n"]
+    size, i = 0, 0
+    while size < target:
+        block = sections(rng, i)
+        parts.append(block)
+        size += len(block)
+        i += 1
+    return "\n".join(parts)
+
+
+def _article_section(rng: random.Random, i: int) -> str:
+    para = " ".join(_sentence(rng) for _ in range(rng.randint(3, 6)))
+    cjk = "".join(_cjk_sentence(rng) for _ in range(2))
+    items = "\n".join(f"- **{rng.choice(_WORDS)}**: {_sentence(rng, 4, 8)}" for _ in range(3))
+    return f"## 第 {i + 1} 节 {rng.choice(_WORDS)}\n\n{para}\n\n{cjk}\n\n{items}\n\n> {_sentence(rng)}\n"
+
+
+def _code_section(rng: random.Random, i: int) -> str:
+    return f"### 示例 {i + 1}\n\n{_sentence(rng)} `inline_{i}()` 的用法如下：\n\n{_CODE.format(i=i)}"
+
+
+def _table_section(rng: random.Random, i: int) -> str:
+    rows = "\n".join(
+        f"| {rng.choice(_WORDS)} | {rng.randint(1, 9999)} | {rng.random():.3f} | {_cjk_sentence(rng, 4, 8)} |"
+        for _ in range(rng.randint(6, 12))
+    )
+    return f"### 表 {i + 1}\n\n| 名称 | 数量 | 比例 | 备注 |\n|---|---:|---:|---|\n{rows}\n"
+
+
+def _cjk_section(rng: random.Random, i: int) -> str:
+    paras = "\n\n".join("".join(_cjk_sentence(rng) for _ in range(rng.randint(3, 6))) for _ in range(3))
+    return f"## 第{i + 1}章\n\n{paras}\n"
+
+
+CARD = """# 今日份美好 ☕
+
+今天发现了一家超棒的咖啡店！
+
+- 装修风格：日式原木风
+- 音乐氛围：轻爵士
+- 推荐：手冲埃塞俄比亚、抹茶巴斯克
+
+> 生活不止眼前的苟且，还有咖啡和远方
+"""
+
+CORPUS: Dict[str, Callable[[], str]] = {
+    "card": lambda: CARD,
+    "article_5k": lambda: _fill(5_000, _article_section),
+    "article_50k": lambda: _fill(50_000, _article_section),
+    "article_500k": lambda: _fill(500_000, _article_section),
+    "code_heavy": lambda: _fill(20_000, _code_section),
+    "table_heavy": lambda: _fill(20_000, _table_section),
+    "cjk": lambda: _fill(20_000, _cjk_section),
+}
+
+
+def build(name: str) -> str:
+    """按名字生成语料（未知名字抛 KeyError）。"""
+    return CORPUS[name]()
+
@@ -3,39 +3,123 @@ md2img: Markdown → HTML → 图片
 
 推荐流程：用 Markdown 写内容，转 HTML 再通过 WeasyPrint / imgkit 转成图片。
 支持小红书等平台固定尺寸，长图自动分多张。
+
+包本身只做名字登记：公开 API 在首次访问时才导入对应子模块，
+markdown / weasyprint / PyMuPDF / Pillow 等重依赖直到真正渲染时才加载。
 """
 
-from .converter import (
-    XIAOHONGSHU_1_1,
-    XIAOHONGSHU_2_3,
-    XIAOHONGSHU_3_4,
-    XIAOHONGSHU_4_3,
-    HANDWRITING_CSS,
-    MUYAO_CSS,
-    VIRGIL_CSS,
-    OBSIDIAN_CSS,
-    PARCHMENT_CSS,
-    EXCALI_CSS,
-    convert,
-    convert_file,
-    md2img,
-    md_to_images,
-)
-
-__all__ = [
-    "convert",
-    "convert_file",
-    "md2img",
-    "md_to_images",
-    "XIAOHONGSHU_1_1",
-    "XIAOHONGSHU_2_3",
-    "XIAOHONGSHU_3_4",
-    "XIAOHONGSHU_4_3",
-    "HANDWRITING_CSS",
-    "MUYAO_CSS",
-    "VIRGIL_CSS",
-    "OBSIDIAN_CSS",
-    "PARCHMENT_CSS",
-    "EXCALI_CSS",
-]
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+# 公开名字 → 所在子模块
+_EXPORTS = {
+    "convert": "converter",
+    "convert_file": "converter",
+    "convert_many": "converter",
+    "convert_sizes": "converter",
+    "shutdown_pool": "converter",
+    "BatchResult": "converter",
+    "md2img": "converter",
+    "md_to_images": "converter",
+    "iter_pages": "converter",
+    "RenderedPage": "converter",
+    "EncodeOptions": "converter",
+    "paginate": "converter",
+    "Pagination": "converter",
+    "PageLayout": "converter",
+    "THEMES": "converter",
+    "register_theme": "converter",
+    "precompile_themes": "converter",
+    "preload_fonts": "converter",
+    "XIAOHONGSHU_1_1": "converter",
+    "XIAOHONGSHU_2_3": "converter",
+    "XIAOHONGSHU_3_4": "converter",
+    "XIAOHONGSHU_4_3": "converter",
+    "HANDWRITING_CSS": "converter",
+    "MUYAO_CSS": "converter",
+    "VIRGIL_CSS": "converter",
+    "OBSIDIAN_CSS": "converter",
+    "PARCHMENT_CSS": "converter",
+    "EXCALI_CSS": "converter",
+    "RenderCache": "cache",
+    "AssetFetcher": "assets",
+    "RenderLimits": "limits",
+    "RenderLimitExceeded": "limits",
+    "InputTooLarge": "limits",
+    "TooManyPages": "limits",
+    "TooManyPixels": "limits",
+    "RenderTimeout": "limits",
+    "RenderStats": "stats",
+    "OutputSink": "sinks",
+    "FileSink": "sinks",
+    "MemorySink": "sinks",
+    "ZipSink": "sinks",
+    "TarSink": "sinks",
+    "CallbackSink": "sinks",
+    "run_manifest": "batch",
+    "BatchProgress": "batch",
+    "IncrementalRenderer": "watch",
+    "SyncResult": "watch",
+    "watch_file": "watch",
+    "convert_async": "aio",
+    "md_to_images_async": "aio",
+    "AsyncRenderer": "aio",
+    "RenderQueueFull": "aio",
+}
+
+__all__ = list(_EXPORTS)
 __version__ = "0.1.0"
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(f".{module}", __name__), name)
+    globals()[name] = value  # 之后直接命中模块字典，不再走 __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
+
+
+if TYPE_CHECKING:
+    from .aio import AsyncRenderer, RenderQueueFull, convert_async, md_to_images_async
+    from .assets import AssetFetcher
+    from .batch import BatchProgress, run_manifest
+    from .cache import RenderCache
+    from .converter import (
+        EXCALI_CSS,
+        HANDWRITING_CSS,
+        MUYAO_CSS,
+        OBSIDIAN_CSS,
+        PARCHMENT_CSS,
+        THEMES,
+        VIRGIL_CSS,
+        XIAOHONGSHU_1_1,
+        XIAOHONGSHU_2_3,
+        XIAOHONGSHU_3_4,
+        XIAOHONGSHU_4_3,
+        BatchResult,
+        EncodeOptions,
+        PageLayout,
+        Pagination,
+        RenderedPage,
+        convert,
+        convert_file,
+        convert_many,
+        convert_sizes,
+        iter_pages,
+        md2img,
+        md_to_images,
+        paginate,
+        precompile_themes,
+        preload_fonts,
+        register_theme,
+        shutdown_pool,
+    )
+    from .limits import InputTooLarge, RenderLimitExceeded, RenderLimits, RenderTimeout, TooManyPages, TooManyPixels
+    from .sinks import CallbackSink, FileSink, MemorySink, OutputSink, TarSink, ZipSink
+    from .stats import RenderStats
+    from .watch import IncrementalRenderer, SyncResult, watch_file
@@ -0,0 +1,265 @@
+"""
+asyncio 接口：在事件循环里渲染而不阻塞它。
+
+    from md2img import md_to_images_async
+
+    paths = await md_to_images_async(md, output_dir="out", timeout=30)
+
+排版与栅格化在常驻 worker 进程里执行（每个进程同一时刻只跑一个渲染，进程数即并发上限），
+事件循环只通过 I/O 线程等待 worker 的管道，自身从不被渲染阻塞。
+
+- 并发上限：AsyncRenderer(workers=N)，超出的请求排队；
+- 背压：排队数达到 max_queue 时新请求立即抛 RenderQueueFull（Web 服务可直接回 503），而不是无限堆积；
+- 超时：等待空闲 worker 与渲染各以 timeout 为上限，渲染的计时从请求发给 worker 时开始，超时抛 RenderTimeout；
+- 取消：请求被取消或超时时，正在为它渲染的 worker 进程会被杀掉并补一个新的，
+  一篇超长文章不会在后台继续占着 CPU；
+- 输出目标：传 sink（见 sinks）时 worker 不写盘，把编码后的字节传回本进程，由本进程写入 sink；
+- 资源上限：limits（见 limits.RenderLimits）的页数 / 像素 / 输入大小在 worker 内检查，
+  limits.timeout 与本次 timeout 取较小者。
+
+worker 进程用 forkserver（无则 spawn）启动，启动后先导入重依赖并预热主题字体（同 convert_many），
+新起或替换的 worker 的预热时间不计入请求的超时。
+"""
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional, Union
+
+from .limits import RenderTimeout, _mp_context, _remap, _render_limits, _Worker
+from .sinks import as_sink
+
+if TYPE_CHECKING:
+    from .sinks import OutputSink
+    from .stats import RenderStats
+
+
+class RenderQueueFull(RuntimeError):
+    """排队中的请求已达 max_queue，新请求被拒绝（背压）。"""
+
+
+class AsyncRenderer:
+    """
+    管理 worker 进程的异步渲染器；也可用 async with 管理生命周期。
+
+    :param workers: worker 进程数（= 同时渲染的请求数上限），默认 os.cpu_count()
+    :param max_queue: 允许排队等待 worker 的请求数，超出时抛 RenderQueueFull；默认 workers * 4，0 表示不排队
+    :param timeout: 默认的单请求超时（秒），None 为不限；每次调用可单独覆盖
+
+    worker 在首次请求时启动。绑定首次使用时的事件循环；换了事件循环（如多次 asyncio.run）会重建 worker。
+    """
+
+    def __init__(self, workers: Optional[int] = None, *, max_queue: Optional[int] = None, timeout: Optional[float] = None):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = self.workers * 4 if max_queue is None else max_queue
+        self.timeout = timeout
+        self.waiting = 0
+        self.running = 0
+        self._ctx = _mp_context()
+        self._loop = None
+        self._idle: Optional[asyncio.Queue] = None
+        self._all: List[_Worker] = []
+        self._io = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="md2img-aio-io")
+
+    # -- worker 管理 -----------------------------------------------------
+
+    def _start(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._kill_all()
+            self._loop = loop
+            self._idle = asyncio.Queue()
+            for _ in range(self.workers):
+                self._idle.put_nowait(self._spawn())
+        return self._idle
+
+    def _spawn(self) -> _Worker:
+        worker = _Worker(self._ctx, "md2img-aio")
+        self._all.append(worker)
+        return worker
+
+    def _replace(self, worker: _Worker) -> None:
+        """杀掉（可能仍在渲染的）worker，补一个新的进入空闲队列。"""
+        worker.kill()
+        self._all.remove(worker)
+        self._io.submit(worker.reap)
+        self._idle.put_nowait(self._spawn())
+
+    def _kill_all(self) -> None:
+        for worker in self._all:
+            worker.kill()
+            self._io.submit(worker.reap)
+        self._all.clear()
+
+    async def close(self) -> None:
+        """通知空闲 worker 退出，杀掉仍在渲染的 worker，关闭 I/O 线程。"""
+        loop = asyncio.get_running_loop()
+        for worker in self._all:
+            worker.close()
+        for worker in self._all:
+            await loop.run_in_executor(self._io, worker.process.join, 5)
+            if worker.process.is_alive():
+                worker.kill()
+        self._all.clear()
+        self._loop = self._idle = None
+        self._io.shutdown(wait=False)
+
+    async def __aenter__(self) -> "AsyncRenderer":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    # -- 提交 ------------------------------------------------------------
+
+    async def _submit(
+        self,
+        name: str,
+        args: tuple,
+        kwargs: dict,
+        timeout: Optional[float],
+        stats: Optional["RenderStats"],
+        sink: Optional["OutputSink"] = None,
+    ):
+        idle = self._start()
+        if idle.empty() and self.waiting >= self.max_queue:
+            raise RenderQueueFull(f"渲染队列已满（{self.running} 个渲染中，{self.waiting} 个排队，max_queue={self.max_queue}）")
+        loop = asyncio.get_running_loop()
+        timeout = self.timeout if timeout is None else timeout
+        limits = _render_limits(kwargs.get("limits"))
+        if limits is not None:
+            # limits.timeout 在这里执行（与本次 timeout 取较小者），worker 内不再另起隔离进程
+            if limits.timeout is not None:
+                timeout = limits.timeout if timeout is None else min(timeout, limits.timeout)
+            kwargs["limits"] = limits._replace(timeout=None)
+        self.waiting += 1
+        try:
+            worker = await asyncio.wait_for(idle.get(), timeout)
+        except asyncio.TimeoutError:
+            raise RenderTimeout(f"等待空闲 worker 超时（{timeout}s）", timeout) from None
+        finally:
+            self.waiting -= 1
+
+        self.running += 1
+        healthy = False
+        try:
+            # 新起的 worker 先等预热完成（不限时），渲染超时从请求发出时开始计；
+            # 否则短 timeout 会在预热中杀掉 worker，换上的新 worker 又要预热，反复超时
+            if not await loop.run_in_executor(self._io, worker.wait_ready):
+                raise RuntimeError("worker 进程在预热时异常退出")
+            call = loop.run_in_executor(self._io, worker.call, (name, args, kwargs, stats is not None, sink is not None))
+            try:
+                ok, value, extra = await asyncio.wait_for(call, timeout)
+            except asyncio.TimeoutError:
+                raise RenderTimeout(f"渲染超时（{timeout}s），已终止", timeout) from None
+            except (EOFError, OSError) as e:
+                raise RuntimeError(f"worker 进程异常退出: {e!r}") from None
+            healthy = True
+        finally:
+            self.running -= 1
+            # 超时、取消或进程崩溃：worker 状态未知，直接杀掉换新的
+            if healthy:
+                idle.put_nowait(worker)
+            else:
+                self._replace(worker)
+        if not ok:
+            raise value
+        if stats is not None and extra:
+            stats.update(extra)
+        if sink is not None:
+            value, pages = value
+            written = {page: sink.write(page, data, info) for page, data, info in pages}
+            value = _remap(value, written)
+        return value
+
+    async def convert(
+        self,
+        md_content: str,
+        output_path: Union[str, Path],
+        *,
+        timeout: Optional[float] = None,
+        stats: Optional["RenderStats"] = None,
+        sink: Optional["OutputSink"] = None,
+        **kwargs,
+    ) -> Union[Path, List[Path]]:
+        """
+        convert 的异步版本，参数同 convert；output_path 按调用方的当前目录解析为绝对路径。
+
+        :param timeout: 本次请求的超时（秒），默认用构造时的 timeout
+        :param stats: 可选 RenderStats，worker 内的统计渲染完成后合并进来
+        :param sink: 可选输出目标；worker 渲染完把各页字节传回，在本进程（事件循环线程）中写入
+        """
+        output_path = Path(output_path).resolve()
+        return await self._submit("convert", (md_content, output_path), kwargs, timeout, stats, as_sink(sink))
+
+    async def md_to_images(
+        self,
+        md_content: str,
+        output_path: Optional[Union[str, Path]] = None,
+        *,
+        output_dir: Optional[Union[str, Path]] = None,
+        timeout: Optional[float] = None,
+        stats: Optional["RenderStats"] = None,
+        sink: Optional["OutputSink"] = None,
+        **kwargs,
+    ) -> List[str]:
+        """
+        md_to_images 的异步版本，参数同 md_to_images，返回图片绝对路径列表。
+
+        :param timeout: 本次请求的超时（秒），默认用构造时的 timeout
+        :param stats: 可选 RenderStats，worker 内的统计渲染完成后合并进来
+        :param sink: 可选输出目标，同 convert
+        """
+        if output_path is not None:
+            kwargs["output_path"] = Path(output_path).resolve()
+        else:
+            kwargs["output_dir"] = Path(output_dir or ".").resolve()
+        return await self._submit("md_to_images", (md_content,), kwargs, timeout, stats, as_sink(sink))
+
+
+_DEFAULT: Optional[AsyncRenderer] = None
+
+
+def default_renderer() -> AsyncRenderer:
+    """convert_async / md_to_images_async 默认使用的共享 AsyncRenderer（worker 数为 CPU 核数）。"""
+    global _DEFAULT
+    if _DEFAULT is None:
+        _DEFAULT = AsyncRenderer()
+    return _DEFAULT
+
+
+async def convert_async(
+    md_content: str,
+    output_path: Union[str, Path],
+    *,
+    timeout: Optional[float] = None,
+    renderer: Optional[AsyncRenderer] = None,
+    **kwargs,
+) -> Union[Path, List[Path]]:
+    """
+    convert 的异步版本：在 worker 进程中渲染，不阻塞事件循环。
+
+    :param timeout: 超时（秒；等待空闲 worker 与渲染各自计时，worker 预热不计入），超时抛 RenderTimeout 并终止渲染
+    :param renderer: 使用的 AsyncRenderer，默认共享的 default_renderer()
+    :param kwargs: 其余参数同 convert（含 stats）
+    """
+    return await (renderer or default_renderer()).convert(md_content, output_path, timeout=timeout, **kwargs)
+
+
+async def md_to_images_async(
+    md_content: str,
+    output_path: Optional[Union[str, Path]] = None,
+    *,
+    timeout: Optional[float] = None,
+    renderer: Optional[AsyncRenderer] = None,
+    **kwargs,
+) -> List[str]:
+    """
+    md_to_images 的异步版本：在 worker 进程中渲染，不阻塞事件循环。
+
+    :param timeout: 超时（秒；等待空闲 worker 与渲染各自计时，worker 预热不计入），超时抛 RenderTimeout 并终止渲染
+    :param renderer: 使用的 AsyncRenderer，默认共享的 default_renderer()
+    :param kwargs: 其余参数同 md_to_images（含 stats）
+    """
+    return await (renderer or default_renderer()).md_to_images(md_content, output_path, timeout=timeout, **kwargs)
@@ -0,0 +1,325 @@
+"""
+图片等外部资源的解析：给 WeasyPrint 一个资源根目录（base_url）和带进程内 LRU 缓存的 url_fetcher。
+
+    convert(md, "out.png", assets="posts/")                       # ![](logo.png) 相对 posts/ 解析
+    convert(md, "out.png", assets=AssetFetcher("posts/", downscale=True, remote=my_fetch))
+
+- 本地文件按 (路径, mtime, 大小) 缓存，文件改动后自动重新读取；远程 URL（http / https 等）交给 remote，按 URL 缓存；
+  data: URL 不缓存，直接交给 remote；
+- downscale=True 时宽于目标页的位图先用 Pillow 解码、缩到页宽再缓存（页宽不同的渲染各缓存一份），
+  之后的渲染不必再读原图、也不必让 WeasyPrint 与 PyMuPDF 处理原尺寸的大图；
+- remote(url) 的返回值同 WeasyPrint 的 url_fetcher（dict 或 URLFetcherResponse），测试时可换成本地替身；
+  默认为 WeasyPrint 自带的 fetcher；
+- 渲染时传入 RenderStats 的，每个资源的命中 / 未命中次数、读取与解码耗时记到 stats.assets；
+- 开启渲染缓存（cache=...）时，Markdown 与 extra_css 引用的本地文件的 (路径, mtime, 大小) 参与缓存键，
+  改动图片后不会命中旧结果；远程 URL 只按 URL 参与（内容变化不会失效）。
+
+同一个 AssetFetcher 可在多次渲染、多个线程间共用；传给 worker 进程（raster_workers、timeout）时只带配置，
+worker 进程内同一个 AssetFetcher 共用一份缓存。
+"""
+
+import mimetypes
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Tuple, Union
+
+if TYPE_CHECKING:
+    from .stats import RenderStats
+
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# 会尝试缩小的位图类型；SVG 等矢量图原样交给 WeasyPrint
+_RASTER_TYPES = frozenset(("image/png", "image/jpeg", "image/gif", "image/webp", "image/bmp", "image/tiff"))
+
+# Markdown / HTML / CSS 中可能引用资源的位置：](url)、[id]: url、src=url、url(...)
+_REFERENCE = re.compile(
+    r"""\]\(\s*<?([^)\s>]+)|^[ ]{0,3}\[[^\]]+\]:\s*<?([^\s>]+)|\bsrc\s*=\s*["']?([^"'\s>]+)|url\(\s*["']?([^"')\s]+)""",
+    re.MULTILINE | re.IGNORECASE,
+)
+
+# 进程内按 uuid 共用的实例（见 AssetFetcher.__reduce__）与按目录共用的实例（见 get_assets）
+_INSTANCES: Dict[str, "AssetFetcher"] = {}
+_FETCHERS: Dict[Path, "AssetFetcher"] = {}
+
+
+def _default_remote():
+    """WeasyPrint 自带的 fetcher：新版本为 URLFetcher 实例，旧版本为 default_url_fetcher 函数。"""
+    import weasyprint
+
+    fetcher_class = getattr(weasyprint, "URLFetcher", None)
+    if fetcher_class is not None:
+        return fetcher_class()
+    return weasyprint.default_url_fetcher
+
+
+def _read_response(result: Any, url: str) -> Tuple[bytes, Optional[str], str]:
+    """url_fetcher 的返回值（dict 或 URLFetcherResponse）→ (字节, MIME 类型, 最终 URL)。"""
+    if isinstance(result, dict):
+        data = result.get("string")
+        if data is None:
+            file_obj = result["file_obj"]
+            try:
+                data = file_obj.read()
+            finally:
+                file_obj.close()
+        if isinstance(data, str):
+            data = data.encode(result.get("encoding") or "utf-8")
+        return data, result.get("mime_type"), result.get("redirected_url") or url
+    try:
+        return result.read(), result.content_type, result.url
+    finally:
+        result.close()
+
+
+def _response(url: str, data: bytes, mime_type: Optional[str]):
+    """(字节, MIME 类型) → 当前 WeasyPrint 版本的 url_fetcher 返回值。"""
+    try:
+        from weasyprint.urls import URLFetcherResponse
+    except ImportError:  # 旧版本：返回 dict
+        return {"string": data, "mime_type": mime_type, "redirected_url": url}
+    headers = {"Content-Type": mime_type} if mime_type else None
+    return URLFetcherResponse(url, data, headers)
+
+
+def _downscale(data: bytes, mime_type: str, width: int) -> Tuple[bytes, str]:
+    """位图宽于 width 时缩到 width（等比），JPEG 仍存 JPEG，其余存 PNG；无法识别的图片原样返回。"""
+    import io
+
+    from PIL import Image
+
+    try:
+        img = Image.open(io.BytesIO(data))
+        if img.width <= width:
+            return data, mime_type
+        exif = img.info.get("exif")
+        fmt = img.format
+        img = img.resize((width, max(1, round(img.height * width / img.width))), Image.Resampling.LANCZOS)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return data, mime_type
+    buf = io.BytesIO()
+    if fmt == "JPEG":
+        img.convert("RGB").save(buf, "JPEG", quality=95, **({"exif": exif} if exif else {}))
+        return buf.getvalue(), "image/jpeg"
+    img.save(buf, "PNG")
+    return buf.getvalue(), "image/png"
+
+
+class AssetFetcher:
+    """
+    带进程内 LRU 缓存的资源解析器，传给 convert(..., assets=...)。
+
+    :param base_dir: 资源根目录，Markdown 中的相对路径相对它解析；None 时相对路径无法解析（同不传 assets）
+    :param remote: 远程 URL 的取回函数 remote(url)，返回值同 WeasyPrint 的 url_fetcher；默认为 WeasyPrint 自带的 fetcher。
+        需要传给 worker 进程时必须可 pickle（模块级函数）
+    :param downscale: 宽于目标页宽的位图缩到页宽后再缓存与交给 WeasyPrint（长图模式页宽为 LONG_PAGE_WIDTH）
+    :param max_entries: 最多缓存的资源数
+    :param max_bytes: 缓存字节预算，超出时淘汰最久未用的资源；单个资源超过预算时不缓存
+
+    属性 hits / misses / evictions 为累计的命中、未命中与淘汰次数，另见 cache_info()。
+    """
+
+    def __init__(
+        self,
+        base_dir: Optional[Union[str, Path]] = None,
+        *,
+        remote: Optional[Callable[[str], Any]] = None,
+        downscale: bool = False,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ):
+        self.base_dir = Path(base_dir).expanduser().resolve() if base_dir is not None else None
+        self.remote = remote
+        self.downscale = downscale
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._token = uuid.uuid4().hex
+        self._reset()
+
+    def _reset(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[tuple, Tuple[bytes, Optional[str], str]]" = OrderedDict()
+        self._bytes = 0
+        self._remote = self.remote
+        self._mutex = threading.Lock()
+
+    def __reduce__(self):
+        # 传给 worker 进程时只带配置，同一进程内同一 token 共用一个实例（与缓存）
+        config = (self.base_dir, self.remote, self.downscale, self.max_entries, self.max_bytes)
+        return _restore, (self._token, config)
+
+    @property
+    def base_url(self) -> Optional[str]:
+        """传给 weasyprint.HTML 的 base_url。"""
+        return self.base_dir.as_uri() + "/" if self.base_dir is not None else None
+
+    def cache_key(self, *sources: Optional[str]) -> list:
+        """
+        参与渲染缓存键的配置，以及 sources（Markdown、extra_css）中引用的本地文件的 (路径, mtime_ns, 大小)。
+
+        引用按文本粗略扫描，多收（普通链接指向的文件）只会让键更严格；不存在的文件记为 None，之后出现时键随之改变。
+        """
+        return [self.base_url, self.downscale, [list(ref) for ref in self._local_refs(sources)]]
+
+    def _local_refs(self, sources) -> list:
+        from urllib.parse import unquote, urlsplit
+        from urllib.request import url2pathname
+
+        paths = set()
+        for text in sources:
+            for match in _REFERENCE.finditer(text or ""):
+                url = next(g for g in match.groups() if g)
+                parts = urlsplit(url)
+                scheme = parts.scheme.lower()
+                if scheme == "file":
+                    paths.add(Path(url2pathname(parts.path)))
+                elif not scheme and parts.path and (self.base_dir is not None or parts.path.startswith("/")):
+                    path = Path(unquote(parts.path))
+                    paths.add(path if path.is_absolute() else self.base_dir / path)
+        refs = []
+        for path in sorted(paths):
+            try:
+                st = path.stat()
+            except OSError:
+                refs.append((str(path), None, None))
+                continue
+            if path.is_file():
+                refs.append((str(path), st.st_mtime_ns, st.st_size))
+        return refs
+
+    def cache_info(self) -> dict:
+        with self._mutex:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+    def clear(self) -> None:
+        """清空缓存（计数保留）。"""
+        with self._mutex:
+            self._entries.clear()
+            self._bytes = 0
+
+    # -- 取回 ---------------------------------------------------------------
+
+    def fetch(self, url: str, *, page_width: Optional[int] = None, stats: Optional["RenderStats"] = None):
+        """
+        取回一个资源，返回值同 WeasyPrint 的 url_fetcher。
+
+        :param url: 绝对 URL（WeasyPrint 已按 base_url 解析过相对路径）
+        :param page_width: 目标页宽（px），downscale=True 时位图缩到此宽度
+        :param stats: 可选 RenderStats，记录该资源的命中与耗时
+        """
+        from urllib.parse import urlsplit
+
+        scheme = urlsplit(url).scheme.lower()
+        if scheme == "data":
+            return self._fetch_remote(url)
+        width = page_width if self.downscale else None
+        if scheme == "file":
+            from urllib.request import url2pathname
+
+            path = Path(url2pathname(urlsplit(url).path))
+            st = path.stat()
+            key = (str(path), st.st_mtime_ns, st.st_size, width)
+        else:
+            path = None
+            key = (url, None, None, width)
+
+        with self._mutex:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        if entry is not None:
+            if stats is not None:
+                stats.add_asset(url, True, nbytes=len(entry[0]))
+            return _response(entry[2], entry[0], entry[1])
+
+        t0 = time.perf_counter()
+        if path is not None:
+            data, mime_type, final_url = path.read_bytes(), mimetypes.guess_type(path.name)[0], url
+        else:
+            data, mime_type, final_url = _read_response(self._fetch_remote(url), url)
+        t1 = time.perf_counter()
+        if width and mime_type in _RASTER_TYPES:
+            data, mime_type = _downscale(data, mime_type, width)
+        t2 = time.perf_counter()
+        self._store(key, (data, mime_type, final_url))
+        if stats is not None:
+            stats.add_asset(url, False, fetch=t1 - t0, decode=t2 - t1, nbytes=len(data))
+        return _response(final_url, data, mime_type)
+
+    def _fetch_remote(self, url: str):
+        if self._remote is None:
+            self._remote = _default_remote()
+        return self._remote(url)
+
+    def _store(self, key: tuple, entry: Tuple[bytes, Optional[str], str]) -> None:
+        size = len(entry[0])
+        with self._mutex:
+            self.misses += 1
+            if size > self.max_bytes or key in self._entries:
+                return
+            self._entries[key] = entry
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (data, _, _) = self._entries.popitem(last=False)
+                self._bytes -= len(data)
+                self.evictions += 1
+
+    def bind(self, page_width: Optional[int] = None, stats: Optional["RenderStats"] = None) -> "_BoundFetcher":
+        """绑定一次渲染的页宽与统计，得到传给 weasyprint.HTML(url_fetcher=...) 的可调用对象。"""
+        return _BoundFetcher(self, page_width, stats)
+
+    def __call__(self, url: str):
+        return self.fetch(url)
+
+    def __repr__(self) -> str:
+        return f"AssetFetcher({str(self.base_dir) if self.base_dir else None!r}, downscale={self.downscale})"
+
+
+class _BoundFetcher:
+    """一次渲染用的 url_fetcher；_fail_on_errors 供新版 WeasyPrint 在取回失败时查询（False：只警告、跳过该资源）。"""
+
+    _fail_on_errors = False
+
+    def __init__(self, fetcher: AssetFetcher, page_width: Optional[int], stats: Optional["RenderStats"]):
+        self.fetcher = fetcher
+        self.page_width = page_width
+        self.stats = stats
+
+    def __call__(self, url: str):
+        return self.fetcher.fetch(url, page_width=self.page_width, stats=self.stats)
+
+
+def _restore(token: str, config: tuple) -> AssetFetcher:
+    fetcher = _INSTANCES.get(token)
+    if fetcher is None:
+        base_dir, remote, downscale, max_entries, max_bytes = config
+        fetcher = AssetFetcher(base_dir, remote=remote, downscale=downscale, max_entries=max_entries, max_bytes=max_bytes)
+        fetcher._token = token
+        _INSTANCES[token] = fetcher
+    return fetcher
+
+
+def get_assets(assets: Union[str, Path, AssetFetcher, None]) -> Optional[AssetFetcher]:
+    """
+    把 convert(assets=...) 的参数解析成 AssetFetcher：
+    str/Path 为资源根目录（同一目录复用同一实例，缓存跨调用保留），AssetFetcher 原样返回，None 为不解析资源。
+    """
+    if assets is None or isinstance(assets, AssetFetcher):
+        return assets
+    directory = Path(assets).expanduser().resolve()
+    if directory not in _FETCHERS:
+        _FETCHERS[directory] = AssetFetcher(directory)
+    return _FETCHERS[directory]
@@ -0,0 +1,276 @@
+"""
+可续跑的批量渲染：按 JSONL 清单分发到常驻进程池，每完成一个任务就往结果 JSONL 追加一行。
+
+    md2img batch jobs.jsonl -o out/ -w 8            # 命令行
+    run_manifest("jobs.jsonl", output_dir="out")    # Python
+
+清单每行一个 JSON 对象：
+    {"id": "post-1", "input": "posts/1.md", "style": "muyao", "size": "3:4", "css": "a.css", "basename": "post-1"}
+    {"markdown": "# 行内 Markdown", "basename": "card-2", "size": [1080, 1080]}
+
+- input（Markdown 文件路径）与 markdown（行内原文）二选一；相对路径（input / css）相对清单所在目录；
+- size 为预设（3:4 / 1:1 / 2:3 / 4:3）、"宽x高"、[宽, 高]，或它们的列表（一次渲染多种尺寸）；
+  "long" 为长图，缺省时同 convert（长图；命令行默认 3:4）；
+- basename 默认取 input 的文件名；id 默认等于 basename，是续跑时识别任务的键；
+- 可选 output_dir（相对 run_manifest 的 output_dir）、format（png / jpeg / webp）、encode、limits、chunked，含义同 convert；
+- assets 为图片等资源的根目录（相对清单所在目录），默认为 input 所在目录，行内 markdown 任务默认为清单所在目录。
+
+结果每行：{"id", "line", "ok", "paths", "pages", "elapsed", "error"}，按完成顺序追加并立即 flush。
+重新运行时跳过结果文件里已经成功的 id，失败的任务重跑；进程中途崩溃最多重做正在渲染的那几个任务。
+清单中无法解析的行、读不到的输入文件同样记为失败结果，不中断整批。
+"""
+
+import itertools
+import json
+import time
+from pathlib import Path
+from typing import IO, Callable, Dict, Iterator, NamedTuple, Optional, Set, Union
+
+# 清单每行允许的字段
+JOB_FIELDS = (
+    "id", "input", "markdown", "style", "size", "css", "basename", "output_dir", "format", "encode", "limits", "chunked",
+    "assets",
+)
+
+_FORMAT_EXTS = {"png": "png", "jpeg": "jpg", "jpg": "jpg", "webp": "webp"}
+
+
+class BatchProgress(NamedTuple):
+    """
+    批量渲染的进度（每完成一个任务回调一次，run_manifest 结束时返回最终值）。
+
+    - total: 清单中的任务数（非空行数）
+    - done: 本次已完成的任务数（含失败）
+    - failed: 其中失败的任务数
+    - skipped: 结果文件中已成功、本次跳过的任务数
+    - pages: 本次输出的图片张数
+    - elapsed: 本次运行的秒数
+    """
+
+    total: int
+    done: int
+    failed: int
+    skipped: int
+    pages: int
+    elapsed: float
+
+    @property
+    def jobs_per_sec(self) -> float:
+        return self.done / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def pages_per_sec(self) -> float:
+        return self.pages / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def format_progress(progress: BatchProgress) -> str:
+    """一行进度：完成 / 总数、失败与跳过数、吞吐与预计剩余时间。"""
+    remaining = progress.total - progress.skipped - progress.done
+    eta = ""
+    if remaining > 0 and progress.jobs_per_sec > 0:
+        seconds = int(remaining / progress.jobs_per_sec)
+        eta = f"，预计剩余 {seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+    return (
+        f"[md2img] {progress.skipped + progress.done}/{progress.total}"
+        f"（失败 {progress.failed}，跳过 {progress.skipped}）"
+        f" {progress.jobs_per_sec:.2f} 任务/s，{progress.pages_per_sec:.2f} 页/s{eta}"
+    )
+
+
+def default_results_path(manifest: Union[str, Path]) -> Path:
+    """结果文件默认与清单同目录：jobs.jsonl → jobs.results.jsonl"""
+    manifest = Path(manifest)
+    return manifest.with_name(f"{manifest.stem}.results.jsonl")
+
+
+def completed_ids(results: Union[str, Path]) -> Set[str]:
+    """结果文件中已成功的任务 id；文件不存在时为空集。崩溃时写了一半的末行忽略。"""
+    done = set()
+    try:
+        f = open(results, encoding="utf-8")
+    except FileNotFoundError:
+        return done
+    with f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(record, dict) and record.get("ok"):
+                done.add(str(record.get("id")))
+    return done
+
+
+def _parse_size(size):
+    """清单里的 size → (宽, 高) 或尺寸列表；"long" / null 为长图（不分页）。"""
+    from .converter import XIAOHONGSHU_1_1, XIAOHONGSHU_2_3, XIAOHONGSHU_3_4, XIAOHONGSHU_4_3
+
+    presets = {"3:4": XIAOHONGSHU_3_4, "1:1": XIAOHONGSHU_1_1, "2:3": XIAOHONGSHU_2_3, "4:3": XIAOHONGSHU_4_3}
+    if size is None or size == "long":
+        return None
+    if isinstance(size, str):
+        if size in presets:
+            return presets[size]
+        try:
+            w, h = map(int, size.lower().split("x"))
+            return (w, h)
+        except ValueError:
+            raise ValueError(f"无效尺寸: {size!r}，使用预设 (3:4, 1:1, 2:3, 4:3) 或 1200x1600") from None
+    if isinstance(size, list) and len(size) == 2 and all(isinstance(v, int) for v in size):
+        return tuple(size)
+    if isinstance(size, list) and size:
+        return [_parse_size(s) for s in size]
+    raise ValueError(f"无效尺寸: {size!r}")
+
+
+def _job_key(job: dict) -> str:
+    if job.get("id") is not None:
+        return str(job["id"])
+    if job.get("basename"):
+        return str(job["basename"])
+    if job.get("input"):
+        return Path(job["input"]).stem
+    raise ValueError("行内 markdown 任务需要 id 或 basename")
+
+
+def _build_job(job: dict, base_dir: Path, output_dir: Path, defaults: dict, css_cache: Dict[Path, str]) -> dict:
+    """清单中的一行 → convert_many 的任务 dict（在本进程读入 Markdown 与 CSS）。"""
+    unknown = set(job) - set(JOB_FIELDS)
+    if unknown:
+        raise ValueError(f"不支持的字段: {sorted(unknown)}")
+    job = {**defaults, **job}
+    if ("input" in job) == ("markdown" in job):
+        raise ValueError("input 与 markdown 必须且只能给出一个")
+    if "input" in job:
+        md_content = (base_dir / job["input"]).read_text(encoding="utf-8")
+    else:
+        md_content = job["markdown"]
+    basename = job.get("basename") or (Path(job["input"]).stem if "input" in job else _job_key(job))
+    fmt = job.get("format", "png")
+    if fmt not in _FORMAT_EXTS:
+        raise ValueError(f"不支持的格式: {fmt!r}，请用 png、jpeg 或 webp")
+    target_dir = output_dir / job["output_dir"] if job.get("output_dir") else output_dir
+    task = {
+        "md_content": md_content,
+        "output_path": target_dir / f"{basename}.{_FORMAT_EXTS[fmt]}",
+    }
+    if "size" in job:
+        task["page_size"] = _parse_size(job["size"])
+    if job.get("style"):
+        task["style"] = job["style"]
+    if job.get("css"):
+        css_path = (base_dir / job["css"]).resolve()
+        if css_path not in css_cache:
+            css_cache[css_path] = css_path.read_text(encoding="utf-8")
+        task["extra_css"] = css_cache[css_path]
+    if job.get("assets"):
+        task["assets"] = str((base_dir / job["assets"]).resolve())
+    else:
+        task["assets"] = str((base_dir / job["input"]).resolve().parent if "input" in job else base_dir)
+    for key in ("encode", "limits", "chunked"):
+        if job.get(key) is not None:
+            task[key] = job[key]
+    target_dir.mkdir(parents=True, exist_ok=True)
+    return task
+
+
+def _append(out: IO[str], record: dict) -> None:
+    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+    out.flush()
+
+
+def run_manifest(
+    manifest: Union[str, Path],
+    results: Optional[Union[str, Path]] = None,
+    *,
+    output_dir: Union[str, Path] = ".",
+    workers: Optional[int] = None,
+    defaults: Optional[dict] = None,
+    on_progress: Optional[Callable[[BatchProgress], None]] = None,
+) -> BatchProgress:
+    """
+    按 JSONL 清单批量渲染（格式见模块说明），结果逐行追加到 results，已成功的任务跳过。
+
+    :param manifest: 清单文件路径
+    :param results: 结果 JSONL 路径，默认 default_results_path(manifest)
+    :param output_dir: 输出根目录
+    :param workers: worker 进程数，默认 os.cpu_count()（进程池同 convert_many）
+    :param defaults: 清单行缺省字段的默认值，如 {"style": "muyao", "size": "3:4"}
+    :param on_progress: 每完成一个任务以当前 BatchProgress 调用
+    :return: 最终进度
+    """
+    from .converter import convert_many
+
+    manifest = Path(manifest)
+    results = Path(results) if results is not None else default_results_path(manifest)
+    output_dir = Path(output_dir).resolve()
+    base_dir = manifest.resolve().parent
+    defaults = dict(defaults or {})
+    skip = completed_ids(results)
+
+    with open(manifest, "rb") as f:
+        total = sum(1 for line in f if line.strip())
+
+    t0 = time.perf_counter()
+    counts = {"done": 0, "failed": 0, "skipped": 0, "pages": 0}
+    # convert_many 的任务序号 → (id, 行号)
+    keys: Dict[int, tuple] = {}
+    indices = itertools.count()
+
+    def progress() -> BatchProgress:
+        return BatchProgress(total, counts["done"], counts["failed"], counts["skipped"], counts["pages"], time.perf_counter() - t0)
+
+    def record(key: str, line_no: int, paths: list, error: Optional[str], elapsed: float) -> None:
+        _append(out, {
+            "id": key,
+            "line": line_no,
+            "ok": error is None,
+            "paths": [str(p) for p in paths],
+            "pages": len(paths),
+            "elapsed": round(elapsed, 4),
+            "error": error,
+        })
+        counts["done"] += 1
+        if error is not None:
+            counts["failed"] += 1
+        counts["pages"] += len(paths)
+        if on_progress is not None:
+            on_progress(progress())
+
+    def jobs() -> Iterator[dict]:
+        # 清单解析失败、输入读不到的行直接记为失败，不进入进程池
+        css_cache: Dict[Path, str] = {}
+        with open(manifest, encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                key = f"line-{line_no}"
+                try:
+                    job = json.loads(line)
+                    if not isinstance(job, dict):
+                        raise ValueError("每行必须是 JSON 对象")
+                    key = _job_key(job)
+                    if key in skip:
+                        counts["skipped"] += 1
+                        continue
+                    task = _build_job(job, base_dir, output_dir, defaults, css_cache)
+                except (ValueError, OSError) as e:
+                    record(key, line_no, [], f"{type(e).__name__}: {e}", 0.0)
+                    continue
+                keys[next(indices)] = (key, line_no)
+                yield task
+
+    results.parent.mkdir(parents=True, exist_ok=True)
+    # 上次崩溃可能留下没有换行的半行，先补上换行，新记录从新的一行开始
+    torn = False
+    if results.exists() and results.stat().st_size > 0:
+        with open(results, "rb") as f:
+            f.seek(-1, 2)
+            torn = f.read(1) != b"\n"
+    with open(results, "a", encoding="utf-8") as out:
+        if torn:
+            out.write("\n")
+        for result in convert_many(jobs(), workers=workers):
+            key, line_no = keys.pop(result.index)
+            record(key, line_no, result.paths, result.error, result.elapsed)
+    return progress()
@@ -0,0 +1,359 @@
+"""
+内容寻址的渲染缓存。
+
+键为 (markdown, 解析后的完整 CSS, style, page_size, backend, 输出格式, 库与渲染依赖版本, CACHE_FORMAT …) 的 SHA-256，
+值为该次渲染产出的全部页图片。命中时把缓存的图片复制（或硬链接）到目标路径，
+跳过 Markdown 解析、排版、PDF 生成与栅格化。
+
+目录结构:
+    <cache_dir>/<key[:2]>/<key>/0.png, 1.png, ..., meta.json
+    <cache_dir>/tmp/      写入中的条目，完成后原子 rename 到正式位置
+    <cache_dir>/.lock     写入计数与淘汰时的进程间文件锁
+    <cache_dir>/.size     全体进程共享的总字节数计数
+
+多进程并发安全：条目只在完整写好后才 rename 出现，读到一半被淘汰按未命中处理；
+更新 .size 与淘汰时持有 .lock 排他锁。按 meta.json 的 mtime 做 LRU（命中时 touch），
+写入后 .size 超出字节预算时才扫描目录、淘汰最旧条目，并以扫描结果校正 .size。
+"""
+
+import functools
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+try:
+    import fcntl
+except ImportError:  # Windows：没有 flock，退化为仅进程内互斥
+    fcntl = None
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# 缓存条目格式版本：渲染输出会变的改动（编码参数、栅格化流程、主题处理等）要加一，使旧条目失效
+CACHE_FORMAT = 2
+
+
+def default_cache_dir() -> Path:
+    """缓存目录：$MD2IMG_CACHE_DIR > $XDG_CACHE_HOME/md2img > ~/.cache/md2img"""
+    env = os.environ.get("MD2IMG_CACHE_DIR")
+    if env:
+        return Path(env)
+    xdg = os.environ.get("XDG_CACHE_HOME")
+    return (Path(xdg) if xdg else Path.home() / ".cache") / "md2img"
+
+
+@functools.lru_cache(maxsize=None)
+def _renderer_versions() -> Dict[str, Optional[str]]:
+    """
+    WeasyPrint 与 PyMuPDF 的版本（未安装为 None），升级后排版或栅格化结果可能不同。
+    从包元数据读取（即 weasyprint.__version__ 与 fitz.VersionBind），命中缓存时不必导入两者。
+    """
+    from importlib import metadata
+
+    versions = {}
+    for name in ("weasyprint", "pymupdf"):
+        try:
+            versions[name] = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            versions[name] = None
+    return versions
+
+
+def _image_pixels(path: Path) -> int:
+    """
+    图片的宽×高（只读文件头），命中时据此检查 max_pixels；Pillow 认不出的格式记为 0。
+    直接用格式插件打开：长图常超过 Image.MAX_IMAGE_PIXELS，走 Image.open 会被当作解压炸弹拒绝。
+    """
+    from PIL import Image
+
+    Image.init()
+    fmt = Image.registered_extensions().get(path.suffix.lower())
+    if fmt not in Image.OPEN:
+        return 0
+    factory, _accept = Image.OPEN[fmt]
+    try:
+        with open(path, "rb") as fp, factory(fp, str(path)) as img:
+            return img.width * img.height
+    except (OSError, ValueError, SyntaxError):
+        return 0
+
+
+class RenderCache:
+    """
+    磁盘渲染缓存。
+
+    :param directory: 缓存目录，默认 default_cache_dir()
+    :param max_bytes: 字节预算，超出后按 LRU 淘汰，默认 512 MiB
+    :param link: 命中时用硬链接代替复制（省一次拷贝；但之后若原地改写输出文件会连带改坏缓存）
+    """
+
+    def __init__(
+        self,
+        directory: Optional[Union[str, Path]] = None,
+        *,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        link: bool = False,
+    ):
+        self.directory = Path(directory).expanduser() if directory else default_cache_dir()
+        self.max_bytes = max_bytes
+        self.link = link
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self._mutex = threading.Lock()
+
+    # -- 键 -----------------------------------------------------------------
+
+    @staticmethod
+    def make_key(**parts) -> str:
+        """把渲染参数（需可 JSON 序列化）连同库版本、渲染依赖版本与 CACHE_FORMAT 哈希成缓存键。"""
+        from . import __version__
+
+        payload = json.dumps(
+            {"version": __version__, "format_version": CACHE_FORMAT, "renderers": _renderer_versions(), **parts},
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _entry_dir(self, key: str) -> Path:
+        return self.directory / key[:2] / key
+
+    # -- 读写 ---------------------------------------------------------------
+
+    def fetch(self, key: str, targets_for, check: Optional[Callable[[int, int], None]] = None) -> Optional[List[Path]]:
+        """
+        查缓存，命中时把各页图片放到目标路径。
+
+        :param key: make_key() 得到的键
+        :param targets_for: 回调，参数为页数，返回同样长度的目标路径列表
+        :param check: 可选回调 check(张数, 像素总数)，在放置图片之前调用（资源上限检查），抛出的异常原样传出
+        :return: 命中时为目标路径列表，未命中为 None
+        """
+        entry = self._entry_dir(key)
+        meta_path = entry / "meta.json"
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            if check is not None:
+                check(len(meta["files"]), meta["pixels"])
+            targets = [Path(p) for p in targets_for(len(meta["files"]))]
+            for name, dst in zip(meta["files"], targets):
+                self._place(entry / name, dst)
+            os.utime(meta_path)  # LRU：刷新最近使用时间
+        except (OSError, ValueError, KeyError):
+            # 不存在、写入未完成或正被淘汰，统统按未命中处理
+            with self._mutex:
+                self.misses += 1
+            return None
+        with self._mutex:
+            self.hits += 1
+        return targets
+
+    def load(self, key: str, check: Optional[Callable[[int, int], None]] = None) -> Optional[List[bytes]]:
+        """查缓存，命中时直接读出各页图片字节（交给 OutputSink，不落到目标路径）；未命中为 None。check 同 fetch。"""
+        entry = self._entry_dir(key)
+        meta_path = entry / "meta.json"
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            if check is not None:
+                check(len(meta["files"]), meta["pixels"])
+            pages = [(entry / name).read_bytes() for name in meta["files"]]
+            os.utime(meta_path)
+        except (OSError, ValueError, KeyError):
+            with self._mutex:
+                self.misses += 1
+            return None
+        with self._mutex:
+            self.hits += 1
+        return pages
+
+    def _place(self, src: Path, dst: Path) -> None:
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        tmp = dst.with_name(f".{dst.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            if self.link:
+                try:
+                    os.link(src, tmp)
+                except OSError:  # 跨文件系统等情况退回复制
+                    shutil.copyfile(src, tmp)
+            else:
+                shutil.copyfile(src, tmp)
+            os.replace(tmp, dst)
+        finally:
+            tmp.unlink(missing_ok=True)
+
+    def store(self, key: str, paths: Sequence[Union[str, Path]]) -> None:
+        """把一次渲染的输出存入缓存（已存在则忽略），必要时触发淘汰。"""
+        self._store(key, [(Path(p).suffix, lambda dst, p=p: shutil.copyfile(p, dst)) for p in paths])
+
+    def store_data(self, key: str, pages: Sequence[Tuple[str, bytes]]) -> None:
+        """同 store，但输出为内存中的 [(文件名, 字节)]（见 OutputSink）。"""
+        self._store(key, [(Path(name).suffix, lambda dst, data=data: dst.write_bytes(data)) for name, data in pages])
+
+    def _store(self, key: str, writers: List[Tuple[str, Callable[[Path], Any]]]) -> None:
+        entry = self._entry_dir(key)
+        if (entry / "meta.json").exists():
+            return
+        tmp_root = self.directory / "tmp"
+        tmp_root.mkdir(parents=True, exist_ok=True)
+        tmp = tmp_root / uuid.uuid4().hex
+        tmp.mkdir()
+        try:
+            files, size, pixels = [], 0, 0
+            for i, (suffix, write) in enumerate(writers):
+                name = f"{i}{suffix.lower()}"
+                write(tmp / name)
+                size += (tmp / name).stat().st_size
+                pixels += _image_pixels(tmp / name)
+                files.append(name)
+            meta = {"files": files, "bytes": size, "pixels": pixels}
+            (tmp / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+            entry.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                os.rename(tmp, entry)
+            except OSError:
+                # 其它进程已写入同一条目
+                return
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+        with self._lock():
+            self.stores += 1
+            total = self._read_size()
+            if total is None:
+                # 计数缺失或损坏（新目录、旧版本留下的目录）：扫描一次重建，刚写入的条目已在其中
+                total = sum(size for _, size, _ in self._scan())
+            else:
+                total += size
+            if total > self.max_bytes:
+                self._evict_locked(self.max_bytes)
+            else:
+                self._write_size(total)
+
+    # -- 淘汰 ---------------------------------------------------------------
+
+    @contextmanager
+    def _lock(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with self._mutex, open(self.directory / ".lock", "a+") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _read_size(self) -> Optional[int]:
+        """共享的总字节数计数（调用方持有 .lock）；缺失或损坏为 None。"""
+        try:
+            return int((self.directory / ".size").read_text(encoding="ascii"))
+        except (OSError, ValueError):
+            return None
+
+    def _write_size(self, total: int) -> None:
+        try:
+            (self.directory / ".size").write_text(str(total), encoding="ascii")
+        except OSError:
+            pass
+
+    def _scan(self) -> List[tuple]:
+        """列出所有条目：(mtime, bytes, entry_dir)。"""
+        entries = []
+        if not self.directory.exists():
+            return entries
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir() or len(shard.name) != 2:
+                continue
+            for entry in os.scandir(shard.path):
+                meta_path = Path(entry.path) / "meta.json"
+                try:
+                    mtime = meta_path.stat().st_mtime
+                    size = json.loads(meta_path.read_text(encoding="utf-8"))["bytes"]
+                except (OSError, ValueError, KeyError):
+                    continue
+                entries.append((mtime, size, Path(entry.path)))
+        return entries
+
+    def evict(self, max_bytes: Optional[int] = None) -> int:
+        """按 LRU 淘汰直到总大小不超过预算，返回淘汰的条目数。"""
+        with self._lock():
+            return self._evict_locked(self.max_bytes if max_bytes is None else max_bytes)
+
+    def _evict_locked(self, budget: int) -> int:
+        removed = 0
+        entries = sorted(self._scan())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= budget:
+                break
+            # 先改名再删除，正在读的进程只会看到“条目不存在”
+            trash = self.directory / "tmp" / f"evict-{uuid.uuid4().hex}"
+            trash.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                os.rename(path, trash)
+            except OSError:
+                continue
+            shutil.rmtree(trash, ignore_errors=True)
+            total -= size
+            removed += 1
+        # 以扫描结果校正计数（条目 rename 与计数更新之间被并发淘汰扫到的会多计一次，在这里抹平）
+        self._write_size(total)
+        self.evictions += removed
+        self._sweep_tmp()
+        return removed
+
+    def _sweep_tmp(self, max_age: float = 3600.0) -> None:
+        """清理崩溃进程遗留的半成品目录。"""
+        tmp_root = self.directory / "tmp"
+        if not tmp_root.exists():
+            return
+        cutoff = time.time() - max_age
+        for entry in os.scandir(tmp_root):
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    shutil.rmtree(entry.path, ignore_errors=True)
+            except OSError:
+                continue
+
+    def clear(self) -> None:
+        """清空缓存。"""
+        self.evict(max_bytes=0)
+
+    def stats(self) -> Dict[str, int]:
+        """命中/未命中等计数（本进程内累计）以及当前条目数与总字节数（全体进程共享）。"""
+        entries = self._scan()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+            "max_bytes": self.max_bytes,
+        }
+
+
+_CACHES: Dict[Path, RenderCache] = {}
+
+
+def get_cache(cache: Union[bool, str, Path, RenderCache]) -> RenderCache:
+    """
+    把 convert(cache=...) 的参数解析成 RenderCache：
+    True 为默认目录，str/Path 为指定目录（同一目录复用同一实例，计数连续），RenderCache 原样返回。
+    """
+    if isinstance(cache, RenderCache):
+        return cache
+    directory = default_cache_dir() if cache is True else Path(cache)
+    directory = directory.expanduser().resolve()
+    if directory not in _CACHES:
+        _CACHES[directory] = RenderCache(directory)
+    return _CACHES[directory]
@@ -5,10 +5,21 @@ Markdown → HTML → 图片 转换核心。
 支持小红书等平台固定尺寸，长图自动分页为多张。
 """
 
+import hashlib
+import os
+import re
+import threading
+from contextlib import contextmanager, nullcontext
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Optional, Tuple, Union
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
 
-import markdown
+if TYPE_CHECKING:
+    from .assets import AssetFetcher
+    from .cache import RenderCache
+    from .limits import RenderLimits
+    from .sinks import OutputSink
+    from .stats import RenderStats
 
 # 小红书推荐尺寸（宽×高 px，长边≥1080）
 # 3:4 竖版最优，1:1 正方形，2:3 长图
@@ -317,20 +328,334 @@ VIRGIL_HANDWRITING_CSS = VIRGIL_CSS
 OBSIDIAN_STYLE_CSS = OBSIDIAN_CSS
 
 
-def _md_to_html(md_content: str, extras: Optional[list] = None, base_css: Optional[str] = None) -> str:
-    """Markdown 字符串 → 完整 HTML 文档（带默认样式）。"""
-    html_body = markdown.markdown(
-        md_content,
-        extensions=extras or ["extra", "codehilite", "toc"],
+# ---------------------------------------------------------------------------
+# 主题注册表：主题名 → CSS，解析后的 WeasyPrint 样式表按进程缓存
+# ---------------------------------------------------------------------------
+
+THEMES: Dict[str, str] = {
+    "default": DEFAULT_CSS,
+    "handwriting": HANDWRITING_CSS,
+    "muyao": MUYAO_CSS,
+    "virgil": VIRGIL_CSS,
+    "obsidian": OBSIDIAN_CSS,
+    "parchment": PARCHMENT_CSS,
+    "excali": EXCALI_CSS,
+}
+
+PRESET_SIZES = (XIAOHONGSHU_3_4, XIAOHONGSHU_1_1, XIAOHONGSHU_2_3, XIAOHONGSHU_4_3)
+
+
+def register_theme(name: str, css: str) -> None:
+    """注册（或覆盖）一个主题，之后可通过 style=name 使用。"""
+    THEMES[name] = css
+
+
+def get_theme_css(style: str) -> str:
+    """主题名 → CSS 字符串；未注册的主题回退到 default。"""
+    return THEMES.get(style, DEFAULT_CSS)
+
+
+@lru_cache(maxsize=128)
+def _compile_css(css: str, font_config=None):
+    """
+    CSS 字符串 → weasyprint.CSS，同一进程内按 (内容, 字体配置) 缓存。
+    WeasyPrint 只在解析时把 @font-face 登记进传入的 font_config（不传则静默丢弃），
+    所以主题与 extra_css 要带上渲染时用的 _font_config() 解析。
+    """
+    from weasyprint import CSS
+
+    return CSS(string=css, font_config=font_config)
+
+
+# 固定页尺寸时的页边距（px）；paginate 据此判断一页是否从新的元素开始
+PAGE_MARGIN = 28
+
+
+@lru_cache(maxsize=32)
+def _page_stylesheet(width: int, height: int):
+    """固定页尺寸的 @page 样式表，同一进程内按尺寸缓存，避免每次渲染重新解析。"""
+    return _compile_css(f"@page {{ size: {width}px {height}px; margin: {PAGE_MARGIN}px; }}")
+
+
+@lru_cache(maxsize=256)
+def _stylesheets_for(
+    theme_css: str, page_size: Optional[Tuple[int, int]], extra_css: Optional[str], font_config=None
+) -> tuple:
+    sheets = [_compile_css(theme_css, font_config)]
+    if extra_css:
+        sheets.append(_compile_css(extra_css, font_config))
+    # @page 尺寸必须放在最后，覆盖主题里默认的 800px
+    if page_size:
+        sheets.append(_page_stylesheet(*page_size))
+    return tuple(sheets)
+
+
+def get_stylesheets(
+    style: str = "default",
+    page_size: Optional[Tuple[int, int]] = None,
+    extra_css: Optional[str] = None,
+) -> list:
+    """
+    主题 + extra_css + 页尺寸 对应的已解析样式表列表，直接传给 write_pdf(stylesheets=...)。
+    每种组合在每个线程内只解析一次；其中的 @font-face 登记在当前线程的字体配置里（见 _font_config），
+    须在同一线程内渲染。
+    """
+    return list(
+        _stylesheets_for(get_theme_css(style), tuple(page_size) if page_size else None, extra_css, _font_config())
     )
+
+
+def precompile_themes(page_sizes: Iterable[Tuple[int, int]] = PRESET_SIZES) -> None:
+    """预解析全部已注册主题及其与各预设尺寸的组合（worker / 守护进程启动时调用）。"""
+    for style in THEMES:
+        get_stylesheets(style)
+        for size in page_sizes:
+            get_stylesheets(style, size)
+
+
+# ---------------------------------------------------------------------------
+# 字体：线程内共享的 FontConfiguration + 随应用分发的字体目录
+# ---------------------------------------------------------------------------
+
+# 字体目录的环境变量；preload_fonts(font_dir=...) 也写入这里，之后启动的 worker 进程随之继承
+FONT_DIR_ENV = "MD2IMG_FONT_DIR"
+_FONT_SUFFIXES = (".ttf", ".otf", ".ttc", ".woff", ".woff2")
+# 预热文本：覆盖中文、英文、数字、粗体、标题与行内代码用到的字体
+_WARM_MD = "# 预热 Warm-up\n\n中文手写 **加粗** *Italic* English 0123 `code`"
+
+_FONTS = threading.local()
+
+
+def _font_dir() -> Optional[str]:
+    directory = os.environ.get(FONT_DIR_ENV)
+    return str(Path(directory).expanduser().resolve()) if directory else None
+
+
+@lru_cache(maxsize=8)
+def _font_faces(directory: str) -> Tuple[Tuple[str, int, str, str], ...]:
+    """字体目录（含子目录）→ ((族名, 字重, 样式, 文件路径), ...)，族名 / 字重取自字体自身的 name、OS/2 表。"""
+    try:
+        from fontTools.ttLib import TTFont
+    except ImportError as e:
+        raise ImportError(f"font_dir 需要安装 fonttools（一般随 WeasyPrint 安装）：pip install fonttools（{e}）") from e
+
+    root = Path(directory)
+    if not root.is_dir():
+        raise ValueError(f"字体目录不存在: {root}")
+    faces = []
+    for path in sorted(root.rglob("*")):
+        if path.suffix.lower() not in _FONT_SUFFIXES:
+            continue
+        try:
+            font = TTFont(str(path), lazy=True, fontNumber=0)
+        except Exception as e:
+            raise ValueError(f"无法读取字体文件 {path}: {e}") from None
+        try:
+            family = font["name"].getBestFamilyName()
+            os2 = font["OS/2"] if "OS/2" in font else None
+            weight = os2.usWeightClass if os2 is not None else 400
+            style = "italic" if os2 is not None and os2.fsSelection & 1 else "normal"
+        finally:
+            font.close()
+        if family:
+            faces.append((family, weight, style, str(path)))
+    return tuple(faces)
+
+
+def _font_face_css(directory: str) -> str:
+    rules = []
+    for family, weight, style, path in _font_faces(directory):
+        family = family.replace("\\", "\\\\").replace('"', '\\"')
+        rules.append(
+            f'@font-face {{ font-family: "{family}"; src: url("{Path(path).as_uri()}"); '
+            f"font-weight: {weight}; font-style: {style}; }}"
+        )
+    return "\n".join(rules)
+
+
+def _font_config():
+    """
+    当前线程共享的 weasyprint FontConfiguration，传给每次 render(font_config=...)。
+    不传时 WeasyPrint 每次渲染都新建一个：重新加载 fontconfig 配置、新建 Pango 字体映射，
+    大号中文 / 手写字体的匹配与加载每次重来；共用后只在首次发生。Pango 字体映射不是线程安全的，故按线程隔离。
+    字体目录中的字体在首次使用（或目录变更后）登记为 @font-face。
+    """
+    config = getattr(_FONTS, "config", None)
+    if config is None:
+        try:
+            from weasyprint.text.fonts import FontConfiguration
+        except ImportError:  # WeasyPrint < 53
+            from weasyprint.fonts import FontConfiguration
+
+        config = _FONTS.config = FontConfiguration()
+        _FONTS.dirs = set()
+    directory = _font_dir()
+    if directory is not None and directory not in _FONTS.dirs:
+        css = _font_face_css(directory)
+        if css:
+            from weasyprint import CSS
+
+            CSS(string=css, font_config=config)
+        _FONTS.dirs.add(directory)
+    return config
+
+
+def preload_fonts(themes: Optional[Iterable[str]] = None, *, font_dir: Optional[Union[str, Path]] = None) -> None:
+    """
+    预热字体：建立当前线程共享的字体配置，并用每个主题排版一段中英文样例，
+    让 fontconfig 匹配、字体文件加载与 Pango 字形缓存在第一次真实渲染之前完成。
+
+    :param themes: 要预热的主题名，默认全部已注册主题
+    :param font_dir: 随应用分发的字体目录（.ttf / .otf / .ttc / .woff / .woff2，含子目录）。
+        其中字体按自身族名登记，主题 CSS 里的 font-family 直接命中，不依赖系统安装与 fontconfig 扫描；
+        会写入环境变量 MD2IMG_FONT_DIR，之后启动的 worker 进程沿用同一目录
+    """
+    import weasyprint
+
+    if font_dir is not None:
+        font_dir = Path(font_dir).expanduser().resolve()
+        _font_faces(str(font_dir))  # 目录或字体文件有问题时在这里报错
+        os.environ[FONT_DIR_ENV] = str(font_dir)
+    config = _font_config()
+    warm_html = _md_to_html(_WARM_MD, inline_css=False)
+    for style in THEMES if themes is None else themes:
+        if style not in THEMES:
+            raise ValueError(f"未注册的主题: {style!r}")
+        weasyprint.HTML(string=warm_html).render(stylesheets=get_stylesheets(style), font_config=config)
+
+
+# ---------------------------------------------------------------------------
+# Markdown → HTML：复用 Markdown 实例 + 按块缓存
+# ---------------------------------------------------------------------------
+
+DEFAULT_MD_EXTENSIONS = ("extra", "codehilite", "toc")
+
+_MD_ENGINES = threading.local()
+
+# 依赖全文上下文的语法：引用式链接 / 脚注定义、脚注引用、缩写、[TOC]、HTML 块。
+# 出现任意一种时不分块，整篇一次转换
+_GLOBAL_SYNTAX_RE = re.compile(r"^ {0,3}(?:\[[^\]\n]+\]:|\*\[|<[A-Za-z/!?])|\[\^|\[TOC\]", re.MULTILINE)
+_ATX_HEADING_RE = re.compile(r"#{1,6}(?:[ \t]|$)")
+_HTML_ID_RE = re.compile(r' id="([^"]*)"')
+_HILITE_END = "</code></pre></div>"
+
+
+def _md_engine(extensions: Tuple[str, ...]):
+    """
+    当前线程的 Markdown 实例（按扩展组合各一个）。
+    构造实例要加载各扩展并编译它们的正则，复用时只需 reset()；Markdown 实例不是线程安全的，故按线程隔离。
+    """
+    engines = getattr(_MD_ENGINES, "engines", None)
+    if engines is None:
+        engines = _MD_ENGINES.engines = {}
+    engine = engines.get(extensions)
+    if engine is None:
+        import markdown
+
+        engine = engines[extensions] = markdown.Markdown(extensions=list(extensions))
+    return engine
+
+
+def _convert_markdown(text: str, extensions: Tuple[str, ...]) -> str:
+    engine = _md_engine(extensions)
+    try:
+        return engine.convert(text)
+    finally:
+        engine.reset()
+
+
+@lru_cache(maxsize=4096)
+def _convert_block(text: str, extensions: Tuple[str, ...]) -> str:
+    """单个顶层块 → HTML，按内容缓存（代码高亮、表格等只在块内容变化时才重新处理）。"""
+    return _convert_markdown(text, extensions)
+
+
+def _split_blocks(text: str) -> Optional[List[str]]:
+    """
+    把 Markdown 切成可以各自独立转换、拼接后与整篇转换结果一致的顶层块。
+    只在空行之后、且下一行是 ATX 标题或围栏代码块开头的位置切分，围栏代码块结束后（后跟空行）也切分；
+    这些位置之前的列表、引用等结构必然已经结束。含全文上下文语法时返回 None。
+    """
+    if _GLOBAL_SYNTAX_RE.search(text):
+        return None
+    from markdown.extensions.fenced_code import FencedBlockPreprocessor
+
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    # 与 fenced_code 用同一个正则找围栏代码块，保证判定一致
+    fences = [(m.start(), m.end()) for m in FencedBlockPreprocessor.FENCED_BLOCK_RE.finditer(text)]
+    fence_starts = {start for start, _ in fences}
+    fence_ends = {end for _, end in fences}
+
+    cuts = [0]
+    pos, fence_index, prev_blank, after_fence = 0, 0, True, False
+    for line in text.split("\n"):
+        while fence_index < len(fences) and fences[fence_index][1] <= pos:
+            fence_index += 1
+        inside = fence_index < len(fences) and fences[fence_index][0] < pos
+        blank = not line.strip()
+        if not inside and not blank and prev_blank and pos > 0:
+            if after_fence or pos in fence_starts or _ATX_HEADING_RE.match(line):
+                cuts.append(pos)
+        if not blank:
+            after_fence = False
+        end = pos + len(line)
+        if end in fence_ends:
+            after_fence = True
+        prev_blank = blank and not inside
+        pos = end + 1
+    cuts.append(len(text))
+    return [text[a:b] for a, b in zip(cuts, cuts[1:]) if text[a:b].strip()]
+
+
+def _join_blocks(parts: List[str]) -> str:
+    # codehilite 的高亮结果以换行结尾，整篇转换时其后多一个空行，只在最后被 strip() 去掉
+    return "".join(part + ("\n\n" if part.endswith(_HILITE_END) else "\n") for part in parts[:-1]) + parts[-1]
+
+
+def _render_blocks(md_content: str, extensions: Tuple[str, ...]) -> Tuple[List[str], List[str]]:
+    """
+    Markdown → (源码块列表, 对应的 HTML 片段列表)。默认扩展组合下按顶层块转换并缓存每块的结果；
+    含全文上下文语法、或分块后标题 id 出现重复（toc 会给整篇中重复的 id 加后缀）时退回整篇转换，此时只有一块。
+    """
+    if extensions == DEFAULT_MD_EXTENSIONS:
+        blocks = _split_blocks(md_content)
+        if blocks is not None and len(blocks) > 1:
+            parts = [_convert_block(block, extensions) for block in blocks]
+            ids = _HTML_ID_RE.findall(_join_blocks(parts))
+            if len(ids) == len(set(ids)):
+                return blocks, parts
+    return [md_content], [_convert_markdown(md_content, extensions)]
+
+
+def _render_markdown(md_content: str, extensions: Tuple[str, ...]) -> str:
+    """Markdown → HTML 片段，与整篇一次 markdown.markdown() 的输出完全一致（见 _render_blocks）。"""
+    return _join_blocks(_render_blocks(md_content, extensions)[1])
+
+
+def _md_to_html(
+    md_content: str,
+    extras: Optional[list] = None,
+    base_css: Optional[str] = None,
+    inline_css: bool = True,
+) -> str:
+    """
+    Markdown 字符串 → 完整 HTML 文档（带默认样式）。
+    inline_css=False 时不内联 <style>，样式改由 get_stylesheets() 的预解析样式表提供。
+    """
+    html_body = _render_markdown(md_content, tuple(extras) if extras else DEFAULT_MD_EXTENSIONS)
+    return _html_document(html_body, base_css, inline_css)
+
+
+def _html_document(html_body: str, base_css: Optional[str] = None, inline_css: bool = True) -> str:
+    """HTML 片段 → 完整 HTML 文档。"""
     css = base_css if base_css else DEFAULT_CSS
+    style_tag = f"\n  <style>{css}</style>" if inline_css else ""
     return f"""<!DOCTYPE html>
 <html lang="zh-CN">
 <head>
   <meta charset="UTF-8">
   <meta name="viewport" content="width=device-width, initial-scale=1.0">
-  <title>Markdown Export</title>
-  <style>{css}</style>
+  <title>Markdown Export</title>{style_tag}
 </head>
 <body>
 {html_body}
@@ -338,103 +663,1480 @@ def _md_to_html(md_content: str, extras: Optional[list] = None, base_css: Option
 </html>"""
 
 
-def _crop_image_to_content(image_path: Union[str, Path]) -> None:
-    """裁剪图片到内容区域，去掉底部和四周的纯白空白。"""
-    from PIL import Image
+# 灰度 < 254 视为内容，其余视为白边；查表在 Pillow 的 C 层完成，不逐像素回调 Python
+_WHITE_THRESHOLD = 254
+_CONTENT_LUT = [255 if v < _WHITE_THRESHOLD else 0 for v in range(256)]
+CROP_MARGIN = 4
+
+
+def _expand_box(box: Tuple[int, int, int, int], width: int, height: int) -> Tuple[int, int, int, int]:
+    """内容包围盒四周外扩 CROP_MARGIN 像素（不超出图片）。"""
+    return (
+        max(0, box[0] - CROP_MARGIN),
+        max(0, box[1] - CROP_MARGIN),
+        min(width, box[2] + CROP_MARGIN),
+        min(height, box[3] + CROP_MARGIN),
+    )
+
+
+def _crop_image_to_content(image_path: Union[str, Path]) -> None:
+    """裁剪已写出的图片到内容区域，去掉底部和四周的纯白空白（渲染流程本身已改为在 pixmap 上裁剪，见 _trim_pixmap）。"""
+    from PIL import Image
+
+    path = Path(image_path)
+    img = Image.open(path).convert("RGB")
+    box = img.convert("L").point(_CONTENT_LUT).getbbox()
+    if not box:
+        return
+    _save_image(img.crop(_expand_box(box, *img.size)), path)
+
+
+def _content_bbox(pix) -> Optional[Tuple[int, int, int, int]]:
+    """
+    直接在 pixmap 采样数据上求非白色内容的包围盒（已外扩边距），整页空白时返回 None。
+    灰度图与 Pillow 共享同一块内存，只额外分配一个 1 字节/像素的掩码。
+    """
+    import fitz  # PyMuPDF
+    from PIL import Image
+
+    gray = fitz.Pixmap(fitz.csGRAY, pix)
+    gray_img = Image.frombuffer("L", (gray.width, gray.height), gray.samples_mv, "raw", "L", gray.stride, 1)
+    box = gray_img.point(_CONTENT_LUT).getbbox()
+    del gray_img, gray
+    return _expand_box(box, pix.width, pix.height) if box else None
+
+
+def _save_image(img, path: Path) -> None:
+    """Pillow 图片按扩展名编码写出：.jpg/.jpeg 为 JPEG(95)，其余为 PNG。"""
+    if path.suffix.lower() in (".jpg", ".jpeg"):
+        img.save(str(path), quality=95)
+    else:
+        img.save(str(path))
+
+
+def _page_path(output_path: Path, index: int) -> Path:
+    """分页输出的第 index 页（从 0 开始）路径：article.png → article_1.png, article_2.png ..."""
+    return output_path.parent / f"{output_path.stem}_{index + 1}{output_path.suffix}"
+
+
+_NO_STAGE = nullcontext()
+
+
+def _stage(stats: Optional["RenderStats"], name: str):
+    """stats 为 None 时返回共享的空上下文，不计时、不分配。"""
+    return _NO_STAGE if stats is None else stats.stage(name)
+
+
+def _total(stats: Optional["RenderStats"]):
+    """整次调用的计时（结束时记录峰值内存）；stats 为 None 时同样是空上下文。"""
+    return _NO_STAGE if stats is None else stats.total()
+
+
+# 中间 PDF 的 write_pdf 选项：PDF 只给 PyMuPDF 读一次、随即丢弃，与默认选项相比只关掉压缩
+# （内容流、字体、图片不做 zlib 压缩，也不打包对象流）。HTML 里 <link rel=attachment> 的附件也不嵌入，见 _write_intermediate_pdf
+INTERMEDIATE_PDF_OPTIONS = {"uncompressed_pdf": True}
+
+
+def _pdf_options() -> dict:
+    """INTERMEDIATE_PDF_OPTIONS 中当前 WeasyPrint 认识的部分（< 59 的 write_pdf 不接受这些选项）。"""
+    try:
+        from weasyprint import DEFAULT_OPTIONS
+    except ImportError:
+        return {}
+    return {k: v for k, v in INTERMEDIATE_PDF_OPTIONS.items() if k in DEFAULT_OPTIONS}
+
+
+def _write_intermediate_pdf(document, target=None):
+    """按中间 PDF 选项序列化 document；target 为 None 时返回 PDF 字节。"""
+    metadata = getattr(document, "metadata", None)
+    attachments = getattr(metadata, "attachments", None)
+    if not attachments:
+        return document.write_pdf(target, **_pdf_options())
+    # 附件要逐个抓取并写入 PDF，对像素没有影响；临时摘掉（paginate 的 Document 之后可能还会用）
+    metadata.attachments = []
+    try:
+        return document.write_pdf(target, **_pdf_options())
+    finally:
+        metadata.attachments = attachments
+
+
+@contextmanager
+def _open_pdf(
+    doc,
+    stylesheets: Optional[list] = None,
+    intermediate: str = "memory",
+    stats: Optional["RenderStats"] = None,
+    document=None,
+    check: Optional[Callable[[Any], None]] = None,
+):
+    """
+    WeasyPrint 文档 → PyMuPDF 文档（上下文管理器，退出时关闭并清理）。
+    - intermediate="memory"：PDF 字节留在内存，直接 fitz.open(stream=...)，不落盘。
+    - intermediate="tempfile"：旧流程，写临时 .pdf 再重新打开，用完删除。
+    - 两种方式都按 INTERMEDIATE_PDF_OPTIONS 序列化（不压缩、不嵌入附件），像素与完整 PDF 相同。
+    - document：已排版的 weasyprint Document（如 paginate 的结果），给出时跳过排版，doc 可为 None。
+    - check：排版完成后、PDF 序列化之前以 document 调用（资源上限检查），抛出的异常原样传出。
+    """
+    import fitz  # PyMuPDF
+
+    if intermediate not in ("memory", "tempfile"):
+        raise ValueError(f'不支持的 intermediate: {intermediate!r}，请用 "memory" 或 "tempfile"')
+    # 排版与 PDF 序列化分开调用，便于分别计时（与 doc.write_pdf(stylesheets=...) 等价）
+    if document is None:
+        with _stage(stats, "layout"):
+            document = doc.render(stylesheets=stylesheets, font_config=_font_config())
+    if check is not None:
+        check(document)
+
+    if intermediate == "memory":
+        with _stage(stats, "pdf"):
+            pdf_bytes = _write_intermediate_pdf(document)
+        pdf_doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+        try:
+            yield pdf_doc
+        finally:
+            pdf_doc.close()
+    elif intermediate == "tempfile":
+        import tempfile
+
+        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as f:
+            pdf_path = f.name
+        try:
+            with _stage(stats, "pdf"):
+                _write_intermediate_pdf(document, pdf_path)
+            pdf_doc = fitz.open(pdf_path)
+            try:
+                yield pdf_doc
+            finally:
+                pdf_doc.close()
+        finally:
+            Path(pdf_path).unlink(missing_ok=True)
+
+
+class RenderedPage(NamedTuple):
+    """
+    iter_pages 产出的单页结果，可直接解包为 (index, data, info)。
+
+    - index: 页序号（从 0 开始）
+    - data: 编码后的图片字节；format="pil" 时为 PIL.Image；被 reuse 回调跳过编码的页为 None
+    - info: 元数据 {"width", "height", "format", "dpi", "page_count", "elapsed"}，
+      elapsed 为从开始渲染到这一页就绪的秒数；传了 reuse 时另有 "digest"（像素的 SHA-256）
+    """
+
+    index: int
+    data: Any
+    info: dict
+
+
+# 96 DPI 使输出像素与 page_size 一致（WeasyPrint px = 1/96 inch）
+PAGED_DPI = 96
+# 长图模式的栅格化 DPI
+LONG_IMAGE_DPI = 150
+
+
+
+class _SharedPool:
+    """
+    常驻进程池，多线程共用（aio、守护进程、批量渲染的调用方都可能并发提交）。
+
+    池按请求过的最大进程数建立；请求更多进程时才在锁内换成更大的池，更小的请求直接复用，
+    由调用方按自己的进程数切分任务。提交也在锁内进行，换下的旧池不再接新任务，已提交的任务照常完成。
+    进程退出时自动关闭（atexit 只登记一次）。
+    """
+
+    def __init__(self, initializer: Optional[Callable[[], None]] = None):
+        self.initializer = initializer
+        self.workers = 0
+        self._executor = None
+        self._lock = threading.Lock()
+        self._atexit = False
+
+    def submit(self, workers: int, fn: Callable, *args) -> Tuple[Any, Any]:
+        """按至少 workers 个进程的池提交 fn(*args)，返回 (future, 所在的池)；池损坏时把后者交给 discard。"""
+        from concurrent.futures import ProcessPoolExecutor
+
+        with self._lock:
+            if self._executor is None or self.workers < workers:
+                old = self._executor
+                self.workers = max(workers, self.workers)
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=self.initializer)
+                if old is not None:
+                    old.shutdown(wait=False)
+                if not self._atexit:
+                    import atexit
+
+                    atexit.register(self.shutdown)
+                    self._atexit = True
+            executor = self._executor
+            return executor.submit(fn, *args), executor
+
+    def discard(self, executor) -> None:
+        """丢弃已损坏（BrokenProcessPool）的池，下次提交时按原大小新建；池已被换掉时什么也不做。"""
+        with self._lock:
+            if self._executor is not executor:
+                return
+            self._executor = None
+        executor.shutdown(wait=False)
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self.workers = 0
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+
+# 栅格化用的常驻进程池（PyMuPDF 渲染时持有 GIL，线程无法并行，只能用进程）
+_RASTER_POOL = _SharedPool()
+
+
+def _output_format(path: Path) -> str:
+    """输出路径扩展名 → 编码格式：.jpg/.jpeg 为 "jpeg"，无扩展名为 "png"，其余（如 .webp）原样使用。"""
+    ext = path.suffix.lower().lstrip(".")
+    if ext in ("jpg", "jpeg"):
+        return "jpeg"
+    return ext or "png"
+
+
+def _trim_pixmap(pix):
+    """裁掉四周白边：只分配内容区域大小的 pixmap，从原 pixmap 拷贝过去。整页空白时原样返回。"""
+    box = _content_bbox(pix)
+    if not box:
+        return pix
+    import fitz  # PyMuPDF
+
+    rect = fitz.IRect(*box)
+    cropped = fitz.Pixmap(pix.colorspace, rect, False)
+    cropped.copy(pix, rect)
+    return cropped
+
+
+class EncodeOptions(NamedTuple):
+    """
+    图片编码参数（convert / iter_pages 等的 encode=...，也可传同名键的 dict）。未给出的字段用各格式的默认值。
+
+    - quality: 有损质量 1–100。JPEG 默认 95；WebP 给出时为有损编码，不给为无损
+    - colors: PNG / 无损 WebP 先量化成至多 colors 色的调色板（2–256）。文字卡片颜色少，通常能小到全彩的 1/3
+    - effort: 压缩力度，越大越慢越小。PNG 为 zlib 级别 0–9（默认用 PyMuPDF 的编码器），WebP 为 method 0–6（默认 4）
+    """
+
+    quality: Optional[int] = None
+    colors: Optional[int] = None
+    effort: Optional[int] = None
+
+
+# 各格式可用的 EncodeOptions 字段及 effort 上限
+_ENCODE_FIELDS = {"png": ("colors", "effort"), "jpeg": ("quality",), "webp": ("quality", "colors", "effort")}
+_EFFORT_MAX = {"png": 9, "webp": 6}
+
+
+def _encode_options(encode: Union["EncodeOptions", dict, None], fmt: str) -> Optional[EncodeOptions]:
+    """规范化并校验 encode 参数；全为默认值时返回 None（走最快的默认编码）。"""
+    if encode is None:
+        return None
+    options = EncodeOptions(**encode) if isinstance(encode, dict) else EncodeOptions(*encode)
+    if options == EncodeOptions():
+        return None
+    if fmt == "pil":
+        return None
+    allowed = _ENCODE_FIELDS.get(fmt)
+    if allowed is None:
+        raise ValueError(f"格式 {fmt!r} 不支持编码参数，可用格式: {', '.join(_ENCODE_FIELDS)}")
+    for field in options._fields:
+        if getattr(options, field) is not None and field not in allowed:
+            raise ValueError(f"{fmt} 不支持 {field}")
+    if options.quality is not None and not 1 <= options.quality <= 100:
+        raise ValueError(f"quality 须在 1–100 之间: {options.quality}")
+    if options.colors is not None and not 2 <= options.colors <= 256:
+        raise ValueError(f"colors 须在 2–256 之间: {options.colors}")
+    if options.colors is not None and options.quality is not None:
+        raise ValueError("colors 只用于无损编码，不能与 quality 同时给出")
+    if options.effort is not None and not 0 <= options.effort <= _EFFORT_MAX[fmt]:
+        raise ValueError(f"{fmt} 的 effort 须在 0–{_EFFORT_MAX[fmt]} 之间: {options.effort}")
+    return options
+
+
+def _encode_image(img, fmt: str, options: Optional[EncodeOptions]) -> bytes:
+    """PIL.Image → "png" / "webp" 字节（WebP、调色板 PNG、指定 zlib 级别的 PNG 走 Pillow）。"""
+    import io
+
+    from PIL import Image
+
+    options = options or EncodeOptions()
+    if options.colors:
+        # 快速八叉树量化、不抖动：文字边缘保持干净，比中位切分快 5 倍且更小
+        img = img.quantize(options.colors, method=Image.Quantize.FASTOCTREE, dither=Image.Dither.NONE)
+    buf = io.BytesIO()
+    if fmt == "webp":
+        method = 4 if options.effort is None else options.effort
+        if options.quality is None:
+            img.save(buf, "WEBP", lossless=True, method=method)
+        else:
+            img.save(buf, "WEBP", quality=options.quality, method=method)
+    else:
+        img.save(buf, "PNG", compress_level=6 if options.effort is None else options.effort)
+    return buf.getvalue()
+
+
+def _encode_pixmap(pix, fmt: str = "png", trim: bool = False, options: Optional[EncodeOptions] = None):
+    """
+    pixmap → 编码后的字节（format="pil" 时为 PIL.Image）。
+    trim=True 时先在采样数据上裁掉四周白边再编码——全程只编码一次，不回读文件。
+    options 为 _encode_options() 规范化后的编码参数；默认 PNG / JPEG 用 PyMuPDF 编码，其余经 Pillow（零拷贝共享采样数据）。
+    """
+    if trim:
+        pix = _trim_pixmap(pix)
+    if fmt == "pil":
+        from PIL import Image
+
+        return Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+    if fmt == "jpeg":
+        return pix.tobytes("jpeg", jpg_quality=options.quality if options and options.quality else 95)
+    if fmt == "png" and options is None:
+        return pix.tobytes("png")
+    if fmt in ("png", "webp"):
+        from PIL import Image
+
+        img = Image.frombuffer("RGB", (pix.width, pix.height), pix.samples_mv, "raw", "RGB", pix.stride, 1)
+        return _encode_image(img, fmt, options)
+    return pix.tobytes(fmt)
+
+
+def _save_pixmap(pix, path: Path, trim: bool = False) -> None:
+    """按扩展名编码并写出 pixmap：.jpg/.jpeg 为 JPEG(95)，其余为 PNG。"""
+    path.write_bytes(_encode_pixmap(pix, _output_format(path), trim=trim))
+
+
+def _open_source(source):
+    """PDF 字节 / 路径 → fitz 文档（worker 进程中使用）。"""
+    import fitz  # PyMuPDF
+
+    if isinstance(source, (bytes, bytearray)):
+        return fitz.open(stream=source, filetype="pdf")
+    return fitz.open(source)
+
+
+def _encode_range(
+    source, start: int, stop: int, fmt: str, trim: bool = False, options: Optional[EncodeOptions] = None
+) -> List[Tuple[int, int, bytes]]:
+    """worker 进程：自行打开 PDF，栅格化并编码 [start, stop) 页，返回 [(宽, 高, 字节)]。"""
+    pdf_doc = _open_source(source)
+    try:
+        out = []
+        for i in range(start, stop):
+            pix = pdf_doc[i].get_pixmap(dpi=PAGED_DPI, alpha=False)
+            if trim:
+                pix = _trim_pixmap(pix)
+            out.append((pix.width, pix.height, _encode_pixmap(pix, fmt, options=options)))
+            del pix
+        return out
+    finally:
+        pdf_doc.close()
+
+
+def _shutdown_raster_pool() -> None:
+    _RASTER_POOL.shutdown()
+
+
+def _encode_parallel(
+    source,
+    n_pages: int,
+    workers: int,
+    fmt: str,
+    trim: bool = False,
+    stats: Optional["RenderStats"] = None,
+    options: Optional[EncodeOptions] = None,
+):
+    """
+    把页切成连续的若干段，分给 worker 进程各自打开 PDF、栅格化并编码。
+    每个 worker 只打开一次文档；按页序逐页产出 (页号, 宽, 高, 字节)，前一段完成即可开始产出。
+    进程池按 workers 建立（页数少的文档不会让池缩小、重建），只切出 min(workers, n_pages) 段。
+    """
+    parts = min(workers, n_pages)
+    bounds = [n_pages * k // parts for k in range(parts + 1)]
+    futures = [
+        (bounds[k], _RASTER_POOL.submit(workers, _encode_range, source, bounds[k], bounds[k + 1], fmt, trim, options)[0])
+        for k in range(parts)
+        if bounds[k] < bounds[k + 1]
+    ]
+    try:
+        for start, fut in futures:
+            with _stage(stats, "raster"):
+                chunk = fut.result()
+            for offset, (width, height, data) in enumerate(chunk):
+                yield start + offset, width, height, data
+    finally:
+        for _, fut in futures:
+            fut.cancel()
+
+
+# ---------------------------------------------------------------------------
+# 长图：连续排版 + 分块栅格化
+# ---------------------------------------------------------------------------
+
+# 长图把整篇排在一张足够高的连续页上；内容更长时 WeasyPrint 自动续页，各页按序拼接
+LONG_PAGE_WIDTH = 800
+LONG_PAGE_HEIGHT = 200000
+# 每次栅格化的条带行数：长图的像素峰值只与 宽 × TILE_HEIGHT 有关，与文档总高度无关
+TILE_HEIGHT = 512
+# JPEG 单张图片高度上限（格式限制 65535），长图超出时自动切分
+JPEG_MAX_HEIGHT = 65500
+# WebP 单张图片边长上限
+WEBP_MAX_HEIGHT = 16383
+# 铺满页高 90% 以上的绘制视为整页背景（主题 body 背景会传播到整张画布），不参与内容包围盒
+_BACKGROUND_RATIO = 0.9
+
+
+@lru_cache(maxsize=1)
+def _long_page_stylesheet():
+    """长图的连续页尺寸样式表，只改 size，页边距沿用主题。"""
+    return _compile_css(f"@page {{ size: {LONG_PAGE_WIDTH}px {LONG_PAGE_HEIGHT}px; }}")
+
+
+class _LongLayout(NamedTuple):
+    """
+    长图在输出像素坐标下的布局。
+
+    - x0, x1: 输出的列范围（各页统一）
+    - segments: [(页号, 起始行, 结束行)]，页内像素行，按输出顺序拼接
+    - busy: 不可切分的行区间 [(起, 止)]（文字行、图片、代码块背景等），已按输出行坐标合并
+    """
+
+    x0: int
+    x1: int
+    segments: List[Tuple[int, int, int]]
+    busy: List[Tuple[int, int]]
+
+    @property
+    def width(self) -> int:
+        return self.x1 - self.x0
+
+    @property
+    def height(self) -> int:
+        return sum(stop - start for _, start, stop in self.segments)
+
+
+def _long_layout(pdf_doc, dpi: int) -> Optional[_LongLayout]:
+    """
+    从 PDF 绘制日志（矢量坐标，不栅格化）求每页内容范围：
+    无整页背景时裁到内容包围盒外扩 CROP_MARGIN 像素；有背景时保留整页宽度，底部留与顶部相同的边距。
+    整篇空白时返回 None。
+    """
+    import math
+
+    scale = dpi / 72
+    pages = []
+    for i, page in enumerate(pdf_doc):
+        width, height = page.rect.width, page.rect.height
+        boxes, background = [], False
+        for kind, (bx0, by0, bx1, by1) in page.get_bboxlog():
+            if kind.startswith("ignore") or bx1 <= bx0 or by1 <= by0:
+                continue
+            if by1 - by0 >= height * _BACKGROUND_RATIO:
+                background = True
+                continue
+            boxes.append((max(0.0, bx0), max(0.0, by0), min(width, bx1), min(height, by1)))
+        if not boxes:
+            continue
+        page_w, page_h = math.ceil(width * scale), math.ceil(height * scale)
+        x0 = math.floor(min(b[0] for b in boxes) * scale)
+        y0 = math.floor(min(b[1] for b in boxes) * scale)
+        x1 = math.ceil(max(b[2] for b in boxes) * scale)
+        y1 = math.ceil(max(b[3] for b in boxes) * scale)
+        if background:
+            x0, y0, x1, y1 = 0, 0, page_w, min(page_h, y1 + y0)
+        else:
+            x0, y0, x1, y1 = _expand_box((x0, y0, x1, y1), page_w, page_h)
+        rows = [(math.floor(b[1] * scale), math.ceil(b[3] * scale)) for b in boxes]
+        pages.append((i, x0, y0, x1, y1, rows))
+    if not pages:
+        return None
+
+    segments, busy, offset = [], [], 0
+    for i, _, y0, _, y1, rows in pages:
+        segments.append((i, y0, y1))
+        busy.extend((max(a, y0) - y0 + offset, min(b, y1) - y0 + offset) for a, b in rows if b > y0 and a < y1)
+        offset += y1 - y0
+    merged: List[Tuple[int, int]] = []
+    for a, b in sorted(busy):
+        if merged and a <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], b))
+        else:
+            merged.append((a, b))
+    return _LongLayout(min(p[1] for p in pages), max(p[3] for p in pages), segments, merged)
+
+
+def _split_rows(total: int, max_height: Optional[int], busy: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """
+    把 total 行切成高度不超过 max_height 的若干段 [(起, 止)]。
+    切点优先选在 busy 区间之外（两行文字之间的空隙），且不早于本段的一半；找不到时在上限处硬切。
+    """
+    if not max_height or total <= max_height:
+        return [(0, total)]
+    from bisect import bisect_left
+
+    starts = [a for a, _ in busy]
+    parts, start = [], 0
+    while total - start > max_height:
+        limit = start + max_height
+        cut = limit
+        # busy 已排序合并：二分找起点在上限之前的最后一个区间，
+        # 上限落在该区间内时，退到区间起点（即上一个空隙的末尾）
+        i = bisect_left(starts, limit) - 1
+        if i >= 0 and busy[i][1] > limit:
+            cut = busy[i][0]
+        if cut <= start + max_height // 2:
+            cut = limit
+        parts.append((start, cut))
+        start = cut
+    parts.append((start, total))
+    return parts
+
+
+class _PngRowWriter:
+    """
+    逐行写 PNG（8 位 RGB，无隔行）：先写 IHDR，像素行经 zlib 流式压缩后分块写成 IDAT。
+    内存里只有 zlib 窗口和当前写入的一块条带，与图片总高度无关。
+    """
+
+    def __init__(self, fp, width: int, height: int, level: int = 6):
+        import struct
+        import zlib
+
+        self._fp = fp
+        self._row_bytes = width * 3
+        self._z = zlib.compressobj(level)
+        fp.write(b"\x89PNG\r\n\x1a\n")
+        self._chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+
+    def _chunk(self, tag: bytes, data: bytes) -> None:
+        import struct
+        import zlib
+
+        self._fp.write(struct.pack(">I", len(data)) + tag + data)
+        self._fp.write(struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF))
+
+    def write_tile(self, pix, x0: int, row: int, rows: int) -> None:
+        """写入条带 pix 中从像素坐标 (x0, row) 起的 rows 行。"""
+        samples, stride = pix.samples_mv, pix.stride
+        offset = (row - pix.y) * stride + (x0 - pix.x) * pix.n
+        buf = bytearray()
+        n = self._row_bytes
+        for r in range(rows):
+            start = offset + r * stride
+            buf += b"\x00"  # 行过滤类型 None
+            buf += samples[start : start + n]
+        data = self._z.compress(bytes(buf))
+        if data:
+            self._chunk(b"IDAT", data)
+
+    def close(self) -> None:
+        self._chunk(b"IDAT", self._z.flush())
+        self._chunk(b"IEND", b"")
+
+
+class _PixmapRowWriter:
+    """把条带依次拷进一张整图 pixmap，写完后整体编码（JPEG 等不支持逐行写出的格式，内存随 max_height 增长）。"""
+
+    def __init__(self, width: int, height: int):
+        import fitz  # PyMuPDF
+
+        self.pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, width, height), False)
+        self._filled = 0
+
+    def write_tile(self, pix, x0: int, row: int, rows: int) -> None:
+        import fitz  # PyMuPDF
+
+        # 平移条带坐标，使 (x0, row) 对齐到整图的第 _filled 行
+        pix.set_origin(pix.x - x0, pix.y - row + self._filled)
+        self.pix.copy(pix, fitz.IRect(0, self._filled, self.pix.width, self._filled + rows))
+        self._filled += rows
+
+    def encode(self, fmt: str, options: Optional[EncodeOptions] = None):
+        pix, self.pix = self.pix, None
+        return _encode_pixmap(pix, fmt, options=options)
+
+
+def _render_rows(
+    pdf_doc,
+    layout: _LongLayout,
+    start: int,
+    stop: int,
+    dpi: int,
+    writer,
+    stats: Optional["RenderStats"] = None,
+) -> None:
+    """
+    把输出的第 [start, stop) 行按 TILE_HEIGHT 一条带地栅格化并写入 writer。
+    传入 stats 时栅格化与写入（编码）分别累计，整段结束后各记一次，不逐条带回调。
+    """
+    import time
+
+    import fitz  # PyMuPDF
+
+    clock = stats is not None
+    timings = [0.0, 0.0, 0.0, 0.0]  # raster wall/cpu, encode wall/cpu
+
+    scale = dpi / 72
+    matrix = fitz.Matrix(scale, scale)
+    offset = 0
+    for page_no, seg_start, seg_stop in layout.segments:
+        seg_rows = seg_stop - seg_start
+        lo, hi = max(start, offset), min(stop, offset + seg_rows)
+        if lo < hi:
+            # 页面内容只解释一次成显示列表，每个条带只回放与 clip 相交的绘制
+            dlist = pdf_doc[page_no].get_displaylist()
+            for row in range(lo - offset + seg_start, hi - offset + seg_start, TILE_HEIGHT):
+                rows = min(TILE_HEIGHT, hi - offset + seg_start - row)
+                # clip 四周各多留半像素，再按像素坐标精确取行列，避免条带间因取整出现缝隙或重叠
+                clip = fitz.Rect(layout.x0 - 0.5, row - 0.5, layout.x1 + 0.5, row + rows + 0.5) / scale
+                if clock:
+                    w0, c0 = time.perf_counter(), time.process_time()
+                pix = dlist.get_pixmap(matrix=matrix, clip=clip, alpha=False)
+                if clock:
+                    w1, c1 = time.perf_counter(), time.process_time()
+                writer.write_tile(pix, layout.x0, row, rows)
+                del pix
+                if clock:
+                    w2, c2 = time.perf_counter(), time.process_time()
+                    timings[0] += w1 - w0
+                    timings[1] += c1 - c0
+                    timings[2] += w2 - w1
+                    timings[3] += c2 - c1
+        offset += seg_rows
+    if clock:
+        stats.add("raster", timings[0], timings[1])
+        stats.add("encode", timings[2], timings[3])
+
+
+def _iter_long_image(
+    pdf_doc,
+    fmt: str,
+    max_height: Optional[int],
+    t0: float,
+    dpi: int = LONG_IMAGE_DPI,
+    stats: Optional["RenderStats"] = None,
+    options: Optional[EncodeOptions] = None,
+    limits: Optional["RenderLimits"] = None,
+) -> Iterator[RenderedPage]:
+    """
+    连续页 → 长图（总是裁剪空白）。按 TILE_HEIGHT 分条带栅格化，PNG 逐行流式编码，
+    像素峰值只有一条带；超过 max_height 时在行间空隙处切成多张。
+    调色板 PNG 与 WebP 需要整图（量化 / 编码器不支持逐行写入），内存随 max_height 增长。
+    limits 的张数与像素上限在测出内容高度后、栅格化之前检查。
+    """
+    import io
+    import time
+
+    layout = _long_layout(pdf_doc, dpi)
+    if layout is None:
+        # 整篇空白：输出一张最小的白图
+        layout = _LongLayout(0, 1, [(0, 0, 1)], [])
+    if fmt == "jpeg":
+        max_height = min(max_height or JPEG_MAX_HEIGHT, JPEG_MAX_HEIGHT)
+    elif fmt == "webp":
+        max_height = min(max_height or WEBP_MAX_HEIGHT, WEBP_MAX_HEIGHT)
+    parts = _split_rows(layout.height, max_height, layout.busy)
+    if limits is not None:
+        from .limits import check_output
+
+        check_output(len(parts), layout.width * layout.height, limits)
+    streamed = fmt == "png" and (options is None or options.colors is None)
+    for index, (start, stop) in enumerate(parts):
+        height = stop - start
+        if streamed:
+            buf = io.BytesIO()
+            level = 6 if options is None or options.effort is None else options.effort
+            writer = _PngRowWriter(buf, layout.width, height, level)
+            _render_rows(pdf_doc, layout, start, stop, dpi, writer, stats)
+            writer.close()
+            data = buf.getvalue()
+        else:
+            writer = _PixmapRowWriter(layout.width, height)
+            _render_rows(pdf_doc, layout, start, stop, dpi, writer, stats)
+            with _stage(stats, "encode"):
+                data = writer.encode(fmt, options)
+        info = {"width": layout.width, "height": height, "format": fmt, "dpi": dpi, "page_count": len(parts)}
+        if stats is not None:
+            stats.add_page(layout.width, height)
+        yield RenderedPage(index, data, {**info, "elapsed": time.perf_counter() - t0})
+
+
+def _asset_fetcher(assets: Union[str, Path, "AssetFetcher", None]) -> Optional["AssetFetcher"]:
+    """assets 参数 → AssetFetcher（None 时不导入 assets 模块）。"""
+    if assets is None:
+        return None
+    from .assets import get_assets
+
+    return get_assets(assets)
+
+
+def _html_source(html: str, assets: Optional["AssetFetcher"], page_width: int, stats: Optional["RenderStats"] = None):
+    """weasyprint.HTML；给出 assets 时带上资源根目录（base_url）与带缓存的 url_fetcher。"""
+    import weasyprint
+
+    if assets is None:
+        return weasyprint.HTML(string=html)
+    return weasyprint.HTML(string=html, base_url=assets.base_url, url_fetcher=assets.bind(page_width, stats))
+
+
+def _page_pixels(document) -> List[Tuple[int, int]]:
+    """分页排版结果各页在 PAGED_DPI 下的像素尺寸（trim 前）。"""
+    scale = PAGED_DPI / 96  # weasyprint 的页尺寸为 CSS px（96 dpi）
+    return [(round(page.width * scale), round(page.height * scale)) for page in document.pages]
+
+
+def _check_layout(document, limits: "RenderLimits") -> None:
+    """分页排版结果的张数与总像素（PAGED_DPI 下、trim 前）是否超限；在 PDF 序列化之前调用。"""
+    from .limits import check_output
+
+    sizes = _page_pixels(document)
+    check_output(len(sizes), sum(w * h for w, h in sizes), limits)
+
+
+# ---------------------------------------------------------------------------
+# 分块排版：超长文档在强制分页点切开，每块单独排版
+# ---------------------------------------------------------------------------
+
+
+class _Chunking(NamedTuple):
+    """分块参数：level 为在 h1–h{level} 前分块；sheet_args 为 _stylesheets_for 的参数，worker 进程据此重建样式表。"""
+
+    level: int
+    sheet_args: tuple
+
+
+def _chunking(
+    chunked: Union[bool, int, None], style: str, page_size: Optional[Tuple[int, int]], extra_css: Optional[str]
+) -> Optional[_Chunking]:
+    """chunked 参数 → _Chunking；False / None 为不分块。"""
+    if chunked is None or chunked is False:
+        return None
+    level = 1 if chunked is True else chunked
+    if not isinstance(level, int) or not 1 <= level <= 6:
+        raise ValueError(f"无效的 chunked: {chunked!r}，请用 True 或标题级别 1–6")
+    if not page_size:
+        raise ValueError("chunked 需要固定页尺寸 page_size（长图不分页）")
+    return _Chunking(level, (get_theme_css(style), tuple(page_size), extra_css))
+
+
+def _chunk_breaks(body: str, level: int) -> List[Tuple[int, int]]:
+    """
+    HTML 片段中的强制分页点 [(起, 止)]：深度 0 的 h1–h{level} 之前（标题保留，起 = 止），
+    深度 0 的 <hr> 与 <!-- pagebreak -->（本身切掉）。
+    """
+    from html.parser import HTMLParser
+
+    line_starts = [0] + [m.end() for m in re.finditer("\n", body)]
+    headings = {f"h{i}" for i in range(1, level + 1)}
+    breaks: List[Tuple[int, int]] = []
+
+    class _Scanner(HTMLParser):
+        depth = 0
+
+        def _offset(self) -> int:
+            line, col = self.getpos()
+            return line_starts[line - 1] + col
+
+        def handle_starttag(self, tag, attrs):
+            if self.depth == 0 and tag in headings:
+                start = self._offset()
+                breaks.append((start, start))
+            elif self.depth == 0 and tag == "hr":
+                start = self._offset()
+                breaks.append((start, body.index(">", start) + 1))
+            if tag not in _VOID_TAGS:
+                self.depth += 1
+
+        def handle_endtag(self, tag):
+            if tag not in _VOID_TAGS:
+                self.depth = max(0, self.depth - 1)
+
+        def handle_comment(self, data):
+            if self.depth == 0 and data.strip().lower() == "pagebreak":
+                start = self._offset()
+                breaks.append((start, body.index("-->", start) + 3))
+
+    scanner = _Scanner(convert_charrefs=False)
+    scanner.feed(body)
+    scanner.close()
+    return breaks
+
 
-    path = Path(image_path)
-    img = Image.open(path).convert("RGB")
-    w, h = img.size
-    gray = img.convert("L")
-    # 非白色(255)置为 255，白色置为 0，getbbox() 即非空白区域
-    thresh = 254
-    mask = gray.point(lambda p: 255 if p < thresh else 0, mode="L")
-    box = mask.getbbox()
-    if not box:
+def _split_chunks(html: str, level: int) -> List[str]:
+    """
+    完整 HTML 文档 → 各块的完整 HTML 文档（<head> 相同）；没有分页点时为 [html]。
+    Markdown 仍整篇转换后再切，标题 id、[TOC] 目录与脚注编号与不分块时一致。
+    """
+    head, sep, rest = html.partition("<body>")
+    body, sep_end, tail = rest.rpartition("</body>")
+    if not sep or not sep_end:
+        return [html]
+    parts, pos = [], 0
+    for start, end in _chunk_breaks(body, level):
+        parts.append(body[pos:start])
+        pos = end
+    parts.append(body[pos:])
+    chunks = [f"{head}<body>{part}</body>{tail}" for part in parts if part.strip()]
+    return chunks or [html]
+
+
+def _layout_chunk(
+    html: str, sheet_args: tuple, stats: Optional["RenderStats"] = None, assets: Optional["AssetFetcher"] = None
+) -> Tuple[bytes, List[Tuple[int, int]]]:
+    """排版一块并序列化为中间 PDF：返回 (PDF 字节, 各页像素尺寸)。排版树随即释放，只留 PDF 字节。"""
+    with _stage(stats, "layout"):
+        document = _html_source(html, assets, sheet_args[1][0], stats).render(
+            stylesheets=list(_stylesheets_for(*sheet_args, _font_config())), font_config=_font_config()
+        )
+    sizes = _page_pixels(document)
+    with _stage(stats, "pdf"):
+        pdf = _write_intermediate_pdf(document)
+    return pdf, sizes
+
+
+def _layout_chunk_job(
+    html: str, sheet_args: tuple, want_stats: bool, assets: Optional["AssetFetcher"] = None
+) -> Tuple[bytes, List[Tuple[int, int]], Optional[dict]]:
+    """worker 进程：同 _layout_chunk，另返回统计。"""
+    stats = None
+    if want_stats:
+        from .stats import RenderStats
+
+        stats = RenderStats()
+    pdf, sizes = _layout_chunk(html, sheet_args, stats, assets)
+    return pdf, sizes, stats.to_dict() if stats is not None else None
+
+
+def _iter_chunked_pages(
+    chunks: List[str],
+    chunking: _Chunking,
+    fmt: str,
+    *,
+    raster_workers: int,
+    trim: bool,
+    started: float,
+    stats: Optional["RenderStats"],
+    reuse: Optional[Callable[[int, str], bool]],
+    options: Optional[EncodeOptions],
+    limits: Optional["RenderLimits"],
+    assets: Optional["AssetFetcher"] = None,
+) -> Iterator[RenderedPage]:
+    """
+    各块依次（raster_workers > 1 时在栅格化进程池中并行）排版成中间 PDF，全部完成后按块序逐页栅格化，页号连续。
+    limits 的张数与像素按累计值检查，超限时不再等后面的块。
+    """
+    import fitz  # PyMuPDF
+
+    from .limits import check_output
+
+    pdfs: List[Optional[bytes]] = []
+    total_pages = total_pixels = 0
+
+    def add(pdf: bytes, sizes: List[Tuple[int, int]]) -> None:
+        nonlocal total_pages, total_pixels
+        pdfs.append(pdf)
+        total_pages += len(sizes)
+        total_pixels += sum(w * h for w, h in sizes)
+        if limits is not None:
+            check_output(total_pages, total_pixels, limits)
+
+    if raster_workers > 1:
+        futures = [
+            _RASTER_POOL.submit(raster_workers, _layout_chunk_job, html, chunking.sheet_args, stats is not None, assets)[0]
+            for html in chunks
+        ]
+        try:
+            for fut in futures:
+                pdf, sizes, data = fut.result()
+                if stats is not None and data:
+                    stats.update(data)
+                add(pdf, sizes)
+        finally:
+            for fut in futures:
+                fut.cancel()
+    else:
+        for html in chunks:
+            add(*_layout_chunk(html, chunking.sheet_args, stats, assets))
+
+    first = 0
+    for i, pdf in enumerate(pdfs):
+        pdfs[i] = None  # 栅格化完一块就释放它的 PDF 字节
+        pdf_doc = fitz.open(stream=pdf, filetype="pdf")
+        try:
+            yield from _iter_pdf_pages(
+                pdf_doc,
+                fmt,
+                raster_workers=raster_workers,
+                trim=trim,
+                started=started,
+                stats=stats,
+                reuse=reuse,
+                options=options,
+                first=first,
+                page_count=total_pages,
+            )
+            first += len(pdf_doc)
+        finally:
+            pdf_doc.close()
+
+
+def _iter_pdf_pages(
+    pdf_doc,
+    fmt: str,
+    *,
+    raster_workers: int = 1,
+    trim: bool = False,
+    started: float,
+    stats: Optional["RenderStats"] = None,
+    reuse: Optional[Callable[[int, str], bool]] = None,
+    options: Optional[EncodeOptions] = None,
+    first: int = 0,
+    page_count: Optional[int] = None,
+) -> Iterator[RenderedPage]:
+    """
+    已打开的分页 PDF → 逐页栅格化、编码并产出 RenderedPage。
+    first 为第一页的页号（分块时为之前各块的页数之和），page_count 为整篇总页数，默认为本 PDF 的页数。
+    """
+    import time
+
+    n_pages = len(pdf_doc)
+    base = {"format": fmt, "dpi": PAGED_DPI, "page_count": n_pages if page_count is None else page_count}
+    if raster_workers > 1 and n_pages > 1 and fmt != "pil" and reuse is None:
+        # 内存模式直接把 PDF 字节发给 worker，临时文件模式发路径
+        source = pdf_doc.stream if pdf_doc.stream is not None else pdf_doc.name
+        for i, width, height, data in _encode_parallel(source, n_pages, raster_workers, fmt, trim, stats, options):
+            if stats is not None:
+                stats.add_page(width, height)
+            info = {"width": width, "height": height, **base, "elapsed": time.perf_counter() - started}
+            yield RenderedPage(first + i, data, info)
         return
-    margin = 4
-    box = (
-        max(0, box[0] - margin),
-        max(0, box[1] - margin),
-        min(w, box[2] + margin),
-        min(h, box[3] + margin),
-    )
-    img.crop(box).save(
-        str(path),
-        **({"quality": 95} if path.suffix.lower() in (".jpg", ".jpeg") else {}),
-    )
+    for i in range(n_pages):
+        with _stage(stats, "raster"):
+            pix = pdf_doc[i].get_pixmap(dpi=PAGED_DPI, alpha=False)
+        info = {"width": pix.width, "height": pix.height, **base}
+        with _stage(stats, "encode"):
+            if trim:
+                pix = _trim_pixmap(pix)
+                info.update(width=pix.width, height=pix.height)
+            if reuse is not None:
+                # 像素摘要相同的页跳过编码（SHA-256 比 PNG 编码快一个数量级）
+                info["digest"] = hashlib.sha256(pix.samples_mv).hexdigest()
+            data = None if reuse is not None and reuse(first + i, info["digest"]) else _encode_pixmap(pix, fmt, options=options)
+        if stats is not None:
+            stats.add_page(pix.width, pix.height)
+        del pix
+        yield RenderedPage(first + i, data, {**info, "elapsed": time.perf_counter() - started})
+
+
+def _iter_html_pages(
+    html: Optional[str],
+    page_size: Optional[Tuple[int, int]] = None,
+    *,
+    fmt: str = "png",
+    stylesheets: Optional[list] = None,
+    intermediate: str = "memory",
+    raster_workers: int = 1,
+    trim: bool = False,
+    max_height: Optional[int] = None,
+    started: Optional[float] = None,
+    stats: Optional["RenderStats"] = None,
+    reuse: Optional[Callable[[int, str], bool]] = None,
+    document=None,
+    encode: Union[EncodeOptions, dict, None] = None,
+    limits: Optional["RenderLimits"] = None,
+    chunked: Optional[_Chunking] = None,
+    assets: Optional["AssetFetcher"] = None,
+) -> Iterator[RenderedPage]:
+    """
+    HTML → 逐页产出 RenderedPage（WeasyPrint 排版 + PyMuPDF 栅格化）。
+    串行时每页栅格化、编码后立即产出并释放像素，同一时刻最多只持有一页像素；
+    长图按条带栅格化，超过 max_height 时切成多张。
+    started 为计时起点（time.perf_counter()），默认为首次迭代时刻；stats 非 None 时记录各阶段耗时与页数。
+    reuse(index, digest) 见 iter_pages；document 为已排版的 weasyprint Document（见 paginate），给出时不再排版，html 可为 None。
+    encode 为编码参数（见 EncodeOptions）；limits 的张数与像素上限在栅格化之前检查（见 RenderLimits）。
+    chunked 给出且有分页点时按块排版（见 _iter_chunked_pages），中间 PDF 总在内存中。
+    assets 给出时图片等资源经它解析与缓存（见 AssetFetcher）。
+    """
+    import time
+
+    options = _encode_options(encode, fmt)
+    t0 = time.perf_counter() if started is None else started
+    if chunked is not None and page_size and document is None:
+        chunks = _split_chunks(html, chunked.level)
+        if len(chunks) > 1:
+            yield from _iter_chunked_pages(
+                chunks,
+                chunked,
+                fmt,
+                raster_workers=raster_workers,
+                trim=trim,
+                started=t0,
+                stats=stats,
+                reuse=reuse,
+                options=options,
+                limits=limits,
+                assets=assets,
+            )
+            return
+    doc = _html_source(html, assets, page_size[0] if page_size else LONG_PAGE_WIDTH, stats) if document is None else None
+
+    if not page_size:
+        # 长图：排在一张连续的高页上，分条带栅格化；连续页样式表放最后，覆盖主题的 800px
+        stylesheets = [*(stylesheets or []), _long_page_stylesheet()]
+        with _open_pdf(doc, stylesheets, intermediate, stats, document) as pdf_doc:
+            yield from _iter_long_image(pdf_doc, fmt, max_height, t0, stats=stats, options=options, limits=limits)
+        return
+
+    # 固定页尺寸，多页 PDF；@page 尺寸样式表必须在最后，覆盖默认 800px
+    if stylesheets is None:
+        stylesheets = [_page_stylesheet(*page_size)]
+    check = None if limits is None else lambda document: _check_layout(document, limits)
+    with _open_pdf(doc, stylesheets, intermediate, stats, document, check) as pdf_doc:
+        yield from _iter_pdf_pages(
+            pdf_doc,
+            fmt,
+            raster_workers=raster_workers,
+            trim=trim,
+            started=t0,
+            stats=stats,
+            reuse=reuse,
+            options=options,
+        )
 
 
 def _html_to_image_weasyprint(
-    html: str,
+    html: Optional[str],
     output_path: Union[str, Path],
     page_size: Optional[Tuple[int, int]] = None,
-) -> List[Path]:
+    intermediate: str = "memory",
+    stylesheets: Optional[list] = None,
+    raster_workers: int = 1,
+    trim: bool = False,
+    max_height: Optional[int] = None,
+    stats: Optional["RenderStats"] = None,
+    document=None,
+    sink: Optional["OutputSink"] = None,
+    encode: Union[EncodeOptions, dict, None] = None,
+    limits: Optional["RenderLimits"] = None,
+    chunked: Optional[_Chunking] = None,
+    assets: Optional["AssetFetcher"] = None,
+) -> List[Any]:
     """
     使用 WeasyPrint 将 HTML 转为图片。
     - page_size 为 (宽, 高) 时：按该尺寸分页，长图输出多张（如 article_1.png, article_2.png），返回路径列表。
-    - page_size 为 None 时：单张长图并裁剪空白，返回单元素列表。
+    - page_size 为 None 时：单张长图并裁剪空白，返回单元素列表；
+      超过 max_height 像素时在行间空隙处切成多张（article_1.png, article_2.png ...）。
+    - trim：分页模式下也裁掉每页四周白边（长图模式总是裁剪）。
+    - intermediate：中间 PDF 的存放方式，"memory"（默认，不落盘）或 "tempfile"。
+    - stylesheets：预解析的样式表（见 get_stylesheets）；不传时分页模式只补一个 @page 尺寸样式表。
+    - raster_workers：分页模式下并行栅格化 + 编码的进程数，1 为串行。
+    - stats：可选 RenderStats，记录各阶段耗时、页数与写出字节数。
+    - document：已排版的 weasyprint Document（见 paginate），给出时跳过排版。
+    - sink：输出目标（见 sinks），默认 FileSink(output_path 所在目录)；返回各页 sink.write 的结果。
+    - encode：编码参数（见 EncodeOptions），格式由 output_path 扩展名决定。
+    - limits：张数与像素上限（见 RenderLimits），在栅格化之前检查。
+    - chunked：分块排版参数（见 _chunking），仅分页模式生效。
+    - assets：图片等资源的解析与缓存（见 AssetFetcher）。
     """
-    import tempfile
-    import weasyprint
-
-    doc = weasyprint.HTML(string=html)
     output_path = Path(output_path)
-    ext = output_path.suffix.lower()
-    base_dir = output_path.parent
-    stem, suffix = output_path.stem, output_path.suffix
+    if sink is None:
+        from .sinks import FileSink
 
-    if page_size:
-        w, h = page_size
-        # 固定页尺寸，多页 PDF（注入 HTML 确保覆盖默认 @page）
-        from weasyprint import CSS
-        page_css = CSS(string=f"@page {{ size: {w}px {h}px; margin: 28px; }}")
-        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as f:
-            pdf_path = f.name
-        try:
-            # 必须用 stylesheets 覆盖文档内默认 @page，且放在最后
-            doc.write_pdf(pdf_path, stylesheets=[page_css])
-            import fitz  # PyMuPDF
-            pdf_doc = fitz.open(pdf_path)
-            # 96 DPI 使输出像素与 page_size 一致（WeasyPrint px = 1/96 inch）
-            dpi = 96
-            out_paths: List[Path] = []
-            for i in range(len(pdf_doc)):
-                page = pdf_doc[i]
-                pix = page.get_pixmap(dpi=dpi, alpha=False)
-                p = base_dir / f"{stem}_{i + 1}{suffix}"
-                if ext == ".jpg" or ext == ".jpeg":
-                    pix.save(str(p), output="jpeg", quality=95)
-                else:
-                    pix.save(str(p))
-                out_paths.append(p)
-            pdf_doc.close()
-            return out_paths
-        finally:
-            Path(pdf_path).unlink(missing_ok=True)
+        sink = FileSink(output_path.parent)
+    results = []
+    for page in _iter_html_pages(
+        html,
+        page_size,
+        fmt=_output_format(output_path),
+        stylesheets=stylesheets,
+        intermediate=intermediate,
+        raster_workers=raster_workers,
+        trim=trim,
+        max_height=max_height,
+        stats=stats,
+        document=document,
+        encode=encode,
+        limits=limits,
+        chunked=chunked,
+        assets=assets,
+    ):
+        paged = page_size or page.info["page_count"] > 1
+        name = (_page_path(output_path, page.index) if paged else output_path).name
+        with _stage(stats, "write"):
+            results.append(sink.write(name, page.data, page.info))
+        if stats is not None:
+            stats.bytes_written += len(page.data)
+    return results
 
-    # 单张长图，裁剪空白
-    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as f:
-        pdf_path = f.name
-    try:
-        doc.write_pdf(pdf_path)
-        import fitz  # PyMuPDF
-        pdf_doc = fitz.open(pdf_path)
-        page = pdf_doc[0]
-        pix = page.get_pixmap(dpi=150, alpha=False)
-        if ext == ".jpg" or ext == ".jpeg":
-            pix.save(str(output_path), output="jpeg", quality=95)
+
+def iter_pages(
+    md_content: str,
+    *,
+    page_size: Optional[Tuple[int, int]] = None,
+    style: str = "default",
+    extra_css: Optional[str] = None,
+    md_extras: Optional[list] = None,
+    format: str = "png",
+    trim: bool = False,
+    intermediate: str = "memory",
+    raster_workers: int = 1,
+    max_height: Optional[int] = None,
+    stats: Optional["RenderStats"] = None,
+    reuse: Optional[Callable[[int, str], bool]] = None,
+    encode: Union[EncodeOptions, dict, None] = None,
+    chunked: Union[bool, int] = False,
+    assets: Union[str, Path, "AssetFetcher", None] = None,
+) -> Iterator[RenderedPage]:
+    """
+    逐页渲染 Markdown：每页栅格化完成就立即产出，不必等整篇渲染完（适合先展示第 1 页）。
+
+    :param md_content: Markdown 原文
+    :param page_size: 固定页尺寸 (宽, 高) px；None 时为单张长图（裁剪空白）
+    :param style: 样式风格，同 convert
+    :param extra_css: 额外 CSS
+    :param md_extras: markdown 扩展列表
+    :param format: "png"（默认）、"jpeg"、"webp" 或 "pil"（产出 PIL.Image，不编码）
+    :param trim: 分页模式下也裁掉每页四周白边
+    :param intermediate: 中间 PDF 存放方式："memory"（默认）或 "tempfile"
+    :param raster_workers: 并行栅格化进程数；>1 时按段并行，产出仍按页序
+    :param max_height: 长图单张最大高度（像素），超出时在行间空隙处切成多张；JPEG 最高 65500
+    :param stats: 可选 RenderStats，记录各阶段耗时与页数（整体 wall 含调用方处理每页的时间）
+    :param reuse: 可选回调 reuse(index, digest)：分页模式下每页栅格化后先算像素摘要，返回 True 时跳过编码，
+        该页 data 为 None（增量重渲染用，见 IncrementalRenderer）；给出时不走 raster_workers 并行
+    :param encode: 编码参数 EncodeOptions(quality, colors, effort) 或同名键的 dict，见 EncodeOptions
+    :param chunked: 超长文档分块排版（见 convert）；各块全部排版完才产出第 1 页
+    :param assets: 图片等资源的根目录或 AssetFetcher（见 convert）
+    :return: RenderedPage(index, data, info) 迭代器；串行时同一时刻最多持有一页像素
+    """
+    import time
+
+    t0 = time.perf_counter()
+    fmt = "jpeg" if format == "jpg" else format
+    chunking = _chunking(chunked, style, page_size, extra_css)
+    fetcher = _asset_fetcher(assets)
+    with _total(stats):
+        with _stage(stats, "markdown"):
+            html = _md_to_html(md_content, extras=md_extras, inline_css=False)
+        with _stage(stats, "css"):
+            stylesheets = get_stylesheets(style, page_size, extra_css)
+        yield from _iter_html_pages(
+            html,
+            tuple(page_size) if page_size else None,
+            fmt=fmt,
+            stylesheets=stylesheets,
+            intermediate=intermediate,
+            raster_workers=raster_workers,
+            trim=trim,
+            max_height=max_height,
+            started=t0,
+            stats=stats,
+            reuse=reuse,
+            encode=encode,
+            chunked=chunking,
+            assets=fetcher,
+        )
+
+
+# ---------------------------------------------------------------------------
+# 只排版：页数与每页对应的源码范围
+# ---------------------------------------------------------------------------
+
+_VOID_TAGS = frozenset("area base br col embed hr img input link meta source track wbr".split())
+_HEADING_TAGS = frozenset(("h1", "h2", "h3", "h4", "h5", "h6"))
+_SETEXT_RE = re.compile(r" {0,3}(?:=+|-+)[ \t]*$")
+_LINE_ID_PREFIX = "md2img-L"
+
+
+def _top_level_tags(html: str) -> List[Tuple[int, str, Optional[str]]]:
+    """HTML 片段中深度为 0 的开始标签：[(偏移, 标签名, id)]。"""
+    from html.parser import HTMLParser
+
+    line_starts = [0] + [m.end() for m in re.finditer("\n", html)]
+    found: List[Tuple[int, str, Optional[str]]] = []
+
+    class _Scanner(HTMLParser):
+        depth = 0
+
+        def handle_starttag(self, tag, attrs):
+            if self.depth == 0:
+                line, col = self.getpos()
+                found.append((line_starts[line - 1] + col, tag, dict(attrs).get("id")))
+            if tag not in _VOID_TAGS:
+                self.depth += 1
+
+        def handle_endtag(self, tag):
+            if tag not in _VOID_TAGS:
+                self.depth = max(0, self.depth - 1)
+
+    scanner = _Scanner(convert_charrefs=False)
+    scanner.feed(html)
+    scanner.close()
+    return found
+
+
+def _source_chunks(text: str) -> Tuple[List[int], List[int]]:
+    """
+    块内以空行分隔的段落起始行（相对块首行，从 0 开始；围栏代码块整体算一段），以及 ATX / setext 标题所在行。
+    """
+    from markdown.extensions.fenced_code import FencedBlockPreprocessor
+
+    fences = [(m.start(), m.end()) for m in FencedBlockPreprocessor.FENCED_BLOCK_RE.finditer(text)]
+    lines = text.split("\n")
+    chunks: List[int] = []
+    headings: List[int] = []
+    pos, fence_index, prev_blank = 0, 0, True
+    for n, line in enumerate(lines):
+        while fence_index < len(fences) and fences[fence_index][1] <= pos:
+            fence_index += 1
+        inside = fence_index < len(fences) and fences[fence_index][0] < pos
+        blank = not line.strip()
+        if not inside and not blank:
+            if prev_blank:
+                chunks.append(n)
+                if n + 1 < len(lines) and _SETEXT_RE.match(lines[n + 1]) and not _ATX_HEADING_RE.match(line):
+                    headings.append(n)
+            if _ATX_HEADING_RE.match(line):
+                headings.append(n)
+        prev_blank = blank and not inside
+        pos += len(line) + 1
+    return chunks, headings
+
+
+def _annotate_block(html: str, source: str, first_line: int, anchors: Dict[str, int], heading_lines: list) -> str:
+    """
+    给块内顶层元素标上源码行号：没有 id 的元素加 id="md2img-L<行号>"，已有 id 的（如标题）记下 id → 行号。
+    段落数与顶层元素数一致时逐个对应；否则只对应标题与块首元素。id 不影响排版与绘制。
+    """
+    tags = _top_level_tags(html)
+    if not tags:
+        return html
+    chunks, headings = _source_chunks(source)
+    lines: List[Optional[int]] = [None] * len(tags)
+    if len(chunks) == len(tags):
+        lines = list(chunks)
+    else:
+        heading_tags = [i for i, (_, tag, _) in enumerate(tags) if tag in _HEADING_TAGS]
+        if len(heading_tags) == len(headings):
+            for i, n in zip(heading_tags, headings):
+                lines[i] = n
+        if lines[0] is None and chunks:
+            lines[0] = chunks[0]
+
+    out, last = [], 0
+    for (offset, tag, tag_id), n in zip(tags, lines):
+        line = None if n is None else first_line + n
+        if tag in _HEADING_TAGS:
+            heading_lines.append(line)
+        if line is None:
+            continue
+        if tag_id:
+            anchors[tag_id] = line
         else:
-            pix.save(str(output_path))
-        pdf_doc.close()
-    finally:
-        Path(pdf_path).unlink(missing_ok=True)
-    _crop_image_to_content(output_path)
-    return [output_path]
+            name = f"{_LINE_ID_PREFIX}{line}"
+            anchors[name] = line
+            cut = offset + 1 + len(tag)
+            out.append(html[last:cut])
+            out.append(f' id="{name}"')
+            last = cut
+    out.append(html[last:])
+    return "".join(out)
+
+
+def _annotated_markdown(md_content: str, extensions: Tuple[str, ...]) -> Tuple[str, Dict[str, int], List[Optional[int]], List[str]]:
+    """
+    Markdown → (带行号 id 的 HTML 片段, {id: 源码行号}, 各顶层标题的行号（按文档顺序）, 源码各行)。
+    HTML 与 _render_markdown 的结果只差这些 id 属性。
+    """
+    text = md_content.replace("\r\n", "\n").replace("\r", "\n")
+    blocks, parts = _render_blocks(md_content, extensions)
+    anchors: Dict[str, int] = {}
+    heading_lines: List[Optional[int]] = []
+    annotated, pos = [], 0
+    for block, part in zip(blocks, parts):
+        block = block.replace("\r\n", "\n").replace("\r", "\n")
+        start = text.find(block, pos)
+        if start < 0:
+            start = pos
+        pos = start + len(block)
+        annotated.append(_annotate_block(part, block, text.count("\n", 0, start) + 1, anchors, heading_lines))
+    return _join_blocks(annotated), anchors, heading_lines, text.rstrip().split("\n")
+
+
+class PageLayout(NamedTuple):
+    """
+    paginate 给出的单页信息。
+
+    - index: 页序号（从 0 开始）
+    - lines: 本页内容对应的源码行范围 (首行, 末行)，从 1 开始、含两端；精确到段落 / 标题 / 代码块等顶层元素
+    - headings: 从本页开始的标题 [(级别, 文本, 源码行号或 None)]
+    - section: 页首所在小节的标题（页面从某个标题开始时就是该标题），文档开头尚无标题时为 None
+    - continued: 页首是上一页延续下来的元素（段落、列表、代码块被分页截断）
+    """
+
+    index: int
+    lines: Tuple[int, int]
+    headings: List[Tuple[int, str, Optional[int]]]
+    section: Optional[str]
+    continued: bool
+
+
+def _page_layouts(document, anchors: Dict[str, int], heading_lines: List[Optional[int]], source_lines: List[str]) -> List[PageLayout]:
+    """由排版结果中各页的锚点（元素 id 的位置）与书签（标题）推出每页的源码范围。"""
+    import bisect
+
+    element_lines = sorted(set(anchors.values()))
+    # page.bookmarks: [(级别, 文本, (x, y), ...)]，位置与同一标题的锚点位置相同
+    bookmarks = [[(b[0], b[1], b[2][1]) for b in getattr(page, "bookmarks", [])] for page in document.pages]
+    # 书签与顶层标题一一对应时才给标题配行号（标题嵌在引用、列表等内部时对不上）
+    lines_iter = iter(heading_lines if sum(map(len, bookmarks)) == len(heading_lines) else [])
+
+    pages: List[PageLayout] = []
+    started = 0  # 已开始的最后一个元素的行号
+    section: Optional[str] = None
+    for index, page in enumerate(document.pages):
+        items = sorted(
+            (pos[1], anchors[name]) for name, pos in getattr(page, "anchors", {}).items() if name in anchors
+        )
+        headings = [(level, label, next(lines_iter, None)) for level, label, _ in bookmarks[index]]
+        continued = index > 0 and started > 0 and (not items or items[0][0] > PAGE_MARGIN + 0.5)
+        if index == 0:
+            first = 1
+        elif continued or not items:
+            first = started or 1
+        else:
+            first = items[0][1]
+        if items:
+            started = max(started, max(line for _, line in items))
+        # 末行：本页最后一个元素的结束行（下一个元素之前的最后一个非空行）
+        k = bisect.bisect_right(element_lines, started)
+        last = element_lines[k] - 1 if k < len(element_lines) else len(source_lines)
+        while last > first and not source_lines[last - 1].strip():
+            last -= 1
+        if headings and not continued and items and abs(bookmarks[index][0][2] - items[0][0]) < 0.5:
+            section = headings[0][1]  # 页面从标题开始
+        top_section = section
+        if headings:
+            section = headings[-1][1]
+        pages.append(PageLayout(index, (first, max(first, last)), headings, top_section, continued))
+    return pages
+
+
+class Pagination:
+    """
+    paginate 的结果：页数、每页对应的源码范围，以及已排版的文档。
+
+    接着调用 convert() / iter_pages() 会直接复用这次排版（只做 PDF 序列化与栅格化），不会重新排版。
+    """
+
+    def __init__(self, document, pages: List[PageLayout], page_size: Tuple[int, int]):
+        self.document = document
+        self.pages = pages
+        self.page_size = page_size
+
+    @property
+    def page_count(self) -> int:
+        return len(self.pages)
+
+    def iter_pages(
+        self,
+        *,
+        format: str = "png",
+        trim: bool = False,
+        intermediate: str = "memory",
+        raster_workers: int = 1,
+        stats: Optional["RenderStats"] = None,
+        encode: Union[EncodeOptions, dict, None] = None,
+    ) -> Iterator[RenderedPage]:
+        """逐页栅格化这次排版的结果，参数同 iter_pages。"""
+        with _total(stats):
+            yield from _iter_html_pages(
+                None,
+                self.page_size,
+                fmt="jpeg" if format == "jpg" else format,
+                intermediate=intermediate,
+                raster_workers=raster_workers,
+                trim=trim,
+                stats=stats,
+                document=self.document,
+                encode=encode,
+            )
+
+    def convert(
+        self,
+        output_path: Union[str, Path],
+        *,
+        trim: bool = False,
+        intermediate: str = "memory",
+        raster_workers: int = 1,
+        stats: Optional["RenderStats"] = None,
+        encode: Union[EncodeOptions, dict, None] = None,
+    ) -> Union[Path, List[Path]]:
+        """把这次排版的结果写成图片（命名同 convert：article_1.png, article_2.png ...；格式取自扩展名，encode 同 convert）。"""
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        with _total(stats):
+            paths = _html_to_image_weasyprint(
+                None,
+                output_path,
+                page_size=self.page_size,
+                intermediate=intermediate,
+                raster_workers=raster_workers,
+                trim=trim,
+                stats=stats,
+                document=self.document,
+                encode=encode,
+            )
+        return paths[0] if len(paths) == 1 else paths
+
+    def __repr__(self) -> str:
+        return f"Pagination(page_count={self.page_count}, page_size={self.page_size})"
+
+
+def paginate(
+    md_content: str,
+    page_size: Tuple[int, int] = XIAOHONGSHU_3_4,
+    style: str = "default",
+    *,
+    extra_css: Optional[str] = None,
+    md_extras: Optional[list] = None,
+    stats: Optional["RenderStats"] = None,
+    assets: Union[str, Path, "AssetFetcher", None] = None,
+) -> Pagination:
+    """
+    只排版不栅格化：得到页数与每页对应的源码标题 / 行范围，用于渲染前检查张数上限、比较不同尺寸等。
+
+    :param md_content: Markdown 原文
+    :param page_size: 固定页尺寸 (宽, 高) px，默认 XIAOHONGSHU_3_4
+    :param style: 样式风格，同 convert
+    :param extra_css: 额外 CSS
+    :param md_extras: markdown 扩展列表
+    :param stats: 可选 RenderStats，记录 markdown / css / layout 阶段耗时
+    :param assets: 图片等资源的根目录或 AssetFetcher（见 convert），与出图时一致才能得到相同的分页
+    :return: Pagination；.page_count 为页数，.pages 为 PageLayout 列表，.convert(output_path) 复用排版直接出图
+    """
+    if not page_size:
+        raise ValueError("paginate 需要固定页尺寸 page_size（长图不分页）")
+    page_size = tuple(page_size)
+    fetcher = _asset_fetcher(assets)
+    with _total(stats):
+        with _stage(stats, "markdown"):
+            body, anchors, heading_lines, source_lines = _annotated_markdown(
+                md_content, tuple(md_extras) if md_extras else DEFAULT_MD_EXTENSIONS
+            )
+            html = _html_document(body, inline_css=False)
+        with _stage(stats, "css"):
+            stylesheets = get_stylesheets(style, page_size, extra_css)
+        with _stage(stats, "layout"):
+            document = _html_source(html, fetcher, page_size[0], stats).render(
+                stylesheets=stylesheets, font_config=_font_config()
+            )
+        pages = _page_layouts(document, anchors, heading_lines, source_lines)
+    return Pagination(document, pages, page_size)
 
 
-def _html_to_image_imgkit(html: str, output_path: Union[str, Path]) -> None:
-    """使用 imgkit（wkhtmltoimage）将 HTML 转为图片。"""
+def _html_to_image_imgkit(html: str, output_path: Union[str, Path], to_bytes: bool = False) -> Optional[bytes]:
+    """使用 imgkit（wkhtmltoimage）将 HTML 转为图片；to_bytes=True 时不写文件，返回图片字节（格式仍取自 output_path）。"""
     import imgkit
 
     options = {
@@ -442,7 +2144,92 @@ def _html_to_image_imgkit(html: str, output_path: Union[str, Path]) -> None:
         "quality": 95,
         "enable-local-file-access": None,
     }
+    if to_bytes:
+        return imgkit.from_string(html, False, options=options)
     imgkit.from_string(html, str(output_path), options=options)
+    return None
+
+
+def _cache_key(
+    render_cache: "RenderCache",
+    md_content: str,
+    output_path: Path,
+    base_css: str,
+    extra_css: Optional[str],
+    md_extras: Optional[list],
+    style: str,
+    page_size: Optional[Tuple[int, int]],
+    backend: str,
+    trim: bool,
+    max_height: Optional[int],
+    options: Optional[EncodeOptions] = None,
+    chunking: Optional[_Chunking] = None,
+    assets: Optional["AssetFetcher"] = None,
+) -> str:
+    font_dir = _font_dir()
+    return render_cache.make_key(
+        md=md_content,
+        css=[base_css, extra_css],
+        md_extras=md_extras,
+        style=style,
+        page_size=list(page_size) if page_size else None,
+        backend=backend,
+        format=output_path.suffix.lower(),
+        trim=trim,
+        max_height=max_height,
+        encode=options._asdict() if options else None,
+        fonts=_font_faces(font_dir) if font_dir else None,
+        chunked=chunking.level if chunking else None,
+        assets=assets.cache_key(md_content, extra_css) if assets else None,
+    )
+
+
+def _cache_fetch(
+    render_cache: "RenderCache",
+    cache_key: str,
+    output_path: Path,
+    paged: bool,
+    stats: Optional["RenderStats"],
+    sink: Optional["OutputSink"] = None,
+    limits: Optional["RenderLimits"] = None,
+    page_size: Optional[Tuple[int, int]] = None,
+) -> Optional[List[Any]]:
+    """
+    查缓存，命中时把图片放到 output_path 对应的位置并返回路径列表。长图被 max_height 切成多张时也按分页命名。
+    给出 sink 时改为读出字节交给 sink，返回各页 sink.write 的结果（info 只有 format、page_count 与 cached）。
+    给出 limits 时，命中的条目同样按 max_pages / max_pixels 检查（在放置图片之前），超限抛 TooManyPages / TooManyPixels；
+    分页模式（给出 page_size）每页按 trim 前的 page_size 计像素，与实际渲染时的检查一致。
+    """
+
+    def targets_for(n: int) -> List[Path]:
+        return [_page_path(output_path, i) for i in range(n)] if paged or n > 1 else [output_path]
+
+    check = None
+    if limits is not None and (limits.max_pages is not None or limits.max_pixels is not None):
+        from .limits import check_output
+
+        def check(pages: int, pixels: int) -> None:
+            if page_size:
+                pixels = pages * page_size[0] * page_size[1]
+            check_output(pages, pixels, limits)
+
+    with _stage(stats, "cache"):
+        if sink is None:
+            hit = render_cache.fetch(cache_key, targets_for, check)
+            sizes = [p.stat().st_size for p in hit or ()]
+        else:
+            pages = render_cache.load(cache_key, check)
+            hit = sizes = None
+            if pages is not None:
+                info = {"format": _output_format(output_path), "page_count": len(pages), "cached": True}
+                hit = [sink.write(p.name, data, info) for p, data in zip(targets_for(len(pages)), pages)]
+                sizes = [len(data) for data in pages]
+    if stats is not None:
+        stats.cache_hit = hit is not None
+        for size in sizes or ():
+            stats.pages += 1
+            stats.bytes_written += size
+    return hit
 
 
 def convert(
@@ -452,56 +2239,229 @@ def convert(
     backend: str = "weasyprint",
     extra_css: Optional[str] = None,
     md_extras: Optional[list] = None,
-    page_size: Optional[Tuple[int, int]] = None,
+    page_size: Union[Tuple[int, int], List[Tuple[int, int]], None] = None,
     style: str = "default",
+    intermediate: str = "memory",
+    cache: Union[bool, str, Path, "RenderCache", None] = None,
+    raster_workers: int = 1,
+    trim: bool = False,
+    max_height: Optional[int] = None,
+    stats: Optional["RenderStats"] = None,
+    sink: Union["OutputSink", Callable[[str, bytes, dict], Any], None] = None,
+    encode: Union[EncodeOptions, dict, None] = None,
+    limits: Union["RenderLimits", dict, None] = None,
+    chunked: Union[bool, int] = False,
+    assets: Union[str, Path, "AssetFetcher", None] = None,
 ) -> Union[Path, List[Path]]:
     """
     将 Markdown 字符串转为图片。
 
     :param md_content: Markdown 原文
-    :param output_path: 输出图片路径（.png / .jpg 等）；多页时为基底名，生成 article_1.png, article_2.png ...
+    :param output_path: 输出图片路径（.png / .jpg / .webp）；多页时为基底名，生成 article_1.png, article_2.png ...
     :param backend: "weasyprint"（推荐）或 "imgkit"
-    :param extra_css: 额外 CSS 字符串，会与默认样式合并
+    :param extra_css: 额外 CSS 字符串，会与默认样式合并（weasyprint 后端与主题一样作为用户样式表传入，imgkit 后端内联进 <style>）
     :param md_extras: markdown 扩展列表，默认 ["extra", "codehilite", "toc"]
-    :param page_size: 固定页尺寸 (宽, 高) px，如小红书 3:4 用 XIAOHONGSHU_3_4；长图会分多张输出
-    :param style: 样式风格："default"（默认现代风格）、"handwriting"（楷体）、"muyao"（沐瑶软笔）、"virgil"（Virgil 手写体）、"parchment"（羊皮卷）或 "excali"（Excalifont 手绘风格）
-    :return: 单张时为 Path，多张时为 List[Path]
+    :param page_size: 固定页尺寸 (宽, 高) px，如小红书 3:4 用 XIAOHONGSHU_3_4；长图会分多张输出。
+        传尺寸列表（如 [XIAOHONGSHU_3_4, XIAOHONGSHU_1_1]）时一次生成多种尺寸，见 convert_sizes
+    :param style: 样式风格："default"（默认现代风格）、"handwriting"（楷体）、"muyao"（沐瑶软笔）、"virgil"（Virgil 手写体）、"parchment"（羊皮卷）或 "excali"（Excalifont 手绘风格），也可以是 register_theme() 注册的自定义主题
+    :param intermediate: 中间 PDF 存放方式："memory"（默认，PDF 字节直接交给 PyMuPDF，不落盘）或 "tempfile"（写临时文件）
+    :param cache: 渲染缓存：True 用默认目录，str/Path 为缓存目录，或传 RenderCache 实例；命中时直接复制缓存的图片
+    :param raster_workers: 分页模式下并行栅格化与编码的进程数（默认 1，串行）；页序与文件命名不变。
+        page_size 为尺寸列表时不可用（抛 ValueError），各尺寸本身已并行
+    :param trim: 分页模式下也裁掉每页四周白边（长图模式总是裁剪）
+    :param max_height: 长图（page_size=None）单张最大高度（像素），超出时在行间空隙处切成多张 article_1.png, article_2.png ...；JPEG 最高 65500
+        长图按 TILE_HEIGHT 条带栅格化，但只有真彩 PNG 逐行流式编码、像素峰值为一条带；JPEG、WebP 与调色板 PNG
+        （encode.colors）由 _PixmapRowWriter 先拼成整张再编码，峰值内存为单张宽 × 高 × 3 字节，随 max_height 增长
+    :param stats: 可选 RenderStats，渲染结束后记录各阶段墙钟 / CPU 时间、页数、像素数、写出字节数、缓存命中与峰值内存；不传时不做任何计时
+    :param sink: 输出目标（MemorySink / ZipSink / TarSink / CallbackSink / FileSink，或回调 fn(name, data, info)），
+        默认写文件；给出时 output_path 只决定文件名与格式，不落盘，返回值中的 Path 换成各页 sink.write 的结果
+    :param encode: 编码参数 EncodeOptions(quality, colors, effort) 或同名键的 dict：WebP 有损 / 无损、调色板 PNG、
+        zlib 级别等，见 EncodeOptions；不传时 PNG / JPEG(95) 用 PyMuPDF 默认编码，WebP 为无损
+    :param limits: 资源上限 RenderLimits(max_input_bytes, max_pages, max_pixels, timeout) 或同名键的 dict；
+        超出时抛 InputTooLarge / TooManyPages / TooManyPixels / RenderTimeout（均为 RenderLimitExceeded），
+        页数与像素在栅格化之前检查（imgkit 后端只检查输入大小与超时）；给出 timeout 时渲染在可杀掉的隔离 worker 进程中执行
+    :param chunked: 分块排版（超长文档用）：True 在顶层一级标题前、int N 在 h1–hN 前切块，顶层 ---（<hr>）与
+        <!-- pagebreak --> 处也切块（分隔本身不输出）；各块单独排版，raster_workers > 1 时并行，页号连续。
+        每块从新的一页开始。只支持 weasyprint 后端的固定页尺寸；目录、标题 id 与脚注按整篇生成，CSS counter(page) 在每块重新从 1 计数
+    :param assets: 图片等资源：str/Path 为资源根目录（Markdown 中的相对路径相对它解析，同一目录的取回结果在进程内缓存复用），
+        或 AssetFetcher（可缩小宽于页面的位图、自定义远程取回，见 AssetFetcher）；不传时相对路径无法解析。只支持 weasyprint 后端
+    :return: 单张时为 Path，多张时为 List[Path]；page_size 为尺寸列表时为 {尺寸: List[Path]}
     """
     output_path = Path(output_path)
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-
-    # 根据 style 参数选择 CSS
-    if style == "handwriting":
-        base_css = HANDWRITING_CSS
-    elif style == "muyao":
-        base_css = MUYAO_CSS
-    elif style == "virgil":
-        base_css = VIRGIL_CSS
-    elif style == "obsidian":
-        base_css = OBSIDIAN_CSS
-    elif style == "parchment":
-        base_css = PARCHMENT_CSS
-    elif style == "excali":
-        base_css = EXCALI_CSS
-    else:
-        base_css = DEFAULT_CSS
-    
-    html = _md_to_html(md_content, extras=md_extras, base_css=base_css)
-    if extra_css:
-        html = html.replace("</style>", f"\n{extra_css}\n</style>")
-    # 小红书等固定尺寸：把 @page 注入 HTML 末尾，覆盖默认 800px
-    if page_size:
-        w, h = page_size
-        html = html.replace("</style>", f"\n@page {{ size: {w}px {h}px; margin: 28px; }}\n</style>")
+    if sink is not None:
+        from .sinks import as_sink
 
-    if backend == "weasyprint":
-        paths = _html_to_image_weasyprint(html, output_path, page_size=page_size)
-        return paths[0] if len(paths) == 1 else paths
-    elif backend == "imgkit":
-        _html_to_image_imgkit(html, output_path)
-        return output_path
+        sink = as_sink(sink)
     else:
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    base_css = get_theme_css(style)
+
+    if backend not in ("weasyprint", "imgkit"):
         raise ValueError(f'不支持的 backend: {backend!r}，请用 "weasyprint" 或 "imgkit"')
+    options = _encode_options(encode, _output_format(output_path))
+    if options is not None and backend != "weasyprint":
+        raise ValueError("encode 只支持 weasyprint 后端")
+    if limits is not None:
+        from .limits import _render_limits, check_input
+
+        limits = _render_limits(limits)
+        check_input(md_content, limits)
+    fetcher = _asset_fetcher(assets)
+    if fetcher is not None and backend != "weasyprint":
+        raise ValueError("assets 只支持 weasyprint 后端")
+    if _is_size_list(page_size):
+        if backend != "weasyprint":
+            raise ValueError("多个 page_size 只支持 weasyprint 后端")
+        if chunked:
+            raise ValueError("chunked 不支持多个 page_size")
+        if raster_workers != 1:
+            raise ValueError("raster_workers 不支持多个 page_size（各尺寸已分发到进程池并行，见 convert_sizes 的 workers）")
+        if max_height is not None:
+            raise ValueError("max_height 只用于长图（page_size=None），不支持多个 page_size")
+        return convert_sizes(
+            md_content,
+            output_path,
+            page_size,
+            extra_css=extra_css,
+            md_extras=md_extras,
+            style=style,
+            intermediate=intermediate,
+            cache=cache,
+            trim=trim,
+            stats=stats,
+            sink=sink,
+            encode=options,
+            limits=limits,
+            assets=fetcher,
+        )
+
+    chunking = _chunking(chunked, style, page_size, extra_css)
+    if chunking is not None and backend != "weasyprint":
+        raise ValueError("chunked 只支持 weasyprint 后端")
+
+    with _total(stats):
+        render_cache = cache_key = None
+        if cache:
+            from .cache import get_cache
+
+            render_cache = get_cache(cache)
+            cache_key = _cache_key(
+                render_cache,
+                md_content,
+                output_path,
+                base_css,
+                extra_css,
+                md_extras,
+                style,
+                page_size,
+                backend,
+                trim,
+                max_height,
+                options,
+                chunking,
+                fetcher,
+            )
+            paged = backend == "weasyprint" and bool(page_size)
+            # imgkit 后端只检查输入大小与超时，命中时也一样
+            hit = _cache_fetch(
+                render_cache,
+                cache_key,
+                output_path,
+                paged,
+                stats,
+                sink,
+                limits if backend == "weasyprint" else None,
+                page_size if paged else None,
+            )
+            if hit is not None:
+                return hit[0] if len(hit) == 1 else hit
+
+        target = sink
+        if sink is not None and render_cache is not None:
+            from .sinks import _RecordingSink
+
+            target = _RecordingSink(sink)  # 同时留一份字节写入缓存
+        if limits is not None and limits.timeout is not None:
+            # 渲染放进可杀掉的隔离 worker（缓存仍在本进程查询与写入），worker 内不再计时限
+            from .limits import run_isolated
+
+            result = run_isolated(
+                "convert",
+                (md_content, output_path.resolve()),
+                dict(
+                    backend=backend,
+                    extra_css=extra_css,
+                    md_extras=md_extras,
+                    page_size=page_size,
+                    style=style,
+                    intermediate=intermediate,
+                    raster_workers=raster_workers,
+                    trim=trim,
+                    max_height=max_height,
+                    encode=options,
+                    limits=limits._replace(timeout=None),
+                    chunked=chunked,
+                    assets=fetcher,
+                ),
+                limits.timeout,
+                stats,
+                target,
+            )
+            paths = result if isinstance(result, list) else [result]
+            if target is None:
+                paths = [output_path.with_name(p.name) for p in paths]
+        elif backend == "weasyprint":
+            # 样式走预解析的样式表（用户样式表，Markdown 内嵌的 author CSS 优先），HTML 里不再内联 CSS
+            with _stage(stats, "markdown"):
+                html = _md_to_html(md_content, extras=md_extras, inline_css=False)
+            with _stage(stats, "css"):
+                stylesheets = get_stylesheets(style, page_size, extra_css)
+            paths = _html_to_image_weasyprint(
+                html,
+                output_path,
+                page_size=page_size,
+                intermediate=intermediate,
+                stylesheets=stylesheets,
+                raster_workers=raster_workers,
+                trim=trim,
+                max_height=max_height,
+                stats=stats,
+                sink=target,
+                encode=options,
+                limits=limits,
+                chunked=chunking,
+                assets=fetcher,
+            )
+        else:
+            # imgkit 没有样式表接口：主题、extra_css、@page 尺寸依次拼进 <head> 的 <style>（author 样式，
+            # 与 weasyprint 后端的用户样式表层叠来源不同，见 SKILL.md「自定义主题」）
+            css = [base_css, extra_css] if extra_css else [base_css]
+            if page_size:
+                w, h = page_size
+                css.append(f"@page {{ size: {w}px {h}px; margin: {PAGE_MARGIN}px; }}")
+            with _stage(stats, "markdown"):
+                html = _md_to_html(md_content, extras=md_extras, base_css="\n".join(css))
+            with _stage(stats, "imgkit"):
+                data = _html_to_image_imgkit(html, output_path, to_bytes=target is not None)
+            if target is None:
+                paths = [output_path]
+                size = output_path.stat().st_size
+            else:
+                with _stage(stats, "write"):
+                    paths = [target.write(output_path.name, data, {"format": _output_format(output_path), "page_count": 1})]
+                size = len(data)
+            if stats is not None:
+                stats.pages += 1
+                stats.bytes_written += size
+
+        if render_cache is not None:
+            with _stage(stats, "cache"):
+                if target is None:
+                    render_cache.store(cache_key, paths)
+                else:
+                    render_cache.store_data(cache_key, target.pages)
+        return paths[0] if len(paths) == 1 else paths
 
 
 def convert_file(
@@ -512,8 +2472,19 @@ def convert_file(
     backend: str = "weasyprint",
     extra_css: Optional[str] = None,
     md_extras: Optional[list] = None,
-    page_size: Optional[Tuple[int, int]] = None,
+    page_size: Union[Tuple[int, int], List[Tuple[int, int]], None] = None,
     style: str = "default",
+    intermediate: str = "memory",
+    cache: Union[bool, str, Path, "RenderCache", None] = None,
+    raster_workers: int = 1,
+    trim: bool = False,
+    max_height: Optional[int] = None,
+    stats: Optional["RenderStats"] = None,
+    sink: Union["OutputSink", Callable[[str, bytes, dict], Any], None] = None,
+    encode: Union[EncodeOptions, dict, None] = None,
+    limits: Union["RenderLimits", dict, None] = None,
+    chunked: Union[bool, int] = False,
+    assets: Union[str, Path, "AssetFetcher", None] = None,
 ) -> Union[Path, List[Path]]:
     """
     将 Markdown 文件转为图片。
@@ -524,9 +2495,20 @@ def convert_file(
     :param backend: "weasyprint" 或 "imgkit"
     :param extra_css: 额外 CSS
     :param md_extras: markdown 扩展列表
-    :param page_size: 固定页尺寸 (宽, 高) px，长图分多张
+    :param page_size: 固定页尺寸 (宽, 高) px，长图分多张；也可为尺寸列表，见 convert_sizes
     :param style: 样式风格："default"（默认现代风格）或 "handwriting"（手写楷体风格）
-    :return: 单张为 Path，多张为 List[Path]
+    :param intermediate: 中间 PDF 存放方式："memory"（默认）或 "tempfile"
+    :param cache: 渲染缓存（True / 缓存目录 / RenderCache），默认不缓存
+    :param raster_workers: 分页模式下并行栅格化的进程数，默认 1
+    :param trim: 分页模式下也裁掉每页四周白边
+    :param max_height: 长图单张最大高度（像素），超出时切成多张
+    :param stats: 可选 RenderStats，记录各阶段耗时等统计
+    :param sink: 输出目标（见 convert），默认写文件
+    :param encode: 编码参数（见 EncodeOptions）
+    :param limits: 资源上限（见 convert 与 RenderLimits）
+    :param chunked: 超长文档分块排版（见 convert）
+    :param assets: 图片等资源的根目录或 AssetFetcher（见 convert）；weasyprint 后端默认为 md 文件所在目录
+    :return: 单张为 Path，多张为 List[Path]；page_size 为尺寸列表时为 {尺寸: List[Path]}
     """
     md_path = Path(md_path)
     if not md_path.exists():
@@ -535,6 +2517,8 @@ def convert_file(
     content = md_path.read_text(encoding=encoding)
     if output_path is None:
         output_path = md_path.with_suffix(".png")
+    if assets is None and backend == "weasyprint":
+        assets = md_path.parent
     return convert(
         content,
         output_path,
@@ -543,6 +2527,17 @@ def convert_file(
         md_extras=md_extras,
         page_size=page_size,
         style=style,
+        intermediate=intermediate,
+        cache=cache,
+        raster_workers=raster_workers,
+        trim=trim,
+        max_height=max_height,
+        stats=stats,
+        sink=sink,
+        encode=encode,
+        limits=limits,
+        chunked=chunked,
+        assets=assets,
     )
 
 
@@ -564,11 +2559,23 @@ def md_to_images(
     *,
     output_dir: Optional[Union[str, Path]] = None,
     output_basename: str = "md2img_out",
-    page_size: Optional[Tuple[int, int]] = None,
+    page_size: Union[Tuple[int, int], List[Tuple[int, int]], None] = None,
     backend: str = "weasyprint",
     extra_css: Optional[str] = None,
     md_extras: Optional[list] = None,
     style: str = "default",
+    intermediate: str = "memory",
+    cache: Union[bool, str, Path, "RenderCache", None] = None,
+    raster_workers: int = 1,
+    trim: bool = False,
+    max_height: Optional[int] = None,
+    stats: Optional["RenderStats"] = None,
+    sink: Union["OutputSink", Callable[[str, bytes, dict], Any], None] = None,
+    format: str = "png",
+    encode: Union[EncodeOptions, dict, None] = None,
+    limits: Union["RenderLimits", dict, None] = None,
+    chunked: Union[bool, int] = False,
+    assets: Union[str, Path, "AssetFetcher", None] = None,
 ) -> List[str]:
     """
     Markdown 文本转图片，返回图片的**绝对路径**列表。
@@ -577,22 +2584,37 @@ def md_to_images(
     :param output_path: 输出路径（可选）。不传则用 output_dir + output_basename 生成 xxx_1.png, xxx_2.png ...
     :param output_dir: 输出目录（output_path 未传时生效），默认当前目录
     :param output_basename: 输出文件名基底（output_path 未传时生效），默认 "md2img_out"
-    :param page_size: 页尺寸 (宽, 高) px，默认 XIAOHONGSHU_3_4；长图自动分多张
+    :param page_size: 页尺寸 (宽, 高) px，默认 XIAOHONGSHU_3_4；长图自动分多张；
+        也可为尺寸列表，各尺寸的文件名带后缀（xxx_3x4_1.png, xxx_1x1_1.png ...），按尺寸顺序返回全部路径
     :param backend: "weasyprint" 或 "imgkit"
     :param extra_css: 额外 CSS
     :param md_extras: markdown 扩展列表
     :param style: 样式风格："default"（默认现代风格）或 "handwriting"（手写楷体风格）
+    :param intermediate: 中间 PDF 存放方式："memory"（默认）或 "tempfile"
+    :param cache: 渲染缓存（True / 缓存目录 / RenderCache），默认不缓存
+    :param raster_workers: 分页模式下并行栅格化的进程数，默认 1
+    :param trim: 分页模式下也裁掉每页四周白边
+    :param max_height: 长图单张最大高度（像素），超出时切成多张
+    :param stats: 可选 RenderStats，记录各阶段耗时等统计
+    :param sink: 输出目标（见 convert）；给出时不落盘，返回各页 sink.write 的结果（如 MemorySink 为文件名）
+    :param format: 输出格式 "png"（默认）、"jpeg" 或 "webp"（output_path 未传时生效，决定扩展名）
+    :param encode: 编码参数（见 EncodeOptions）
+    :param limits: 资源上限（见 convert 与 RenderLimits）
+    :param chunked: 超长文档分块排版（见 convert）
+    :param assets: 图片等资源的根目录或 AssetFetcher（见 convert）
     :return: 生成图片的绝对路径列表，如 ["/path/to/out_1.png", "/path/to/out_2.png"]
     """
     if page_size is None:
         page_size = XIAOHONGSHU_3_4
     if output_path is None:
         out_dir = Path(output_dir or ".").resolve()
-        out_dir.mkdir(parents=True, exist_ok=True)
-        output_path = out_dir / f"{output_basename}.png"
+        if sink is None:
+            out_dir.mkdir(parents=True, exist_ok=True)
+        output_path = out_dir / f"{output_basename}.{'jpg' if format in ('jpg', 'jpeg') else format}"
     else:
         output_path = Path(output_path)
-        output_path.parent.mkdir(parents=True, exist_ok=True)
+        if sink is None:
+            output_path.parent.mkdir(parents=True, exist_ok=True)
     result = convert(
         md_content,
         output_path,
@@ -601,6 +2623,420 @@ def md_to_images(
         md_extras=md_extras,
         page_size=page_size,
         style=style,
+        intermediate=intermediate,
+        cache=cache,
+        raster_workers=raster_workers,
+        trim=trim,
+        max_height=max_height,
+        stats=stats,
+        sink=sink,
+        encode=encode,
+        limits=limits,
+        chunked=chunked,
+        assets=assets,
+    )
+    if isinstance(result, dict):
+        paths = [p for size_paths in result.values() for p in size_paths]
+    else:
+        paths = result if isinstance(result, list) else [result]
+    return [str(p.resolve()) if isinstance(p, Path) else p for p in paths]
+
+
+# ---------------------------------------------------------------------------
+# 批量渲染：常驻进程池
+# ---------------------------------------------------------------------------
+
+
+
+class BatchResult(NamedTuple):
+    """convert_many 的单个任务结果。成功时 error 为 None，失败时 paths 为空列表。"""
+
+    index: int
+    job: Any
+    paths: List[Path]
+    error: Optional[str]
+    elapsed: float
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _init_worker() -> None:
+    """
+    worker 进程初始化：一次性导入重依赖并预解析预设 CSS。
+    之后该进程处理的每个任务都不再付这部分开销。
+    """
+    import fitz  # noqa: F401
+    from PIL import Image  # noqa: F401
+
+    precompile_themes()
+    # 每个主题排版一段样例：建立共享字体配置，预热 fontconfig 字体查找与 Pango 缓存
+    preload_fonts()
+
+
+def _normalize_job(job: Any) -> Tuple[str, Union[str, Path], dict]:
+    """任务 → (md_content, output_path, convert 关键字参数)。"""
+    if isinstance(job, dict):
+        kwargs = dict(job)
+        try:
+            md_content = kwargs.pop("md_content")
+            output_path = kwargs.pop("output_path")
+        except KeyError as e:
+            raise ValueError(f"任务缺少字段 {e.args[0]!r}: {job!r}") from None
+        return md_content, output_path, kwargs
+    if isinstance(job, (tuple, list)) and len(job) in (2, 3):
+        md_content, output_path = job[0], job[1]
+        kwargs = dict(job[2]) if len(job) == 3 else {}
+        return md_content, output_path, kwargs
+    raise ValueError(f"无法识别的任务格式: {job!r}，请用 dict 或 (md_content, output_path[, kwargs])")
+
+
+def _run_job(index: int, job: Any) -> Tuple[int, List[str], Optional[str], float]:
+    """在 worker 中执行单个任务；异常转成字符串返回，保证一个任务失败不影响其它任务。"""
+    import time
+    import traceback
+
+    t0 = time.perf_counter()
+    try:
+        md_content, output_path, kwargs = _normalize_job(job)
+        result = convert(md_content, output_path, **kwargs)
+        if isinstance(result, Path):
+            paths = [result]
+        elif isinstance(result, dict):  # 多尺寸：{尺寸: 路径列表}
+            paths = [p for size_paths in result.values() for p in size_paths]
+        else:
+            paths = result
+        return index, [str(p) for p in paths], None, time.perf_counter() - t0
+    except Exception:
+        return index, [], traceback.format_exc(), time.perf_counter() - t0
+
+
+# convert_many 与多尺寸扇出共用的常驻进程池，worker 启动时预热（见 _init_worker）
+_POOL = _SharedPool(_init_worker)
+
+
+def shutdown_pool(wait: bool = True) -> None:
+    """关闭 convert_many 使用的常驻进程池（进程退出时会自动调用）。"""
+    _POOL.shutdown(wait)
+
+
+def convert_many(
+    jobs: Iterable[Any],
+    *,
+    workers: Optional[int] = None,
+    max_pending: Optional[int] = None,
+) -> Iterator[BatchResult]:
+    """
+    批量将 Markdown 转为图片，任务分发到常驻进程池并行渲染。
+
+    worker 进程启动时导入 weasyprint / PyMuPDF / Pillow 并预解析预设 CSS，
+    进程池在多次调用、多个线程之间复用，直到 shutdown_pool() 或进程退出；按请求过的最大 workers 建立，
+    更小的 workers 直接复用（在途任务数按本次的 workers 控制）。
+
+    :param jobs: 任务序列，每个任务为 dict（必须含 md_content、output_path，其余键作为 convert 的关键字参数）
+                 或元组 (md_content, output_path[, kwargs])
+    :param workers: worker 进程数，默认 os.cpu_count()
+    :param max_pending: 同时在途的任务上限（控制内存），默认 workers * 2
+    :return: 按**完成顺序**产出 BatchResult；单个任务失败只体现在该结果的 error 字段
+    """
+    from concurrent.futures import FIRST_COMPLETED, wait
+    from concurrent.futures.process import BrokenProcessPool
+
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or workers * 2
+
+    job_iter = iter(enumerate(jobs))
+    pending = {}
+
+    def submit_next() -> bool:
+        try:
+            index, job = next(job_iter)
+        except StopIteration:
+            return False
+        fut, owner = _POOL.submit(workers, _run_job, index, job)
+        pending[fut] = (index, job, owner)
+        return True
+
+    while len(pending) < max_pending and submit_next():
+        pass
+
+    while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for fut in done:
+            index, job, owner = pending.pop(fut)
+            try:
+                _, paths, error, elapsed = fut.result()
+            except BrokenProcessPool as e:
+                # worker 崩溃（如被 OOM kill）：丢弃坏掉的进程池，后续任务用新池
+                _POOL.discard(owner)
+                paths, error, elapsed = [], f"worker 进程异常退出: {e}", 0.0
+            yield BatchResult(index, job, [Path(p) for p in paths], error, elapsed)
+            submit_next()
+
+
+# ---------------------------------------------------------------------------
+# 多尺寸扇出：Markdown → HTML 一次，各尺寸并行排版与栅格化
+# ---------------------------------------------------------------------------
+
+# 预设尺寸的文件名后缀，其余尺寸用 "宽x高"
+_SIZE_SUFFIXES = {
+    XIAOHONGSHU_3_4: "3x4",
+    XIAOHONGSHU_1_1: "1x1",
+    XIAOHONGSHU_2_3: "2x3",
+    XIAOHONGSHU_4_3: "4x3",
+}
+
+
+def _is_size_list(page_size: Any) -> bool:
+    """page_size 是否为多个尺寸，如 [XIAOHONGSHU_3_4, XIAOHONGSHU_1_1]（单个尺寸为 (宽, 高)）。"""
+    return isinstance(page_size, (list, tuple)) and bool(page_size) and isinstance(page_size[0], (list, tuple))
+
+
+def _size_path(output_path: Path, page_size: Tuple[int, int]) -> Path:
+    """按尺寸加后缀：post.png → post_3x4.png（分页后为 post_3x4_1.png, post_3x4_2.png ...）。"""
+    suffix = _SIZE_SUFFIXES.get(page_size) or f"{page_size[0]}x{page_size[1]}"
+    return output_path.with_name(f"{output_path.stem}_{suffix}{output_path.suffix}")
+
+
+def _render_html(
+    html: str,
+    output_path: Path,
+    page_size: Tuple[int, int],
+    style: str,
+    extra_css: Optional[str],
+    intermediate: str,
+    trim: bool,
+    stats: Optional["RenderStats"] = None,
+    sink: Optional["OutputSink"] = None,
+    encode: Optional[EncodeOptions] = None,
+    limits: Optional["RenderLimits"] = None,
+    assets: Optional["AssetFetcher"] = None,
+) -> List[Any]:
+    """已生成的 HTML 按一种页尺寸排版、栅格化并写出（写到 sink，默认写文件）。"""
+    with _stage(stats, "css"):
+        stylesheets = get_stylesheets(style, page_size, extra_css)
+    return _html_to_image_weasyprint(
+        html,
+        output_path,
+        page_size=page_size,
+        intermediate=intermediate,
+        stylesheets=stylesheets,
+        trim=trim,
+        stats=stats,
+        sink=sink,
+        encode=encode,
+        limits=limits,
+        assets=assets,
     )
-    paths = [result] if isinstance(result, Path) else result
-    return [str(p.resolve()) for p in paths]
+
+
+def _render_size_job(
+    html: str,
+    output_path: Path,
+    page_size: Tuple[int, int],
+    style: str,
+    extra_css: Optional[str],
+    intermediate: str,
+    trim: bool,
+    want_stats: bool,
+    in_memory: bool = False,
+    encode: Optional[EncodeOptions] = None,
+    limits: Optional["RenderLimits"] = None,
+    assets: Optional["AssetFetcher"] = None,
+) -> Tuple[list, Optional[dict]]:
+    """worker 进程：渲染一种尺寸，返回 (路径列表, 统计)；in_memory 时不写盘，第一项为 [(文件名, 字节, info)]。"""
+    stats = sink = None
+    if want_stats:
+        from .stats import RenderStats
+
+        stats = RenderStats()
+    if in_memory:
+        from .sinks import MemorySink
+
+        sink = MemorySink()
+    paths = _render_html(html, output_path, page_size, style, extra_css, intermediate, trim, stats, sink, encode, limits, assets)
+    output = [(name, sink.files[name], sink.info[name]) for name in paths] if in_memory else [str(p) for p in paths]
+    return output, stats.to_dict() if stats is not None else None
+
+
+def convert_sizes(
+    md_content: str,
+    output_path: Union[str, Path],
+    page_sizes: Iterable[Tuple[int, int]],
+    *,
+    extra_css: Optional[str] = None,
+    md_extras: Optional[list] = None,
+    style: str = "default",
+    intermediate: str = "memory",
+    cache: Union[bool, str, Path, "RenderCache", None] = None,
+    trim: bool = False,
+    workers: Optional[int] = None,
+    stats: Optional["RenderStats"] = None,
+    sink: Union["OutputSink", Callable[[str, bytes, dict], Any], None] = None,
+    encode: Union[EncodeOptions, dict, None] = None,
+    limits: Union["RenderLimits", dict, None] = None,
+    assets: Union[str, Path, "AssetFetcher", None] = None,
+) -> Dict[Tuple[int, int], List[Path]]:
+    """
+    一份 Markdown 同时渲染成多种页尺寸。Markdown → HTML 只做一次，
+    各尺寸的排版、栅格化与编码分发到常驻进程池（同 convert_many）并行执行，总耗时接近最慢的单个尺寸。
+    也可以直接 convert(..., page_size=[XIAOHONGSHU_3_4, XIAOHONGSHU_1_1])。
+
+    :param md_content: Markdown 原文
+    :param output_path: 输出图片路径，按尺寸加后缀：post.png → post_3x4_1.png, post_1x1_1.png ...（自定义尺寸为 post_1200x1600_1.png）
+    :param page_sizes: 页尺寸列表 [(宽, 高), ...]，重复的尺寸只渲染一次
+    :param extra_css: 额外 CSS
+    :param md_extras: markdown 扩展列表
+    :param style: 样式风格，同 convert
+    :param intermediate: 中间 PDF 存放方式："memory"（默认）或 "tempfile"
+    :param cache: 渲染缓存，每个尺寸单独查询与写入（与单尺寸 convert 的缓存条目通用）
+    :param trim: 裁掉每页四周白边
+    :param workers: 并行进程数，默认 min(尺寸数, CPU 核数)；为 1 时在本进程内依次渲染
+    :param stats: 可选 RenderStats；worker 内各阶段耗时累加进来（因而可能超过整体 wall）
+    :param sink: 输出目标（见 convert）；给出时 worker 把编码后的字节传回本进程，由本进程按尺寸顺序写入 sink
+    :param encode: 编码参数（见 EncodeOptions），各尺寸相同
+    :param limits: 资源上限（见 convert 与 RenderLimits）；max_pages / max_pixels 对每种尺寸分别检查，
+        timeout 为所有未命中缓存的尺寸合计
+    :param assets: 图片等资源的根目录或 AssetFetcher（见 convert）；各尺寸的 worker 进程各有一份资源缓存
+    :return: {尺寸: 该尺寸的图片路径列表}，顺序同 page_sizes；给出 sink 时为各页 sink.write 的结果
+    """
+    from .limits import _render_limits, check_input
+    from .sinks import MemorySink, _RecordingSink, as_sink
+
+    sizes = list(dict.fromkeys(tuple(size) for size in page_sizes))
+    if not sizes:
+        raise ValueError("page_sizes 不能为空")
+    output_path = Path(output_path)
+    options = _encode_options(encode, _output_format(output_path))
+    limits = _render_limits(limits)
+    check_input(md_content, limits)
+    fetcher = _asset_fetcher(assets)
+    sink = as_sink(sink)
+    if sink is None:
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+    targets = {size: _size_path(output_path, size) for size in sizes}
+    results: Dict[Tuple[int, int], List[Any]] = {}
+    # 给出 sink 且开启缓存时，各尺寸的 [(文件名, 字节)]，渲染完写入缓存
+    recorded: Dict[Tuple[int, int], List[Tuple[str, bytes]]] = {}
+
+    with _total(stats):
+        render_cache, keys = None, {}
+        if cache:
+            from .cache import get_cache
+
+            render_cache = get_cache(cache)
+            base_css = get_theme_css(style)
+            for size in sizes:
+                keys[size] = _cache_key(
+                    render_cache,
+                    md_content,
+                    targets[size],
+                    base_css,
+                    extra_css,
+                    md_extras,
+                    style,
+                    size,
+                    "weasyprint",
+                    trim,
+                    None,
+                    options,
+                    None,
+                    fetcher,
+                )
+                hit = _cache_fetch(render_cache, keys[size], targets[size], True, stats, sink, limits, size)
+                if hit is not None:
+                    results[size] = hit
+
+        todo = [size for size in sizes if size not in results]
+        if stats is not None and render_cache is not None:
+            stats.cache_hit = not todo
+        if todo and limits is not None and limits.timeout is not None:
+            # 未命中的尺寸整体放进可杀掉的隔离 worker，字节传回本进程再按尺寸写出
+            from .limits import run_isolated
+
+            memory = MemorySink() if sink is not None else None
+            rendered = run_isolated(
+                "convert_sizes",
+                (md_content, output_path.resolve(), todo),
+                dict(
+                    extra_css=extra_css,
+                    md_extras=md_extras,
+                    style=style,
+                    intermediate=intermediate,
+                    trim=trim,
+                    workers=workers,
+                    encode=options,
+                    limits=limits._replace(timeout=None),
+                    assets=fetcher,
+                ),
+                limits.timeout,
+                stats,
+                memory,
+            )
+            for size in todo:
+                if sink is None:
+                    results[size] = [targets[size].with_name(p.name) for p in rendered[size]]
+                else:
+                    recorded[size] = [(name, memory.files[name]) for name in rendered[size]]
+                    with _stage(stats, "write"):
+                        results[size] = [sink.write(name, data, memory.info[name]) for name, data in recorded[size]]
+        elif todo:
+            with _stage(stats, "markdown"):
+                html = _md_to_html(md_content, extras=md_extras, inline_css=False)
+            workers = min(len(todo), workers or os.cpu_count() or 1)
+            if workers <= 1:
+                for size in todo:
+                    target = sink
+                    if sink is not None and render_cache is not None:
+                        target = _RecordingSink(sink)
+                    results[size] = _render_html(
+                        html, targets[size], size, style, extra_css, intermediate, trim, stats, target, options, limits, fetcher
+                    )
+                    if target is not sink:
+                        recorded[size] = target.pages
+            else:
+                # 复用 convert_many 的常驻进程池（已预热字体与主题），池不够大时才换成更大的
+                futures = {
+                    size: _POOL.submit(
+                        workers,
+                        _render_size_job,
+                        html,
+                        targets[size],
+                        size,
+                        style,
+                        extra_css,
+                        intermediate,
+                        trim,
+                        stats is not None,
+                        sink is not None,
+                        options,
+                        limits,
+                        fetcher,
+                    )[0]
+                    for size in todo
+                }
+                try:
+                    for size, fut in futures.items():
+                        with _stage(stats, "fanout"):
+                            output, worker_stats = fut.result()
+                        if sink is None:
+                            results[size] = [Path(p) for p in output]
+                        else:
+                            with _stage(stats, "write"):
+                                results[size] = [sink.write(name, data, info) for name, data, info in output]
+                            recorded[size] = [(name, data) for name, data, _ in output]
+                        if stats is not None and worker_stats:
+                            # 整体 wall / cpu 以本进程为准，只合并各阶段与产出
+                            stats.update({k: v for k, v in worker_stats.items() if k not in ("wall", "cpu", "peak_rss")})
+                finally:
+                    for fut in futures.values():
+                        fut.cancel()
+        if todo and render_cache is not None:
+            with _stage(stats, "cache"):
+                for size in todo:
+                    if sink is None:
+                        render_cache.store(keys[size], results[size])
+                    else:
+                        render_cache.store_data(keys[size], recorded[size])
+    return {size: results[size] for size in sizes}
@@ -0,0 +1,337 @@
+"""
+常驻渲染守护进程：`md2img serve` 在 Unix socket 上监听，CLI 有守护进程时直接转发请求。
+
+主进程导入 converter 并预热（字体、预设 CSS）后再 fork 出 worker，
+worker 共享同一个监听 socket，各自 accept 请求，因此每次请求都不必再付冷启动开销。
+
+协议：一行 JSON 请求（md_to_images 的关键字参数），一行 JSON 响应：
+    {"ok": true, "paths": [...]} 或 {"ok": false, "error": "..."}
+请求带 "stats": true 时，响应额外包含 "stats"（RenderStats.to_dict()）。
+超出资源上限（见 limits）时错误响应带 "limit": [异常类名, 上限, 实际值]，客户端据此重新抛出同类型异常。
+"""
+
+import json
+import os
+import signal
+import socket
+import stat
+import sys
+import tempfile
+from pathlib import Path
+from typing import List, Optional, Union
+
+# 请求中允许透传给 md_to_images 的参数
+REQUEST_FIELDS = (
+    "md_content",
+    "output_path",
+    "output_dir",
+    "output_basename",
+    "page_size",
+    "backend",
+    "extra_css",
+    "md_extras",
+    "style",
+    "intermediate",
+    "cache",
+    "raster_workers",
+    "max_height",
+    "format",
+    "encode",
+    "limits",
+    "chunked",
+    "assets",
+)
+
+
+# worker 读取一行请求的超时（秒）：连上后迟迟不发完请求的客户端不能一直占住 worker
+READ_TIMEOUT = 30.0
+
+
+class DaemonUnavailable(Exception):
+    """守护进程未运行（socket 不存在或无人监听），调用方应回退到进程内渲染。"""
+
+
+class DaemonError(RuntimeError):
+    """守护进程已收到请求，但渲染失败。"""
+
+
+def _fallback_dir() -> Path:
+    """没有 $XDG_RUNTIME_DIR 时 socket 所在的私有目录（系统临时目录/md2img-<uid>，0700）。"""
+    return Path(tempfile.gettempdir()) / f"md2img-{os.getuid()}"
+
+
+def default_socket_path() -> Path:
+    """socket 路径：$MD2IMG_SOCKET > $XDG_RUNTIME_DIR/md2img.sock > 临时目录/md2img-<uid>/md2img.sock"""
+    env = os.environ.get("MD2IMG_SOCKET")
+    if env:
+        return Path(env)
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return Path(runtime_dir) / "md2img.sock"
+    return _fallback_dir() / "md2img.sock"
+
+
+def _private_dir_error(directory: Path) -> Optional[str]:
+    """directory 须是当前用户所有、其他人无权限的真实目录（不是符号链接）；不满足时返回原因。"""
+    try:
+        st = os.lstat(directory)
+    except FileNotFoundError:
+        return f"目录不存在: {directory}"
+    if not stat.S_ISDIR(st.st_mode):
+        return f"不是目录: {directory}"
+    if st.st_uid != os.getuid():
+        return f"目录不属于当前用户: {directory}"
+    if st.st_mode & 0o077:
+        return f"目录权限过宽（应为 0700）: {directory} ({oct(stat.S_IMODE(st.st_mode))})"
+    return None
+
+
+def _check_socket(path: Path) -> None:
+    """
+    连接前确认 path 是当前用户创建的 socket（系统临时目录下的默认位置还要求所在目录私有），
+    否则抛 DaemonUnavailable：其他用户抢先建的 socket 会读到全部请求内容，并可返回任意路径。
+    """
+    try:
+        st = os.lstat(path)
+    except FileNotFoundError:
+        raise DaemonUnavailable(f"守护进程未运行: {path}") from None
+    if not stat.S_ISSOCK(st.st_mode) or st.st_uid != os.getuid():
+        raise DaemonUnavailable(f"{path} 不是当前用户的守护进程 socket，已忽略")
+    if path.parent == _fallback_dir():
+        error = _private_dir_error(path.parent)
+        if error:
+            raise DaemonUnavailable(f"socket 所在目录不安全，已忽略: {error}")
+
+
+def _read_line(conn: socket.socket) -> bytes:
+    chunks = []
+    while True:
+        chunk = conn.recv(65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        if chunk.endswith(b"\n"):
+            break
+    return b"".join(chunks)
+
+
+def _send_json(conn: socket.socket, obj: dict) -> None:
+    conn.sendall(json.dumps(obj, ensure_ascii=False).encode("utf-8") + b"\n")
+
+
+# ---------------------------------------------------------------------------
+# 客户端
+# ---------------------------------------------------------------------------
+
+
+def render(
+    socket_path: Optional[Union[str, Path]] = None,
+    *,
+    connect_timeout: float = 0.5,
+    stats=None,
+    **kwargs,
+) -> List[str]:
+    """
+    通过守护进程渲染，参数同 md_to_images，返回图片绝对路径列表。
+    传入 RenderStats 时由守护进程计时，结果合并进 stats（峰值内存为 worker 进程的）。
+
+    :raises DaemonUnavailable: 守护进程未运行
+    :raises DaemonError: 守护进程渲染失败
+    :raises RenderLimitExceeded: 超出 limits 的某项上限（具体子类同进程内渲染）
+    """
+    unknown = set(kwargs) - set(REQUEST_FIELDS)
+    if unknown:
+        raise TypeError(f"守护进程不支持的参数: {sorted(unknown)}")
+    # 守护进程的工作目录与调用方不同，相对路径先在本地解析
+    for key in ("output_path", "output_dir", "assets"):
+        if kwargs.get(key) is not None:
+            kwargs[key] = str(Path(kwargs[key]).resolve())
+    if kwargs.get("output_path") is None and kwargs.get("output_dir") is None:
+        kwargs["output_dir"] = str(Path(".").resolve())
+    if stats is not None:
+        kwargs["stats"] = True
+
+    path = Path(socket_path) if socket_path else default_socket_path()
+    _check_socket(path)
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        conn.settimeout(connect_timeout)
+        try:
+            conn.connect(str(path))
+        except (FileNotFoundError, ConnectionRefusedError, socket.timeout) as e:
+            raise DaemonUnavailable(f"守护进程未运行: {path} ({e})") from None
+        # 渲染可能很慢，连上之后不再设超时
+        conn.settimeout(None)
+        _send_json(conn, kwargs)
+        raw = _read_line(conn)
+    finally:
+        conn.close()
+
+    if not raw:
+        raise DaemonError("守护进程未返回结果（worker 可能已退出）")
+    resp = json.loads(raw)
+    if not resp.get("ok"):
+        if resp.get("limit"):
+            from . import limits
+
+            name, limit, actual = resp["limit"]
+            raise getattr(limits, name)(resp["error"], limit, actual)
+        raise DaemonError(resp.get("error", "未知错误"))
+    if stats is not None and resp.get("stats"):
+        stats.update(resp["stats"])
+    return resp["paths"]
+
+
+def is_running(socket_path: Optional[Union[str, Path]] = None) -> bool:
+    """socket 上是否有当前用户的守护进程在监听。"""
+    path = Path(socket_path) if socket_path else default_socket_path()
+    try:
+        _check_socket(path)
+    except DaemonUnavailable:
+        return False
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    conn.settimeout(0.5)
+    try:
+        conn.connect(str(path))
+        return True
+    except OSError:
+        return False
+    finally:
+        conn.close()
+
+
+# ---------------------------------------------------------------------------
+# 服务端
+# ---------------------------------------------------------------------------
+
+
+def _handle(conn: socket.socket) -> None:
+    import traceback
+
+    from .converter import md_to_images
+    from .limits import RenderLimitExceeded
+
+    # 读请求超时（socket.timeout）原样抛出，由 _worker_loop 断开连接
+    raw = _read_line(conn)
+    try:
+        request = json.loads(raw or b"{}")
+        kwargs = {k: request[k] for k in REQUEST_FIELDS if k in request}
+        if kwargs.get("page_size") is not None:
+            kwargs["page_size"] = tuple(kwargs["page_size"])
+        stats = None
+        if request.get("stats"):
+            from .stats import RenderStats
+
+            stats = kwargs["stats"] = RenderStats()
+        paths = md_to_images(**kwargs)
+        response = {"ok": True, "paths": paths}
+        if stats is not None:
+            response["stats"] = stats.to_dict()
+        _send_json(conn, response)
+    except RenderLimitExceeded as e:
+        _send_json(conn, {"ok": False, "error": str(e), "limit": [type(e).__name__, e.limit, e.actual]})
+    except Exception:
+        _send_json(conn, {"ok": False, "error": traceback.format_exc()})
+
+
+def _worker_loop(listener: socket.socket) -> None:
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    while True:
+        conn, _ = listener.accept()
+        with conn:
+            # 读请求与写响应都限时；渲染本身不经过 socket，不受影响
+            conn.settimeout(READ_TIMEOUT)
+            try:
+                _handle(conn)
+            except OSError:
+                # 客户端提前断开，或超时未发完请求
+                pass
+
+
+def _spawn(listener: socket.socket) -> int:
+    pid = os.fork()
+    if pid == 0:
+        try:
+            _worker_loop(listener)
+        finally:
+            os._exit(0)
+    return pid
+
+
+def serve(
+    socket_path: Optional[Union[str, Path]] = None,
+    *,
+    workers: Optional[int] = None,
+) -> None:
+    """
+    启动守护进程（阻塞直到收到 SIGTERM / SIGINT）。
+
+    先在主进程导入并预热，再 fork 出 worker，worker 继承已导入的模块和字体缓存。
+    worker 意外退出时自动补齐。
+
+    :param socket_path: 监听的 Unix socket 路径，默认 default_socket_path()
+    :param workers: worker 进程数，默认 os.cpu_count()
+    """
+    from .converter import _init_worker
+
+    if not hasattr(os, "fork"):
+        raise RuntimeError("守护进程模式需要 fork，仅支持 macOS / Linux")
+
+    path = Path(socket_path) if socket_path else default_socket_path()
+    workers = workers or os.cpu_count() or 1
+    if path.parent == _fallback_dir():
+        # 系统临时目录人人可写：socket 放进 0700 的私有目录，目录已存在时核对属主与权限
+        path.parent.mkdir(mode=0o700, exist_ok=True)
+        error = _private_dir_error(path.parent)
+        if error:
+            raise RuntimeError(f"无法安全地创建守护进程 socket: {error}")
+    else:
+        path.parent.mkdir(parents=True, exist_ok=True)
+    if is_running(path):
+        raise RuntimeError(f"守护进程已在运行: {path}")
+    path.unlink(missing_ok=True)  # 上次异常退出遗留的 socket 文件
+
+    _init_worker()
+
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    # 在 umask 0o177 下 bind，socket 文件一创建就是 0600；先 bind 再 chmod 的话，两步之间其他用户可以连上
+    old_umask = os.umask(0o177)
+    try:
+        listener.bind(str(path))
+    finally:
+        os.umask(old_umask)
+    listener.listen(128)
+
+    children = set()
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    try:
+        for _ in range(workers):
+            children.add(_spawn(listener))
+        print(f"md2img 守护进程已启动: {path} (workers={workers}, pid={os.getpid()})", file=sys.stderr)
+        while children:
+            try:
+                pid, _ = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+            children.discard(pid)
+            if not stopping:
+                children.add(_spawn(listener))
+    finally:
+        listener.close()
+        path.unlink(missing_ok=True)
@@ -0,0 +1,349 @@
+"""
+渲染资源上限：输入大小、页数、总像素与墙钟超时，超限时抛各自的异常，调用方可据此降级。
+
+    from md2img import RenderLimits, RenderLimitExceeded, TooManyPages, convert
+
+    limits = RenderLimits(max_input_bytes=512_000, max_pages=18, max_pixels=60_000_000, timeout=20)
+    try:
+        convert(md, "post.png", page_size=XIAOHONGSHU_3_4, limits=limits)
+    except TooManyPages as e:
+        ...                             # e.actual 为实际页数：提示作者拆分文章
+    except RenderLimitExceeded:
+        ...                             # 其它上限（含 RenderTimeout）：降级为纯文本、返回 413 / 503 等
+
+检查时机：
+- max_input_bytes：Markdown 的 UTF-8 字节数，在解析之前；
+- max_pages / max_pixels：分页模式在排版完成后、PDF 序列化与栅格化之前；长图在测出内容高度后、
+  栅格化之前。超限时不会分配任何页像素；
+- timeout：渲染放到隔离的常驻 worker 进程执行，超时连同 worker 启动的子进程（栅格化进程池等）一起杀掉，
+  卡在 C 代码里的排版也能终止。worker 跑完一次留着复用，只有超时或崩溃时才重建。
+
+隔离 worker 也是 aio.AsyncRenderer 的 worker。
+"""
+
+import os
+import signal
+import threading
+import traceback
+from typing import TYPE_CHECKING, Any, List, NamedTuple, Optional, Union
+
+if TYPE_CHECKING:
+    from .sinks import OutputSink
+    from .stats import RenderStats
+
+
+class RenderLimitExceeded(RuntimeError):
+    """
+    渲染超出 RenderLimits 的某项上限。
+
+    :param limit: 被超出的上限值
+    :param actual: 实际值（超时时为 None）
+    """
+
+    def __init__(self, message: str, limit: Any = None, actual: Any = None):
+        super().__init__(message)
+        self.limit = limit
+        self.actual = actual
+
+    def __reduce__(self):
+        # 从 worker 进程传回时保留 limit / actual
+        return type(self), (self.args[0], self.limit, self.actual)
+
+
+class InputTooLarge(RenderLimitExceeded):
+    """Markdown 原文超过 max_input_bytes。"""
+
+
+class TooManyPages(RenderLimitExceeded):
+    """排版结果超过 max_pages 张图片。"""
+
+
+class TooManyPixels(RenderLimitExceeded):
+    """输出图片的总像素数超过 max_pixels。"""
+
+
+class RenderTimeout(RenderLimitExceeded, TimeoutError):
+    """渲染在 timeout 秒内没有完成；对应的 worker 进程已被终止。"""
+
+
+class RenderLimits(NamedTuple):
+    """
+    convert(limits=...) 的资源上限，各项为 None 表示不限。也可以传同名键的 dict。
+
+    :param max_input_bytes: Markdown 原文最大字节数（UTF-8）
+    :param max_pages: 最多输出的图片张数（分页模式为页数；长图为按 max_height 切出的张数）；多尺寸时每种尺寸分别计
+    :param max_pixels: 输出图片的像素总数上限（各张宽×高之和，按栅格化 DPI 计，trim 前）
+    :param timeout: 墙钟超时（秒），从开始排版计，不含缓存查询与 worker 启动。首次用到时要起一个隔离 worker，
+        导入依赖并预热全部主题与字体（通常数秒，另以 WARMUP_TIMEOUT 为限）；之后的调用复用它，
+        一次性的命令行进程（md2img --timeout）每次运行都要付这笔开销
+    """
+
+    max_input_bytes: Optional[int] = None
+    max_pages: Optional[int] = None
+    max_pixels: Optional[int] = None
+    timeout: Optional[float] = None
+
+
+def _render_limits(limits: Union[RenderLimits, dict, None]) -> Optional[RenderLimits]:
+    """convert(limits=...) 的参数 → RenderLimits；不传或全部不限时为 None。"""
+    if limits is None:
+        return None
+    if isinstance(limits, dict):
+        unknown = set(limits) - set(RenderLimits._fields)
+        if unknown:
+            raise ValueError(f"不支持的 limits 字段: {', '.join(sorted(unknown))}，可用: {', '.join(RenderLimits._fields)}")
+        limits = RenderLimits(**limits)
+    elif not isinstance(limits, RenderLimits):
+        raise TypeError(f"limits 须为 RenderLimits 或 dict，而不是 {type(limits).__name__}")
+    for field, value in limits._asdict().items():
+        if value is not None and not value > 0:
+            raise ValueError(f"limits.{field} 须为正数，而不是 {value!r}")
+    return None if limits == RenderLimits() else limits
+
+
+def check_input(md_content: str, limits: Optional[RenderLimits]) -> None:
+    """Markdown 原文是否超过 max_input_bytes（先按字符数粗判，避免对小文档做编码）。"""
+    if limits is None or limits.max_input_bytes is None or len(md_content) * 4 <= limits.max_input_bytes:
+        return
+    size = len(md_content.encode("utf-8"))
+    if size > limits.max_input_bytes:
+        raise InputTooLarge(f"Markdown 原文 {size} 字节，超过上限 {limits.max_input_bytes}", limits.max_input_bytes, size)
+
+
+def check_output(pages: int, pixels: int, limits: Optional[RenderLimits]) -> None:
+    """即将输出的张数与总像素是否超限（在栅格化之前调用）。"""
+    if limits is None:
+        return
+    if limits.max_pages is not None and pages > limits.max_pages:
+        raise TooManyPages(f"排版结果 {pages} 张，超过上限 {limits.max_pages}", limits.max_pages, pages)
+    if limits.max_pixels is not None and pixels > limits.max_pixels:
+        raise TooManyPixels(f"输出共 {pixels} 像素，超过上限 {limits.max_pixels}", limits.max_pixels, pixels)
+
+
+# ---------------------------------------------------------------------------
+# 隔离 worker：可以随时杀掉的常驻渲染进程
+# ---------------------------------------------------------------------------
+
+
+# 隔离 worker 预热（导入依赖、预解析全部主题、预热字体）的时限（秒），不计入渲染的 timeout；
+# 超过时按 RenderTimeout 处理并杀掉 worker（字体目录损坏、fontconfig 卡住等）
+WARMUP_TIMEOUT = 120.0
+
+
+def _mp_context():
+    import multiprocessing
+
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def _worker_main(conn) -> None:
+    """
+    worker 进程：自成进程组，预热后发送 "ready"，
+    再循环执行 (函数名, 位置参数, 关键字参数, 是否统计, 是否传回字节)，直到收到 None。
+    """
+    import multiprocessing
+
+    if hasattr(os, "setpgrp"):
+        os.setpgrp()  # 被杀时整组一起杀，栅格化 / 多尺寸进程池不会变成孤儿
+    # daemon 进程不允许再开子进程；worker 的子进程随进程组一起回收，这里解除该限制。
+    # 子进程须由 worker 自己 fork（继承的 forkserver 会在组外创建进程，杀 worker 时留下孤儿）
+    multiprocessing.current_process().daemon = False
+    if "fork" in multiprocessing.get_all_start_methods():
+        multiprocessing.set_start_method("fork", force=True)
+    from . import converter
+
+    converter._init_worker()
+    try:
+        conn.send("ready")
+    except OSError:
+        return  # 预热期间父进程已关闭管道（如刚补上的 worker 随即被 close）
+    try:
+        _serve(conn, converter)
+    finally:
+        # 子进程退出时不跑 atexit，自己开的进程池要在这里关掉，否则池进程成为孤儿
+        converter.shutdown_pool()
+        converter._shutdown_raster_pool()
+
+
+def _serve(conn, converter) -> None:
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            return
+        if request is None:
+            return
+        name, args, kwargs, want_stats, want_pages = request
+        stats = sink = None
+        try:
+            if want_stats:
+                from .stats import RenderStats
+
+                stats = kwargs["stats"] = RenderStats()
+            if want_pages:
+                from .sinks import MemorySink
+
+                sink = kwargs["sink"] = MemorySink()
+            result = getattr(converter, name)(*args, **kwargs)
+            if sink is not None:
+                result = (result, [(page, data, sink.info[page]) for page, data in sink.items()])
+            response = (True, result, stats.to_dict() if stats else None)
+        except Exception as e:
+            response = (False, e, traceback.format_exc())
+        try:
+            conn.send(response)
+        except Exception:
+            # 异常对象无法 pickle 时退回文本
+            conn.send((False, RuntimeError(response[2]), response[2]))
+
+
+def _remap(result, written: dict):
+    """worker 返回的 MemorySink 文件名（单个 / 列表 / {尺寸: 列表}）换成调用方 sink.write 的结果。"""
+    if isinstance(result, dict):
+        return {key: [written[name] for name in names] for key, names in result.items()}
+    if isinstance(result, list):
+        return [written[name] for name in result]
+    return written[result]
+
+
+class _Worker:
+    """一个 worker 进程及其管道（父进程端）。"""
+
+    def __init__(self, ctx, name: str = "md2img-worker"):
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child,), daemon=True, name=name)
+        self.process.start()
+        child.close()
+        self.ready = False
+
+    def call(self, request: tuple, timeout: Optional[float] = None) -> tuple:
+        """
+        发送请求并阻塞等待结果（首次调用先等 worker 预热完成，这段时间不计入 timeout，另以 WARMUP_TIMEOUT 为限）。
+        timeout 秒内没有结果时抛 RenderTimeout（不杀进程，由调用方处理）；进程被杀时抛 EOFError / OSError。
+        """
+        if not self.wait_ready():
+            raise EOFError("worker 进程在预热时退出")
+        self.conn.send(request)
+        if timeout is not None and not self.conn.poll(timeout):
+            raise RenderTimeout(f"渲染超时（{timeout}s），已终止", timeout)
+        return self.conn.recv()
+
+    def wait_ready(self, timeout: Optional[float] = WARMUP_TIMEOUT) -> bool:
+        """
+        阻塞到 worker 预热完成；预热期间进程退出（或管道已关闭）时返回 False，
+        timeout 秒内没有完成时抛 RenderTimeout（不杀进程，由调用方处理）。
+        """
+        if not self.ready:
+            try:
+                ready = timeout is None or self.conn.poll(timeout)
+                if ready:
+                    self.conn.recv()
+            except (EOFError, OSError):
+                return False
+            if not ready:
+                raise RenderTimeout(f"worker 预热超时（{timeout}s），已终止", timeout)
+            self.ready = True
+        return True
+
+    def kill(self) -> None:
+        """杀掉进程及其子进程；管道留给 reap() 关闭（I/O 线程可能还阻塞在 recv 上，进程死后它会收到 EOF）。"""
+        try:
+            # 进程组 id 即 worker 的 pid；worker 还没来得及 setpgrp 时该组不存在，退回只杀 worker
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except (AttributeError, OSError):
+            self.process.kill()
+
+    def reap(self) -> None:
+        self.process.join()
+        self.conn.close()
+
+    def close(self) -> None:
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.conn.close()
+
+
+_IDLE: List[_Worker] = []
+_IDLE_LOCK = threading.Lock()
+_CTX = None
+
+
+def _acquire() -> _Worker:
+    global _CTX
+    with _IDLE_LOCK:
+        if _IDLE:
+            return _IDLE.pop()
+        if _CTX is None:
+            import atexit
+            import multiprocessing.util  # noqa: F401  导入时登记 multiprocessing 自己的退出钩子
+
+            _CTX = _mp_context()
+            # atexit 后登记的先执行：在 multiprocessing 终止 daemon 子进程之前，让 worker 先关掉各自的进程池
+            atexit.register(shutdown_isolated)
+    return _Worker(_CTX, "md2img-isolated")
+
+
+def _release(worker: _Worker) -> None:
+    with _IDLE_LOCK:
+        if len(_IDLE) < (os.cpu_count() or 1):
+            _IDLE.append(worker)
+            return
+    worker.close()
+
+
+def shutdown_isolated() -> None:
+    """关闭空闲的隔离 worker（进程退出时会自动调用）；等它们关掉各自的进程池，超时则整组杀掉。"""
+    with _IDLE_LOCK:
+        workers = _IDLE[:]
+        _IDLE.clear()
+    for worker in workers:
+        worker.close()
+    for worker in workers:
+        worker.process.join(5)
+        if worker.process.is_alive():
+            worker.kill()
+
+
+def run_isolated(
+    name: str,
+    args: tuple,
+    kwargs: dict,
+    timeout: Optional[float],
+    stats: Optional["RenderStats"] = None,
+    sink: Optional["OutputSink"] = None,
+):
+    """
+    在隔离 worker 中执行 converter.<name>(*args, **kwargs)，超时杀掉 worker 并抛 RenderTimeout。
+    参数须可 pickle，路径应为绝对路径。给出 sink 时 worker 渲染到内存，各页回到本进程写入 sink，
+    返回值中的文件名换成 sink.write 的结果；stats 合并 worker 内的各阶段统计。
+    """
+    worker = _acquire()
+    healthy = False
+    try:
+        try:
+            ok, value, extra = worker.call((name, args, kwargs, stats is not None, sink is not None), timeout)
+        except RenderTimeout:  # 也是 OSError（TimeoutError）的子类，不能当成进程崩溃
+            raise
+        except (EOFError, OSError) as e:
+            raise RuntimeError(f"worker 进程异常退出: {e!r}") from None
+        healthy = True
+    finally:
+        # 超时、中断或进程崩溃：worker 状态未知，杀掉（下次调用再起新的）
+        if healthy:
+            _release(worker)
+        else:
+            worker.kill()
+            worker.reap()
+    if not ok:
+        raise value
+    if stats is not None and extra:
+        # 整体 wall / cpu 以本进程为准，只合并各阶段与产出
+        stats.update({k: v for k, v in extra.items() if k not in ("wall", "cpu", "peak_rss")})
+    if sink is not None:
+        value, pages = value
+        written = {page: sink.write(page, data, info) for page, data, info in pages}
+        value = _remap(value, written)
+    return value
@@ -0,0 +1,234 @@
+"""
+输出目标（sink）：渲染好的每页图片交给谁。
+
+    from md2img import MemorySink, ZipSink, convert
+
+    sink = MemorySink()
+    convert(md, "post.png", page_size=XIAOHONGSHU_3_4, sink=sink)
+    for name, data in sink.items():
+        uploader.put(name, data)            # 直接上传，不落盘、不用清理
+
+    with ZipSink(response_stream) as sink:  # 边渲染边写 zip，流可以不支持 seek
+        convert(md, "post.png", page_size=XIAOHONGSHU_3_4, sink=sink)
+
+convert / md_to_images 传 sink 时，output_path 只决定文件名与格式（post.png → post_1.png, post_2.png ...），
+目录部分被忽略；不传 sink 时等价于 FileSink(output_path 所在目录)，即原来的写文件行为。
+sink 由调用方创建和关闭，同一个 sink 可以接收多次渲染（如多篇文章打进同一个 zip）。
+"""
+
+import io
+import threading
+import time
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+
+class OutputSink:
+    """
+    输出目标的基类。子类实现 write()；需要收尾（如写 zip 目录）的实现 close()。
+
+    write(name, data, info) 的返回值原样作为 convert 的返回值（单页为该值，多页为列表）。
+    """
+
+    def write(self, name: str, data: bytes, info: dict) -> Any:
+        """
+        写出一页。
+
+        :param name: 文件名，如 "post_1.png"（不含目录）
+        :param data: 编码后的图片字节
+        :param info: 页元数据 {"width", "height", "format", "page_count", ...}，同 RenderedPage.info
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class FileSink(OutputSink):
+    """
+    写到本地目录（不传 sink 时的默认行为），返回写出的 Path。
+
+    :param directory: 输出目录，首次写入时自动创建
+    """
+
+    def __init__(self, directory: Union[str, Path] = "."):
+        self.directory = Path(directory)
+        self._ready = False
+
+    def write(self, name: str, data: bytes, info: dict) -> Path:
+        if not self._ready:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._ready = True
+        path = self.directory / name
+        path.write_bytes(data)
+        return path
+
+
+class MemorySink(OutputSink):
+    """
+    留在内存里，返回文件名；按写入顺序保存 {文件名: 字节}，同名时后写入的覆盖先写入的。
+
+        sink.files["post_1.png"]      # bytes
+        sink.open("post_1.png")       # 新的 BytesIO，可直接交给只接受文件对象的上传接口
+    """
+
+    def __init__(self):
+        self.files: Dict[str, bytes] = {}
+        self.info: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def write(self, name: str, data: bytes, info: dict) -> str:
+        with self._lock:
+            self.files[name] = bytes(data)
+            self.info[name] = info
+        return name
+
+    def items(self) -> Iterator[Tuple[str, bytes]]:
+        return iter(list(self.files.items()))
+
+    def open(self, name: str) -> io.BytesIO:
+        return io.BytesIO(self.files[name])
+
+    def clear(self) -> None:
+        with self._lock:
+            self.files.clear()
+            self.info.clear()
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+
+def _open_target(target: Union[str, Path, BinaryIO]) -> Tuple[BinaryIO, bool]:
+    """路径 → 新打开的文件（需要由我们关闭）；文件对象原样返回。"""
+    if isinstance(target, (str, Path)):
+        return open(target, "wb"), True
+    return target, False
+
+
+class ZipSink(OutputSink):
+    """
+    每页写成 zip 里的一个成员，返回成员名；close() 时写出中央目录。
+
+    :param target: zip 文件路径，或可写的二进制文件对象（不必支持 seek，如 HTTP 响应流、管道）
+    :param compression: zipfile 的压缩方式，默认 ZIP_STORED（PNG / JPEG 本身已压缩，再 deflate 只费 CPU）
+    :param prefix: 成员名前缀，如 "post/"
+
+    每页写完即刷出到 target，内存中不积累整个压缩包。
+    """
+
+    def __init__(
+        self,
+        target: Union[str, Path, BinaryIO],
+        *,
+        compression: Optional[int] = None,
+        prefix: str = "",
+    ):
+        import zipfile
+
+        self._fp, self._owns = _open_target(target)
+        self._zip = zipfile.ZipFile(self._fp, "w", compression=zipfile.ZIP_STORED if compression is None else compression)
+        self.prefix = prefix
+        self.names: List[str] = []
+        self._lock = threading.Lock()
+
+    def write(self, name: str, data: bytes, info: dict) -> str:
+        import zipfile
+
+        arcname = self.prefix + name
+        member = zipfile.ZipInfo(arcname, date_time=time.localtime()[:6])
+        member.compress_type = self._zip.compression
+        with self._lock:
+            self._zip.writestr(member, data)
+            self.names.append(arcname)
+        return arcname
+
+    def close(self) -> None:
+        if self._zip is None:
+            return
+        self._zip.close()
+        self._zip = None
+        if self._owns:
+            self._fp.close()
+
+
+class TarSink(OutputSink):
+    """
+    每页写成 tar 里的一个成员，返回成员名；以流模式写出（不 seek），close() 时写结束块。
+
+    :param target: tar 文件路径，或可写的二进制文件对象（不必支持 seek）
+    :param compression: ""（默认，不压缩）、"gz"、"bz2" 或 "xz"
+    :param prefix: 成员名前缀，如 "post/"
+    """
+
+    def __init__(self, target: Union[str, Path, BinaryIO], *, compression: str = "", prefix: str = ""):
+        if compression not in ("", "gz", "bz2", "xz"):
+            raise ValueError(f'不支持的 compression: {compression!r}，请用 ""、"gz"、"bz2" 或 "xz"')
+        import tarfile
+
+        self._fp, self._owns = _open_target(target)
+        self._tar = tarfile.open(fileobj=self._fp, mode=f"w|{compression}")
+        self.prefix = prefix
+        self.names: List[str] = []
+        self._lock = threading.Lock()
+
+    def write(self, name: str, data: bytes, info: dict) -> str:
+        import tarfile
+
+        member = tarfile.TarInfo(self.prefix + name)
+        member.size = len(data)
+        member.mtime = int(time.time())
+        member.mode = 0o644
+        with self._lock:
+            self._tar.addfile(member, io.BytesIO(data))
+            self.names.append(member.name)
+        return member.name
+
+    def close(self) -> None:
+        if self._tar is None:
+            return
+        self._tar.close()
+        self._tar = None
+        if self._owns:
+            self._fp.close()
+
+
+class CallbackSink(OutputSink):
+    """
+    每页调用 callback(name, data, info)，返回值作为该页的结果（返回 None 时为文件名）。
+
+        convert(md, "post.png", sink=CallbackSink(lambda name, data, info: bucket.put(name, data)))
+    """
+
+    def __init__(self, callback: Callable[[str, bytes, dict], Any]):
+        self.callback = callback
+
+    def write(self, name: str, data: bytes, info: dict) -> Any:
+        result = self.callback(name, data, info)
+        return name if result is None else result
+
+
+class _RecordingSink(OutputSink):
+    """包装另一个 sink，同时记下写过的 (文件名, 字节)，供写入渲染缓存。"""
+
+    def __init__(self, inner: OutputSink):
+        self.inner = inner
+        self.pages: List[Tuple[str, bytes]] = []
+
+    def write(self, name: str, data: bytes, info: dict) -> Any:
+        self.pages.append((name, data))
+        return self.inner.write(name, data, info)
+
+
+def as_sink(sink: Optional[Union[OutputSink, Callable[[str, bytes, dict], Any]]]) -> Optional[OutputSink]:
+    """convert(sink=...) 的参数：OutputSink 原样返回，普通函数包成 CallbackSink。"""
+    if sink is None or isinstance(sink, OutputSink):
+        return sink
+    if callable(sink):
+        return CallbackSink(sink)
+    raise TypeError(f"sink 须为 OutputSink 或可调用对象，而不是 {type(sink).__name__}")
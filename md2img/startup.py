@@ -0,0 +1,105 @@
+"""
+启动开销自检：`md2img --self-test-startup`。
+
+每个依赖在独立的新解释器里计时导入（避免模块缓存互相影响），并检查：
+  - `import md2img` 不得顺带加载 markdown / weasyprint / PyMuPDF / Pillow；
+  - `import md2img` 的耗时不超过预算。
+任一不满足时返回非零退出码，可直接作为 CI 中的启动回归检查。
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# 报告中逐个计时的模块（第一个为包本身）
+DEPENDENCIES = ("md2img", "md2img.converter", "markdown", "weasyprint", "fitz", "PIL.Image")
+
+# 导入 md2img 时不应被加载的重依赖（按 sys.modules 顶层名判断）
+HEAVY_MODULES = ("markdown", "weasyprint", "fitz", "pymupdf", "PIL")
+
+DEFAULT_BUDGET_MS = 50.0
+
+SKILL_ROOT = Path(__file__).resolve().parent.parent
+
+_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+try:
+    import {module}
+    error = None
+except Exception as e:
+    error = f"{{type(e).__name__}}: {{e}}"
+elapsed = time.perf_counter() - t0
+heavy = sorted(m for m in {heavy!r} if m in sys.modules)
+print(json.dumps({{"seconds": elapsed, "error": error, "heavy": heavy}}))
+"""
+
+
+def _run_probe(module: str, python: str = sys.executable) -> Dict:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(SKILL_ROOT), env.get("PYTHONPATH")]))
+    code = _PROBE.format(module=module, heavy=HEAVY_MODULES)
+    out = subprocess.run(
+        [python, "-c", code], env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def measure_imports(modules=DEPENDENCIES, repeat: int = 3) -> List[Dict]:
+    """
+    逐个模块在新解释器中计时导入，取 repeat 次的最小值（排除磁盘缓存等噪声）。
+
+    :return: [{"module", "ms", "error", "heavy"}]，heavy 为导入后已加载的重依赖
+    """
+    results = []
+    for module in modules:
+        runs = [_run_probe(module) for _ in range(repeat)]
+        best = min(runs, key=lambda r: r["seconds"])
+        results.append(
+            {"module": module, "ms": best["seconds"] * 1000, "error": best["error"], "heavy": best["heavy"]}
+        )
+    return results
+
+
+def measure_cli(argv=("--help",), repeat: int = 3) -> float:
+    """bin/md2img 指定参数的整体墙钟耗时（毫秒，含解释器启动），取最小值。"""
+    cli = SKILL_ROOT / "bin" / "md2img"
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, str(cli), *argv], capture_output=True, check=False)
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def self_test(budget_ms: Optional[float] = None, out=sys.stdout) -> int:
+    """打印启动开销报告；import md2img 超预算或加载了重依赖时返回 1，否则返回 0。"""
+    budget_ms = DEFAULT_BUDGET_MS if budget_ms is None else budget_ms
+    results = measure_imports()
+
+    print(f"{'module':<20} {'import':>10}  note", file=out)
+    for r in results:
+        loaded_heavy = r["heavy"] if r["module"].startswith("md2img") else []
+        note = r["error"] or (f"加载了 {', '.join(loaded_heavy)}" if loaded_heavy else "")
+        print(f"{r['module']:<20} {r['ms']:>8.1f}ms  {note}", file=out)
+    print(f"{'bin/md2img --help':<20} {measure_cli(('--help',)):>8.1f}ms  (含解释器启动)", file=out)
+    print(f"{'bin/md2img -v':<20} {measure_cli(('--version',)):>8.1f}ms  (含解释器启动)", file=out)
+
+    pkg = results[0]
+    failures = []
+    if pkg["error"]:
+        failures.append(f"import md2img 失败: {pkg['error']}")
+    if pkg["heavy"]:
+        failures.append(f"import md2img 不应加载重依赖，实际加载了: {', '.join(pkg['heavy'])}")
+    if pkg["ms"] > budget_ms:
+        failures.append(f"import md2img 耗时 {pkg['ms']:.1f}ms，超出预算 {budget_ms:.0f}ms")
+
+    for msg in failures:
+        print(f"FAIL: {msg}", file=out)
+    if not failures:
+        print(f"OK: import md2img {pkg['ms']:.1f}ms ≤ 预算 {budget_ms:.0f}ms，未加载重依赖", file=out)
+    return 1 if failures else 0
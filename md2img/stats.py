@@ -0,0 +1,179 @@
+"""
+渲染统计：可选传给 convert(..., stats=RenderStats()) 等接口，渲染结束后从中读出各阶段耗时与产出规模。
+
+不传 stats 时渲染流程只多一次 `is None` 判断，没有计时、回调或额外对象。
+
+阶段名:
+    cache      查询 / 写入渲染缓存
+    markdown   Markdown → HTML
+    css        取预解析样式表
+    layout     WeasyPrint 排版
+    pdf        PDF 序列化（tempfile 模式含写临时文件）
+    raster     PyMuPDF 栅格化（raster_workers>1 时为等待 worker 的墙钟时间，含 worker 内的编码）
+    encode     裁白边 + 图片编码
+    write      写出图片文件
+    imgkit     imgkit 后端整体渲染
+    fanout     多尺寸并行渲染时等待 worker 进程的墙钟时间（worker 内的各阶段另行累加）
+
+图片等外部资源（convert(..., assets=...)）在 layout 阶段内取回，另按资源记在 assets 中，不单列阶段。
+"""
+
+import json
+import sys
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+try:
+    import resource
+except ImportError:  # Windows：没有 getrusage，不报告峰值内存
+    resource = None
+
+
+def peak_rss() -> Optional[int]:
+    """本进程至今的峰值常驻内存（字节），不支持的平台返回 None。"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # Linux 为 KiB，macOS 为字节
+
+
+class RenderStats:
+    """
+    一次（或多次累加的）渲染统计。
+
+    :param observer: 可选回调 observer(stage, wall, cpu)，每个阶段结束时调用（秒），可用于接入外部指标系统
+
+    属性:
+    - stages: {阶段名: {"wall": 秒, "cpu": 秒, "calls": 次数}}，同名阶段累加
+    - pages / pixels / bytes_written: 输出页数、像素总数、写出的图片字节数
+    - cache_hit: 命中缓存为 True，未命中为 False，未启用缓存为 None
+    - assets: {资源 URL: {"hits", "misses", "fetch": 秒, "decode": 秒, "bytes"}}，见 AssetFetcher；
+      fetch 为读文件 / 远程取回耗时，decode 为解码与缩小耗时，bytes 为交给 WeasyPrint 的字节数
+    - peak_rss: 渲染结束时进程的峰值常驻内存（字节）
+    - wall / cpu: 整次调用的墙钟与 CPU 时间（秒）；CPU 时间只计本进程，不含栅格化 worker
+    """
+
+    def __init__(self, observer: Optional[Callable[[str, float, float], None]] = None):
+        self.observer = observer
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.pages = 0
+        self.pixels = 0
+        self.bytes_written = 0
+        self.cache_hit: Optional[bool] = None
+        self.assets: Dict[str, Dict[str, float]] = {}
+        self.peak_rss: Optional[int] = None
+        self.wall = 0.0
+        self.cpu = 0.0
+
+    def add(self, stage: str, wall: float, cpu: float) -> None:
+        """累加一个阶段的耗时并通知 observer。"""
+        entry = self.stages.setdefault(stage, {"wall": 0.0, "cpu": 0.0, "calls": 0})
+        entry["wall"] += wall
+        entry["cpu"] += cpu
+        entry["calls"] += 1
+        if self.observer is not None:
+            self.observer(stage, wall, cpu)
+
+    @contextmanager
+    def stage(self, name: str):
+        """计时一个阶段：with stats.stage("layout"): ..."""
+        wall0, cpu0 = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - wall0, time.process_time() - cpu0)
+
+    @contextmanager
+    def total(self):
+        """计时整次调用，结束时记录峰值内存。"""
+        wall0, cpu0 = time.perf_counter(), time.process_time()
+        try:
+            yield self
+        finally:
+            self.wall += time.perf_counter() - wall0
+            self.cpu += time.process_time() - cpu0
+            self.peak_rss = peak_rss()
+
+    def add_page(self, width: int, height: int, nbytes: int = 0) -> None:
+        self.pages += 1
+        self.pixels += width * height
+        self.bytes_written += nbytes
+
+    def to_dict(self) -> dict:
+        return {
+            "wall": self.wall,
+            "cpu": self.cpu,
+            "stages": self.stages,
+            "pages": self.pages,
+            "pixels": self.pixels,
+            "bytes_written": self.bytes_written,
+            "cache_hit": self.cache_hit,
+            "assets": self.assets,
+            "peak_rss": self.peak_rss,
+        }
+
+    def update(self, data: dict) -> None:
+        """从 to_dict() 的结果恢复（守护进程把统计传回客户端时使用）。"""
+        for stage, entry in data.get("stages", {}).items():
+            mine = self.stages.setdefault(stage, {"wall": 0.0, "cpu": 0.0, "calls": 0})
+            for key in ("wall", "cpu", "calls"):
+                mine[key] += entry.get(key, 0)
+        for key in ("wall", "cpu", "pages", "pixels", "bytes_written"):
+            setattr(self, key, getattr(self, key) + data.get(key, 0))
+        for url, entry in data.get("assets", {}).items():
+            mine = self.assets.setdefault(url, {"hits": 0, "misses": 0, "fetch": 0.0, "decode": 0.0, "bytes": 0})
+            for key in ("hits", "misses", "fetch", "decode"):
+                mine[key] += entry.get(key, 0)
+            mine["bytes"] = entry.get("bytes") or mine["bytes"]
+        if data.get("cache_hit") is not None:
+            self.cache_hit = data["cache_hit"]
+        if data.get("peak_rss") is not None:
+            self.peak_rss = data["peak_rss"]
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), ensure_ascii=False)
+
+    def add_asset(self, url: str, hit: bool, fetch: float = 0.0, decode: float = 0.0, nbytes: int = 0) -> None:
+        """记录一次资源取回：hit 为命中 AssetFetcher 的缓存，未命中时另记读取与解码耗时（秒）。"""
+        entry = self.assets.setdefault(url, {"hits": 0, "misses": 0, "fetch": 0.0, "decode": 0.0, "bytes": 0})
+        entry["hits" if hit else "misses"] += 1
+        entry["fetch"] += fetch
+        entry["decode"] += decode
+        if nbytes:
+            entry["bytes"] = nbytes
+
+    @property
+    def asset_hit_rate(self) -> Optional[float]:
+        """资源缓存命中率；没有取回过资源时为 None。"""
+        hits = sum(e["hits"] for e in self.assets.values())
+        total = hits + sum(e["misses"] for e in self.assets.values())
+        return hits / total if total else None
+
+    def format(self) -> str:
+        """人读的多行摘要。"""
+        lines = [f"{'stage':<10} {'wall':>9} {'cpu':>9} {'calls':>6}"]
+        for stage, entry in self.stages.items():
+            lines.append(f"{stage:<10} {entry['wall'] * 1000:>7.1f}ms {entry['cpu'] * 1000:>7.1f}ms {entry['calls']:>6}")
+        lines.append(f"{'total':<10} {self.wall * 1000:>7.1f}ms {self.cpu * 1000:>7.1f}ms")
+        cache = {True: "命中", False: "未命中", None: "未启用"}[self.cache_hit]
+        peak = f"{self.peak_rss / 2**20:.0f} MiB" if self.peak_rss is not None else "-"
+        lines.append(
+            f"pages={self.pages} pixels={self.pixels} bytes={self.bytes_written} 缓存{cache} 峰值内存 {peak}"
+        )
+        if self.assets:
+            hits = sum(e["hits"] for e in self.assets.values())
+            misses = sum(e["misses"] for e in self.assets.values())
+            decode = sum(e["decode"] for e in self.assets.values())
+            fetch = sum(e["fetch"] for e in self.assets.values())
+            lines.append(
+                f"assets={len(self.assets)} 命中 {hits} 未命中 {misses}（{self.asset_hit_rate:.0%}）"
+                f" 读取 {fetch * 1000:.1f}ms 解码 {decode * 1000:.1f}ms"
+            )
+        return "\n".join(lines)
+
+    def __repr__(self) -> str:
+        return (
+            f"RenderStats(wall={self.wall:.3f}s, pages={self.pages}, pixels={self.pixels}, "
+            f"bytes_written={self.bytes_written}, cache_hit={self.cache_hit})"
+        )
@@ -0,0 +1,281 @@
+"""
+监视模式：源文件变化时在同一进程内重新渲染，只重写像素有变化的页。
+
+    md2img --watch draft.md            # 命令行
+    watch_file("draft.md", "out/draft.png", page_size=XIAOHONGSHU_3_4)
+
+与每次重新运行 bin/md2img 相比:
+- 进程常驻：依赖只导入一次，主题样式表、Markdown 引擎与块缓存一直是热的；
+- 分页模式每页栅格化后先算像素的 SHA-256，与上次相同的页连编码都跳过；
+  编码结果再按内容比对，与上次（或磁盘上已有文件）相同的页不写盘，mtime 也不变，
+  图片查看器 / 同步盘不会被无谓地刷新；
+- 有变化的页先写同目录临时文件再 os.replace，读者看到的要么是旧图要么是新图；
+- 页数变少时删除多出来的尾页（article_5.png ...），目录里不留上一版的残页。
+
+文件变化用轮询 (mtime_ns, size) 检测，不依赖 watchdog 等第三方库。
+"""
+
+import errno
+import hashlib
+import os
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+if TYPE_CHECKING:
+    from .converter import RenderedPage
+    from .stats import RenderStats
+
+DEFAULT_INTERVAL = 0.25
+# 检测到变化后等文件稳定的时间（编辑器可能分几次写完）
+SETTLE_DELAY = 0.05
+
+
+class SyncResult(NamedTuple):
+    """
+    一次增量渲染的结果。
+
+    - paths: 本次的全部输出（按页序）
+    - written: 内容有变化、实际重写了的页
+    - unchanged: 与上次相同、没有写盘的页
+    - removed: 页数变少后删除的尾页
+    - elapsed: 渲染 + 写出的总秒数
+    """
+
+    paths: List[Path]
+    written: List[Path]
+    unchanged: List[Path]
+    removed: List[Path]
+    elapsed: float
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    """写同目录临时文件后 os.replace，避免读者看到写了一半的图片。"""
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+class IncrementalRenderer:
+    """
+    把同一份文档的多次渲染增量写到 output_path（命名规则同 convert：分页为 stem_1, stem_2 ...）。
+
+    :param output_path: 输出图片路径（.png / .jpg），多页时为基底名
+    :param render_kwargs: 传给 iter_pages 的默认参数（page_size、style、extra_css、trim ...）
+
+    记录每个输出文件上次的像素摘要与文件内容摘要；首次遇到的路径若磁盘上已有同名文件，
+    大小相同时读出比对一次，因此对上一次普通运行的输出同样只重写有变化的页。
+    """
+
+    def __init__(self, output_path: Union[str, Path], **render_kwargs):
+        self.output_path = Path(output_path)
+        self.render_kwargs = render_kwargs
+        self._digests: Dict[Path, str] = {}
+        self._pixels: Dict[Path, str] = {}
+
+    def _reuse(self, index: int, pixel_digest: str) -> bool:
+        """iter_pages 的 reuse 回调：像素与上次写出的相同且文件还在时跳过编码。"""
+        from .converter import _page_path
+
+        path = _page_path(self.output_path, index)
+        return self._pixels.get(path) == pixel_digest and path in self._digests and path.exists()
+
+    def _is_current(self, path: Path, data: bytes, digest: str) -> bool:
+        known = self._digests.get(path)
+        if known is not None:
+            return known == digest and path.exists()
+        try:
+            if path.stat().st_size != len(data):
+                return False
+            return path.read_bytes() == data
+        except OSError:
+            return False
+
+    def sync(
+        self,
+        pages: Iterable["RenderedPage"],
+        paged: bool = True,
+        stats: Optional["RenderStats"] = None,
+    ) -> SyncResult:
+        """
+        逐页比对并写出，然后删除多出来的尾页。
+
+        :param pages: RenderedPage 迭代器（如 iter_pages 的结果），data 须为编码后的字节
+        :param paged: 是否按分页命名；长图只有一张时为 False（直接写 output_path）
+        :param stats: 可选 RenderStats，只累计实际写出的字节
+        """
+        from .converter import _page_path, _stage
+
+        t0 = time.perf_counter()
+        paths: List[Path] = []
+        written: List[Path] = []
+        unchanged: List[Path] = []
+        self.output_path.parent.mkdir(parents=True, exist_ok=True)
+        for page in pages:
+            numbered = paged or page.info["page_count"] > 1
+            path = _page_path(self.output_path, page.index) if numbered else self.output_path
+            paths.append(path)
+            if page.data is None:
+                unchanged.append(path)  # reuse 回调确认像素没变，没有编码
+                continue
+            digest = _digest(page.data)
+            if self._is_current(path, page.data, digest):
+                unchanged.append(path)
+            else:
+                with _stage(stats, "write"):
+                    _write_atomic(path, page.data)
+                written.append(path)
+                if stats is not None:
+                    stats.bytes_written += len(page.data)
+            self._digests[path] = digest
+            if "digest" in page.info:
+                self._pixels[path] = page.info["digest"]
+            else:
+                self._pixels.pop(path, None)
+
+        removed = self._remove_stale(len(paths) if paths and paths[0] != self.output_path else 0)
+        return SyncResult(paths, written, unchanged, removed, time.perf_counter() - t0)
+
+    def _remove_stale(self, count: int) -> List[Path]:
+        """删除序号 >= count 的分页文件（从 stem_{count+1} 起连续存在的那些，外加记录过的）。"""
+        from .converter import _page_path
+
+        removed = []
+        stale = {p for p in self._digests if p != self.output_path}
+        index = count
+        while True:
+            path = _page_path(self.output_path, index)
+            if not path.exists():
+                break
+            stale.add(path)
+            index += 1
+        for path in sorted(stale):
+            number = path.stem.rsplit("_", 1)[-1]
+            if number.isdigit() and int(number) > count:
+                path.unlink(missing_ok=True)
+                self._digests.pop(path, None)
+                self._pixels.pop(path, None)
+                removed.append(path)
+        return removed
+
+    def render(self, md_content: str, stats: Optional["RenderStats"] = None, **kwargs) -> SyncResult:
+        """
+        渲染 md_content 并增量写出。
+
+        :param md_content: Markdown 原文
+        :param stats: 可选 RenderStats
+        :param kwargs: 覆盖构造时给的 iter_pages 参数
+        """
+        from .converter import _output_format, iter_pages
+
+        options = {**self.render_kwargs, **kwargs}
+        options.setdefault("format", _output_format(self.output_path))
+        paged = bool(options.get("page_size"))
+        pages = iter_pages(md_content, stats=stats, reuse=self._reuse if paged else None, **options)
+        return self.sync(pages, paged=paged, stats=stats)
+
+
+def _signature(path: Optional[Path]) -> Optional[Tuple[int, int]]:
+    if path is None:
+        return None
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def watch_file(
+    md_path: Union[str, Path],
+    output_path: Optional[Union[str, Path]] = None,
+    *,
+    css_path: Optional[Union[str, Path]] = None,
+    encoding: str = "utf-8",
+    interval: float = DEFAULT_INTERVAL,
+    on_render: Optional[Callable[[SyncResult], None]] = None,
+    on_error: Optional[Callable[[BaseException], None]] = None,
+    stop: Optional[Callable[[], bool]] = None,
+    stats_factory: Optional[Callable[[], "RenderStats"]] = None,
+    **render_kwargs,
+) -> None:
+    """
+    监视 Markdown（以及可选的 CSS）文件，内容变化时增量重新渲染；启动时先渲染一次。
+
+    :param md_path: .md 文件路径
+    :param output_path: 输出图片路径；不传则与 md 同目录、同名 .png
+    :param css_path: 额外 CSS 文件，变化时同样触发重新渲染（内容作为 extra_css）；文件不存在时每次渲染都经 on_error
+        报告 FileNotFoundError，并退回 render_kwargs 里的 extra_css（没有则不带额外 CSS）照常渲染
+    :param encoding: 读取文件用的编码
+    :param interval: 轮询间隔（秒）
+    :param on_render: 每次渲染完成后的回调 on_render(SyncResult)，默认打印摘要到 stderr
+    :param on_error: 渲染失败时的回调 on_error(exc)，默认打印到 stderr 并继续监视
+    :param stop: 返回 True 时结束监视（每次轮询检查一次）；默认一直运行到 KeyboardInterrupt
+    :param stats_factory: 每次渲染前调用，返回新的 RenderStats，传给渲染流程
+    :param render_kwargs: 传给 iter_pages 的参数（page_size、style、trim、max_height ...）
+    """
+    md_path = Path(md_path)
+    css_path = Path(css_path) if css_path else None
+    if output_path is None:
+        output_path = md_path.with_suffix(".png")
+    renderer = IncrementalRenderer(output_path, **render_kwargs)
+    on_render = on_render or _print_result
+    on_error = on_error or _print_error
+
+    seen = None
+    last_input = None
+    while not (stop and stop()):
+        current = (_signature(md_path), _signature(css_path))
+        if current == seen:
+            time.sleep(interval)
+            continue
+        time.sleep(SETTLE_DELAY)
+        if (_signature(md_path), _signature(css_path)) != current:
+            continue  # 还在写，下一轮再看
+        seen = current
+        extra_css = render_kwargs.get("extra_css")
+        try:
+            md_content = md_path.read_text(encoding=encoding)
+            if css_path is not None:
+                if current[1] is None:
+                    # CSS 被删除：不沿用上次读到的内容，明确退回 extra_css，并在每次渲染时提示
+                    on_error(FileNotFoundError(errno.ENOENT, "CSS 文件不存在，暂不带它渲染", str(css_path)))
+                else:
+                    extra_css = css_path.read_text(encoding=encoding)
+        except OSError as e:
+            on_error(e)
+            continue
+        if (md_content, extra_css) == last_input:
+            continue  # 只是 touch，内容没变
+        try:
+            stats = stats_factory() if stats_factory else None
+            result = renderer.render(md_content, stats=stats, extra_css=extra_css)
+        except Exception as e:
+            on_error(e)
+            continue
+        last_input = (md_content, extra_css)
+        on_render(result)
+
+
+def format_result(result: SyncResult) -> str:
+    """一行摘要：共几页、重写 / 未变 / 删除各几页、耗时。"""
+    return (
+        f"[md2img] 共 {len(result.paths)} 页：重写 {len(result.written)}，未变 {len(result.unchanged)}，"
+        f"删除 {len(result.removed)}（{result.elapsed * 1000:.0f}ms）"
+    )
+
+
+def _print_result(result: SyncResult) -> None:
+    print(format_result(result), file=sys.stderr)
+
+
+def _print_error(exc: BaseException) -> None:
+    print(f"[md2img] 渲染失败: {exc}", file=sys.stderr)
@@ -0,0 +1,8 @@
+import sys
+from pathlib import Path
+
+SKILL_ROOT = Path(__file__).resolve().parent.parent
+# 仓库根目录（md2img 包）与 benchmarks/（语料 corpus）
+for path in (SKILL_ROOT, SKILL_ROOT / "benchmarks"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
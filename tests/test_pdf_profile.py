@@ -0,0 +1,38 @@
+"""中间 PDF 按 INTERMEDIATE_PDF_OPTIONS 序列化后，栅格化结果与 WeasyPrint 默认选项的完整 PDF 逐像素一致。"""
+
+import pytest
+
+try:
+    import fitz  # noqa: F401
+    import weasyprint  # noqa: F401
+except (ImportError, OSError) as e:  # 未安装，或缺 Pango 等系统库
+    pytest.skip(f"需要 weasyprint 与 PyMuPDF: {e}", allow_module_level=True)
+
+import corpus  # noqa: E402
+from md2img import converter, iter_pages  # noqa: E402
+
+# 语料的一小段：卡片、代码块、表格、中文正文
+DOCS = {
+    "card": corpus.build("card"),
+    "code_heavy": corpus.build("code_heavy")[:2000],
+    "table_heavy": corpus.build("table_heavy")[:2000],
+    "cjk": corpus.build("cjk")[:2000],
+}
+
+
+def _pixels(md: str, style: str) -> list:
+    return [
+        (page.data.size, page.data.convert("RGB").tobytes())
+        for page in iter_pages(md, page_size=(1080, 1080), style=style, format="pil")
+    ]
+
+
+@pytest.mark.parametrize("style", ["default", "muyao"])
+@pytest.mark.parametrize("doc", list(DOCS))
+def test_intermediate_pdf_matches_full_pdf(monkeypatch, doc, style):
+    intermediate = _pixels(DOCS[doc], style)
+    monkeypatch.setattr(converter, "INTERMEDIATE_PDF_OPTIONS", {})
+    full = _pixels(DOCS[doc], style)
+    assert len(intermediate) == len(full)
+    for i, (a, b) in enumerate(zip(intermediate, full)):
+        assert a == b, f"第 {i} 页像素不同"
@@ -0,0 +1,30 @@
+"""启动开销回归：import md2img 不加载重依赖，且耗时在 startup.DEFAULT_BUDGET_MS 之内。"""
+
+import json
+import os
+import subprocess
+import sys
+
+from md2img import startup
+
+
+def _run(code: str) -> subprocess.CompletedProcess:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(startup.SKILL_ROOT), env.get("PYTHONPATH")]))
+    return subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True)
+
+
+def test_import_does_not_load_heavy_modules():
+    proc = _run(
+        "import json, sys\n"
+        "import md2img\n"
+        f"print(json.dumps(sorted(m for m in {startup.HEAVY_MODULES!r} if m in sys.modules)))\n"
+    )
+    assert proc.returncode == 0, proc.stderr
+    assert json.loads(proc.stdout.strip().splitlines()[-1]) == []
+
+
+def test_self_test_within_budget():
+    proc = _run("import sys\nfrom md2img import startup\nsys.exit(startup.self_test())\n")
+    assert proc.returncode == 0, proc.stdout + proc.stderr
+    assert "FAIL" not in proc.stdout